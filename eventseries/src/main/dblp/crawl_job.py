@@ -0,0 +1,140 @@
+import dataclasses
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from eventseries.src.main.util.atomic_file import atomic_write
+
+
+class CrawlState(str, Enum):
+    PENDING = "pending"
+    FETCHED = "fetched"
+    REDIRECTED = "redirected"
+    FAILED = "failed"
+
+
+@dataclass
+class CrawlEntry:
+    state: CrawlState = CrawlState.PENDING
+    attempts: int = 0
+    error: Optional[str] = None
+    # Parents of a crawled event, each a dictionary containing dblp_id and name as keys.
+    parents: List[Dict[str, str]] = field(default_factory=list)
+
+
+class CrawlJob:
+    """Queue of dblp ids to crawl that tracks the state of every id.
+    The job is stored as json, so that an interrupted crawl resumes with the ids
+    that are still pending. Failed ids are retried until they reached max_attempts."""
+
+    def __init__(
+        self,
+        dblp_ids: Iterable[str],
+        job_file: Optional[Path] = None,
+        max_attempts: int = 3,
+    ) -> None:
+        """
+        :param dblp_ids: ids to crawl, ids of an already stored job keep their state.
+        :param job_file: json file the job is loaded from and stored to, None keeps it in memory.
+        :param max_attempts: number of times an id is tried before it is given up.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1 but was " + str(max_attempts))
+        self.job_file = job_file
+        self.max_attempts = max_attempts
+        self.entries: Dict[str, CrawlEntry] = {}
+        if job_file is not None and job_file.is_file():
+            self.entries = CrawlJob._load_entries(job_file)
+            logging.info("Resuming crawl job %s with %s ids.", job_file, len(self.entries))
+        self.dblp_ids: List[str] = list(dict.fromkeys(dblp_ids))
+        for dblp_id in self.dblp_ids:
+            self.entries.setdefault(dblp_id, CrawlEntry())
+        self._started: float = time.monotonic()
+        self._finished_since_start: int = 0
+
+    def pending(self) -> List[str]:
+        """Ids of this job that are pending or failed but can be retried."""
+        return [
+            dblp_id
+            for dblp_id in self.dblp_ids
+            if self.entries[dblp_id].state == CrawlState.PENDING
+            or (
+                self.entries[dblp_id].state == CrawlState.FAILED
+                and self.entries[dblp_id].attempts < self.max_attempts
+            )
+        ]
+
+    def mark_fetched(
+        self,
+        dblp_id: str,
+        parents: List[Dict[str, str]],
+        redirected: bool = False,
+        error: Optional[str] = None,
+    ):
+        """:param error: failure of loading the parents, the parents are recorded nonetheless."""
+        entry = self.entries[dblp_id]
+        entry.state = CrawlState.REDIRECTED if redirected else CrawlState.FETCHED
+        entry.attempts += 1
+        entry.error = error
+        entry.parents = parents
+        self._finished_since_start += 1
+
+    def mark_failed(self, dblp_id: str, error: str):
+        entry = self.entries[dblp_id]
+        entry.state = CrawlState.FAILED
+        entry.attempts += 1
+        entry.error = error
+        self._finished_since_start += 1
+
+    def event_to_series(self) -> Dict[str, List[Dict[str, str]]]:
+        """Parents of every crawled id of this job."""
+        return {
+            dblp_id: self.entries[dblp_id].parents
+            for dblp_id in self.dblp_ids
+            if self.entries[dblp_id].state in (CrawlState.FETCHED, CrawlState.REDIRECTED)
+        }
+
+    def state_counts(self) -> Dict[CrawlState, int]:
+        return Counter(self.entries[dblp_id].state for dblp_id in self.dblp_ids)
+
+    def log_progress(self):
+        counts = self.state_counts()
+        elapsed = time.monotonic() - self._started
+        logging.info(
+            "Crawled %s of %s ids (%s redirected, %s failed), %.2f ids per second.",
+            counts[CrawlState.FETCHED] + counts[CrawlState.REDIRECTED],
+            len(self.dblp_ids),
+            counts[CrawlState.REDIRECTED],
+            counts[CrawlState.FAILED],
+            self._finished_since_start / elapsed if elapsed > 0 else 0.0,
+        )
+
+    def store(self):
+        """Write the job to its file. The file is replaced at once,
+        so an interruption while storing keeps the previous state."""
+        if self.job_file is None:
+            return
+        with atomic_write(self.job_file, mode="w") as file:
+            json.dump(
+                {dblp_id: dataclasses.asdict(entry) for dblp_id, entry in self.entries.items()},
+                file,
+            )
+
+    @staticmethod
+    def _load_entries(job_file: Path) -> Dict[str, CrawlEntry]:
+        with job_file.open("r") as file:
+            stored = json.load(file)
+        return {
+            dblp_id: CrawlEntry(
+                state=CrawlState(entry["state"]),
+                attempts=entry["attempts"],
+                error=entry["error"],
+                parents=entry["parents"],
+            )
+            for dblp_id, entry in stored.items()
+        }
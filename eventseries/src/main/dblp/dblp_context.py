@@ -1,4 +1,6 @@
+import json
 import logging
+import threading
 import time
 from importlib import resources as ires
 from pathlib import Path
@@ -6,6 +8,7 @@ from typing import Dict, List, Optional
 
 import requests
 import validators
+from bs4 import BeautifulSoup, SoupStrainer
 
 
 def is_likely_dblp_id(dblp_id: str) -> bool:
@@ -28,10 +31,25 @@ def get_dblp_id_from_url(dblp_url: str) -> str:
     )
 
 
+def get_redirect_target(content: str) -> Optional[str]:
+    """:returns the dblp-id a "Redirecting ..." page of dblp points to or None for other pages."""
+    if "Redirecting ..." not in content:
+        return None
+    soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("div", {"id": "main"}))
+    main_div = soup.find("div", {"id": "main"})
+    paragraph = None if main_div is None else main_div.find("p", recursive=False)
+    link = None if paragraph is None else paragraph.find("a", href=True)
+    return None if link is None else get_dblp_id_from_url(link["href"])
+
+
 class DblpContext:
     """Encapsulates access to dblp events and event-series.
     Accessed sites are cached and can be accessed later.
-    Everything is indexed based on the dblp-id (e.g. conf/aaai/affcon2019)."""
+    Everything is indexed based on the dblp-id (e.g. conf/aaai/affcon2019).
+    Ids that dblp redirects are mapped to the id they redirect to, their content is only
+    cached under that id."""
+
+    REDIRECTS_FILE = "redirects.json"
 
     def __init__(
         self,
@@ -39,7 +57,7 @@ class DblpContext:
         cache_file_path: Path = ires.files("eventseries.src.main") / "resources" / "dblp" / "conf",
         load_cache: bool = True,
         store_on_delete: bool = False,
-        dblp_timeout_ns: int = 1_000_000_000,  # half a second in nanoseconds
+        dblp_timeout_ns: int = 1_000_000_000,  # one second in nanoseconds
     ) -> None:
         if (
             dblp_base is None
@@ -60,11 +78,16 @@ class DblpContext:
 
         self.base_url: str = dblp_base
         self.dblp_cache: Dict[str, str] = {}  # 'dblp_id' : website content
+        self.redirects: Dict[str, str] = {}  # 'dblp_id' : 'dblp_id' it redirects to
         self.store_on_delete: bool = store_on_delete
         self.dblp_conf_path: Path = cache_file_path
         self.dblp_base_path: Path = cache_file_path.parent
         self.dblp_timeout_ns: int = dblp_timeout_ns
         self.last_request_time_ns: Optional[int] = None  # Time in ns at last request to dblp
+        # Guards last_request_time_ns, so that threads sharing the context keep the timeout.
+        self._request_lock = threading.Lock()
+        # Guards dblp_cache and redirects, the scraper loads ids from several threads.
+        self._cache_lock = threading.Lock()
         if load_cache:
             self.load_cache()
 
@@ -77,6 +100,23 @@ class DblpContext:
 
         return dblp_id.removesuffix("/")
 
+    def canonical_id(self, dblp_id: str) -> str:
+        """The id dblp redirects dblp_id to or the cleaned dblp_id if it is not redirected."""
+        cleaned_id = DblpContext._validate_and_clean_dblp_id(dblp_id)
+        return self.redirects.get(cleaned_id, cleaned_id)
+
+    def add_redirect(self, dblp_id: str, target_id: str):
+        """Map dblp_id to target_id. Redirects always point to a canonical id directly."""
+        cleaned_id = DblpContext._validate_and_clean_dblp_id(dblp_id)
+        with self._cache_lock:
+            canonical_target = self.canonical_id(target_id)
+            if cleaned_id == canonical_target:
+                return
+            for source, target in self.redirects.items():
+                if target == cleaned_id:
+                    self.redirects[source] = canonical_target
+            self.redirects[cleaned_id] = canonical_target
+
     def get_cached(self, dblp_id: str) -> str:
         """Access the cached websites by id. Use is_cached before to avoid exceptions.
         :param dblp_id: the requested id
@@ -84,8 +124,7 @@ class DblpContext:
         :raises KeyError if there is nothing stored for this id.
         """
         self._assert_is_cached(dblp_id)
-        cleaned_id = DblpContext._validate_and_clean_dblp_id(dblp_id)
-        return self.dblp_cache[cleaned_id]
+        return self.dblp_cache[self.canonical_id(dblp_id)]
 
     def cache_dblp_id(self, dblp_id: str, content: str):
         """
@@ -94,14 +133,14 @@ class DblpContext:
         :param content: The websites html as string.
         """
         cleaned_id = DblpContext._validate_and_clean_dblp_id(dblp_id)
-        if cleaned_id in self.dblp_cache:
-            logging.warning("Overriding cached content: " + dblp_id)
-        self.dblp_cache[cleaned_id] = content
+        with self._cache_lock:
+            if cleaned_id in self.dblp_cache:
+                logging.warning("Overriding cached content: " + dblp_id)
+            self.dblp_cache[cleaned_id] = content
 
     def is_cached(self, dblp_id: str) -> bool:
         """Check whether the id is stored in the cache."""
-        cleaned_id = DblpContext._validate_and_clean_dblp_id(dblp_id)
-        return cleaned_id in self.dblp_cache
+        return self.canonical_id(dblp_id) in self.dblp_cache
 
     def _assert_is_cached(self, key: str):
         if not self.is_cached(key):
@@ -127,13 +166,26 @@ class DblpContext:
                     file_dictionary[str(dblp_id)] = file.read()
 
         self.dblp_cache.update(file_dictionary)
-        logging.info(f"Loaded dblp cache. Found {len(self.dblp_cache)} entries.")
+        redirects_file = self.dblp_conf_path / DblpContext.REDIRECTS_FILE
+        if redirects_file.is_file():
+            with redirects_file.open() as file:
+                self.redirects.update(json.load(file))
+        # Caches of earlier versions stored the redirect pages under the redirected ids.
+        for dblp_id in self.redirects:
+            self.dblp_cache.pop(dblp_id, None)
+        logging.info(
+            f"Loaded dblp cache. Found {len(self.dblp_cache)} entries"
+            f" and {len(self.redirects)} redirects."
+        )
 
     def store_cache(self, overwrite=False):
         if not self.dblp_conf_path.is_dir():
             raise ValueError("The provided path is not a directory.")
 
-        for file_name, file_content in self.dblp_cache.items():
+        with self._cache_lock:
+            dblp_cache = dict(self.dblp_cache)
+            redirects = dict(self.redirects)
+        for file_name, file_content in dblp_cache.items():
             file_path = self.dblp_base_path / file_name
             full_file = file_path.with_suffix(".html")
             if not full_file.exists() or overwrite:
@@ -141,6 +193,15 @@ class DblpContext:
                 with full_file.open(mode="w") as file:
                     file.write(file_content)
 
+        redirects_file = self.dblp_conf_path / DblpContext.REDIRECTS_FILE
+        if redirects_file.is_file() and not overwrite:
+            # Keep stored redirects that were not loaded.
+            with redirects_file.open() as file:
+                redirects = {**json.load(file), **redirects}
+        if redirects:
+            with redirects_file.open(mode="w") as file:
+                json.dump(redirects, file)
+
     def __del__(self):
         if hasattr(self, "store_on_delete"):
             if not self.store_on_delete:
@@ -154,13 +215,33 @@ class DblpContext:
                     f"dblp_file_path = {hasattr(self, 'dblp_file_path')}"
                 )
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_request_lock"]
+        del state["_cache_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._request_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+    def _wait_for_request_slot(self):
+        """Block until dblp_timeout_ns passed since the last request and claim the slot.
+        Threads calling this concurrently get consecutive slots."""
+        with self._request_lock:
+            now = time.time_ns()
+            if self.last_request_time_ns is not None:
+                remaining = self.last_request_time_ns + self.dblp_timeout_ns - now
+                if remaining > 0:
+                    time.sleep(remaining / 1e9)  # nanoseconds remaining converted to seconds
+                    now += remaining
+            self.last_request_time_ns = now
+
     def request_dblp(self, dblp_url: str, retry: bool = True, ignore_timeout: bool = False) -> str:
-        if self.last_request_time_ns is not None and not ignore_timeout:
-            diff = time.time_ns() - self.last_request_time_ns
-            if diff < self.dblp_timeout_ns:
-                time.sleep(diff / 1e9)  # nanoseconds remaining converted to seconds
+        if not ignore_timeout:
+            self._wait_for_request_slot()
         response = requests.get(dblp_url, timeout=120)  # wait to minutes max
-        self.last_request_time_ns = time.time_ns()
         if response.status_code == 429:
             retry_time = response.headers.get("Retry-After")
             error_msg = "Too many requests to dblp.org"
@@ -182,19 +263,31 @@ class DblpContext:
         wait_time: Optional[float] = None,
         **kwargs,
     ):
-        if (
-            not ignore_cache
-            and self.is_cached(dblp_db_entry)
-            and self.get_cached(dblp_db_entry) != ""
-        ):
-            return self.get_cached(dblp_db_entry)
-        # Couldn't find id in cache -> requesting it:
-        response_text = self.request_dblp(dblp_url=self.base_url + dblp_db_entry, **kwargs)
-        if wait_time is not None and wait_time > 0.0:  # Avoid DDOSing dblp
-            time.sleep(wait_time)
-        if not ignore_cache:
-            self.cache_dblp_id(dblp_db_entry, response_text)
-        return response_text
+        """Load the content of the id from the cache or request it from dblp.
+        If dblp redirects the id, the redirect is recorded and the target is loaded instead."""
+        dblp_id = self.canonical_id(dblp_db_entry)
+        if not ignore_cache and self.is_cached(dblp_id) and self.get_cached(dblp_id) != "":
+            content = self.get_cached(dblp_id)
+            redirect_target = get_redirect_target(content)
+            if redirect_target is None:
+                return content
+            # Caches of earlier versions stored the redirect pages themselves.
+            with self._cache_lock:
+                self.dblp_cache.pop(dblp_id, None)
+        else:
+            # Couldn't find id in cache -> requesting it:
+            content = self.request_dblp(dblp_url=self.base_url + dblp_id, **kwargs)
+            if wait_time is not None and wait_time > 0.0:  # Avoid DDOSing dblp
+                time.sleep(wait_time)
+            redirect_target = get_redirect_target(content)
+            if redirect_target is None:
+                if not ignore_cache:
+                    self.cache_dblp_id(dblp_id, content)
+                return content
+        self.add_redirect(dblp_id, redirect_target)
+        if self.canonical_id(dblp_id) == dblp_id:
+            raise ValueError("dblp page redirects to itself: " + dblp_id)
+        return self.request_or_load_dblp(redirect_target, ignore_cache, wait_time, **kwargs)
 
     def get_cached_series_keys(self) -> List[str]:
         return [key for key in self.dblp_cache if is_likely_dblp_event_series(key)]
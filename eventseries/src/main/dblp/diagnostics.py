@@ -0,0 +1,78 @@
+import json
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+MISSING_COLON = "missing_colon"
+SEMICOLON_SEPARATOR = "semicolon_separator"
+SUSPICIOUS_YEAR = "suspicious_year"
+YEAR_NOT_AT_END = "year_not_at_end"
+MISSING_YEAR = "missing_year"
+SUSPICIOUS_ORDINAL = "suspicious_ordinal"
+MISSING_EVENT_TITLE = "missing_event_title"
+SUSPICIOUS_SERIES_NAME = "suspicious_series_name"
+LONG_ABBREVIATION = "long_abbreviation"
+NON_WORD_ABBREVIATION = "non_word_abbreviation"
+INVALID_YEAR_RANGE = "invalid_year_range"
+UNPARSEABLE_VENUE_DIV = "unparseable_venue_div"
+
+
+class ParseDiagnostics:
+    """Collects the oddities found while parsing dblp pages.
+    Every finding is counted by its code and the first max_samples subjects (a title,
+    a dblp id...) of each code are kept, so a bulk parse can be reviewed from one report.
+    A disabled collector returns from record at once."""
+
+    def __init__(self, enabled: bool = True, max_samples: int = 5) -> None:
+        if max_samples < 0:
+            raise ValueError("max_samples must not be negative but was " + str(max_samples))
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.counts: Counter = Counter()
+        self.samples: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, code: str, subject: str, detail: Optional[str] = None):
+        """:param code: kind of the finding, one of the constants of this module.
+        :param subject: what the finding is about, like the title or dblp id.
+        :param detail: additional information kept with the sample, like the exception message.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counts[code] += 1
+            samples = self.samples.setdefault(code, [])
+            if len(samples) < self.max_samples:
+                samples.append(subject if detail is None else f"{subject}: {detail}")
+
+    def reset(self):
+        """Forget all findings, to start collecting for a new run."""
+        with self._lock:
+            self.counts.clear()
+            self.samples.clear()
+
+    def report(self) -> Dict[str, Dict[str, Union[int, List[str]]]]:
+        """:returns count and samples of every code, the most frequent code first."""
+        with self._lock:
+            return {
+                code: {"count": count, "samples": list(self.samples[code])}
+                for code, count in self.counts.most_common()
+            }
+
+    def write_report(self, report_file: Path):
+        with report_file.open(mode="w") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def log_summary(self):
+        if not self.counts:
+            return
+        logging.info(
+            "Parse diagnostics: %s",
+            ", ".join(f"{code}={count}" for code, count in self.counts.most_common()),
+        )
+
+
+# Collector used by the dblp parsers. Disable it with PARSE_DIAGNOSTICS.enabled = False.
+PARSE_DIAGNOSTICS = ParseDiagnostics()
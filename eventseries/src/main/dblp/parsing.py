@@ -1,10 +1,16 @@
+import functools
 import itertools
+import logging
 import re
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup, Tag, SoupStrainer
 
+from eventseries.src.main.dblp import diagnostics
+from eventseries.src.main.dblp.dblp_context import get_dblp_id_from_url, is_likely_dblp_event_series
+from eventseries.src.main.dblp.diagnostics import PARSE_DIAGNOSTICS
 from eventseries.src.main.dblp.event_classes import DblpEvent, Event, DblpEventSeries
 from eventseries.src.main.dblp.venue_information import (
     HasPart,
@@ -19,76 +25,143 @@ from eventseries.src.main.dblp.venue_information import (
 )
 
 
+_VIRTUAL_PATTERN = re.compile(r"\[virtual(?: event)?\]")
+_YEAR_PATTERN = re.compile(r"\d{4}")
+_ORDINAL_PATTERN = re.compile(r"^(\d+)(?:rd|nd|th|st|\.)")
+
+
+class ParsedTitle(NamedTuple):
+    title: str
+    location: Optional[str]
+    virtual: bool
+    year: Optional[int]
+    ordinal: Optional[int]
+
+
+# Diagnostics found while parsing a title, as (code, subject) pairs.
+Findings = List[Tuple[str, str]]
+
+
+def _report(findings: Optional[Findings], code: str, subject: str):
+    """Collect the finding if a list is given, otherwise record it right away."""
+    if findings is None:
+        PARSE_DIAGNOSTICS.record(code, subject)
+    else:
+        findings.append((code, subject))
+
+
 class EventTitleParser:
     @staticmethod
-    def extract_virtual_location(full_title: str) -> Optional[Tuple[str, str]]:
-        opt_virtual = re.search(r"\[virtual(?: event)?\]", full_title)
-        if opt_virtual:
-            # strip whitespace left and right of [virtual]
-            location = opt_virtual.group()
-            return full_title.rstrip().removesuffix(location).rstrip(), location
-        return None
+    def parse_title(full_title: str) -> ParsedTitle:
+        """Split a title like "1. AT 2012: Dubrovnik, Croatia" into title and location and
+        extract year and ordinal of the title. Titles repeat across series pages,
+        so the results are memoized. The diagnostics of a title are memoized with it and
+        recorded on every call, so every run of the parser reports all its findings."""
+        parsed, findings = EventTitleParser._parse_title_cached(full_title)
+        if PARSE_DIAGNOSTICS.enabled:
+            for code, subject in findings:
+                PARSE_DIAGNOSTICS.record(code, subject)
+        return parsed
 
     @staticmethod
-    def extract_location(full_title: str) -> Tuple[str, Optional[str]]:
-        if ":" not in full_title:
-            title_with_virtual = EventTitleParser.extract_virtual_location(full_title)
-            if title_with_virtual is not None:
-                return title_with_virtual
+    @functools.lru_cache(maxsize=8192)
+    def _parse_title_cached(full_title: str) -> Tuple[ParsedTitle, Tuple[Tuple[str, str], ...]]:
+        findings: Findings = []
+        parsed = EventTitleParser._parse_title(full_title, findings)
+        return parsed, tuple(findings)
 
-            print("Missing : in title: " + full_title)
+    @staticmethod
+    def _parse_title(full_title: str, findings: Findings) -> ParsedTitle:
+        opt_virtual = _VIRTUAL_PATTERN.search(full_title)
+        separator = ":"
+        if ":" not in full_title:
+            if opt_virtual:
+                # strip whitespace left and right of [virtual]
+                location = opt_virtual.group()
+                title = full_title.rstrip().removesuffix(location).rstrip()
+                return EventTitleParser._parsed_title(title, location, True, findings)
+            _report(findings, diagnostics.MISSING_COLON, full_title)
             if full_title.count(";") == 1:
-                print("Found ; in title: " + full_title + " using this instead.")
-                return EventTitleParser.extract_location(full_title.replace(";", ":"))
+                _report(findings, diagnostics.SEMICOLON_SEPARATOR, full_title)
+                separator = ";"
 
-        event_title_opt_location = full_title.split(":")
+        event_title_opt_location = full_title.split(separator)
         location: Optional[str] = (
             event_title_opt_location[1] if len(event_title_opt_location) > 1 else None
         )
         if location:
             location = location.strip()
         title: str = event_title_opt_location[0].rstrip()
-        return title, location
+        return EventTitleParser._parsed_title(title, location, opt_virtual is not None, findings)
 
     @staticmethod
-    def test_realistic_year(year: int, title: str):
+    def _parsed_title(
+        title: str, location: Optional[str], virtual: bool, findings: Findings
+    ) -> ParsedTitle:
+        return ParsedTitle(
+            title=title,
+            location=location,
+            virtual=virtual,
+            year=EventTitleParser.extract_year(title, findings),
+            ordinal=EventTitleParser.extract_ordinal(title, findings),
+        )
+
+    @staticmethod
+    def extract_virtual_location(full_title: str) -> Optional[Tuple[str, str]]:
+        opt_virtual = _VIRTUAL_PATTERN.search(full_title)
+        if opt_virtual:
+            # strip whitespace left and right of [virtual]
+            location = opt_virtual.group()
+            return full_title.rstrip().removesuffix(location).rstrip(), location
+        return None
+
+    @staticmethod
+    def extract_location(full_title: str) -> Tuple[str, Optional[str]]:
+        parsed = EventTitleParser.parse_title(full_title)
+        return parsed.title, parsed.location
+
+    @staticmethod
+    def test_realistic_year(year: int, title: str, findings: Optional[Findings] = None):
         if year <= 1900 or year > datetime.now().year:
-            print(f"Found suspicious year {year} in title {title}")
+            _report(findings, diagnostics.SUSPICIOUS_YEAR, title)
 
     @staticmethod
-    def extract_year(title: str) -> Optional[int]:
-        # test if year is at end
-        opt_year = re.search(r"\d{4}$", title)
-        if opt_year is None:
+    def extract_year(title: str, findings: Optional[Findings] = None) -> Optional[int]:
+        """:param findings: collects the diagnostics instead of recording them."""
+        # test if year is at end, isdecimal matches the same digits as \d
+        if len(title) >= 4 and title[-4:].isdecimal():
+            year_text: Optional[str] = title[-4:]
+        else:
             # test if year is somewhere
-            opt_year = re.search(r"\d{4}", title)
-            if opt_year is not None:
-                print(f"Found year {opt_year.group()} but not at end of title: {title}")
-        if opt_year is None:
-            print("Could not find year in title: " + title)
+            opt_year = _YEAR_PATTERN.search(title)
+            year_text = None if opt_year is None else opt_year.group()
+            if year_text is not None:
+                _report(findings, diagnostics.YEAR_NOT_AT_END, title)
+        if year_text is None:
+            _report(findings, diagnostics.MISSING_YEAR, title)
             return None
 
-        year = int(opt_year.group())
-        EventTitleParser.test_realistic_year(year=year, title=title)
+        year = int(year_text)
+        EventTitleParser.test_realistic_year(year=year, title=title, findings=findings)
         return year
 
     @staticmethod
-    def extract_ordinal(title: str) -> Optional[int]:
-        opt_ordinal = re.search(r"^(\d+)(?:rd|nd|th|st|\.)", title)
+    def extract_ordinal(title: str, findings: Optional[Findings] = None) -> Optional[int]:
+        """:param findings: collects the diagnostics instead of recording them."""
+        opt_ordinal = _ORDINAL_PATTERN.match(title)
         if opt_ordinal is None:
             return None
-        ordinal = int(opt_ordinal.groups()[0])
+        ordinal = int(opt_ordinal.group(1))
         if ordinal < 0 or ordinal > 100:
-            print(f"Found suspicious ordinal: {ordinal} in title: {title}")
+            _report(findings, diagnostics.SUSPICIOUS_ORDINAL, title)
         return ordinal
 
 
 def event_from_title(full_title: str):
-    title, opt_location = EventTitleParser.extract_location(full_title)
-    opt_year = EventTitleParser.extract_year(title)
-    opt_ordinal = EventTitleParser.extract_ordinal(title)
-
-    return Event(title=title, year=opt_year, location=opt_location, ordinal=opt_ordinal)
+    parsed = EventTitleParser.parse_title(full_title)
+    return Event(
+        title=parsed.title, year=parsed.year, location=parsed.location, ordinal=parsed.ordinal
+    )
 
 
 def dblp_event_from_tag(headline: Tag, given_dblp_id: Optional[str] = None) -> DblpEvent:
@@ -107,7 +180,7 @@ def dblp_event_from_tag(headline: Tag, given_dblp_id: Optional[str] = None) -> D
     if event_title is None:
         strings: List = list(headline.find().strings)
         if len(strings) == 0:
-            print("Could not identify title of event: " + str(headline.find("h1")))
+            PARSE_DIAGNOSTICS.record(diagnostics.MISSING_EVENT_TITLE, dblp_id)
         event_title = " ".join(strings)
     event = event_from_title(event_title)
     return DblpEvent(dblp_id=dblp_id, **event.__dict__)
@@ -118,6 +191,76 @@ def dblp_event_from_html_content(html: str, dblp_id: str) -> DblpEvent:
     return dblp_event_from_tag(soup.find(id="headline"), dblp_id)
 
 
+def dblp_parents_from_html_content(event_content: Union[str, Tag]) -> List[Dict[str, str]]:
+    """Extract parent-series information from the breadcrumbs section of an event.
+    :returns a list of parents each a dictionary containing dblp_id and name as keys.
+    """
+    soup = (
+        event_content
+        if isinstance(event_content, Tag)
+        else BeautifulSoup(
+            event_content, "html.parser", parse_only=SoupStrainer("div", {"id": "breadcrumbs"})
+        )
+    )
+    breadcrumbs = soup.find("div", {"id": "breadcrumbs"})
+    parents_lists = breadcrumbs.find_all("li")
+    direct_parents: List[Dict] = []
+    for parent_li in parents_lists:
+        spans = parent_li.find_all("span", itemprop="itemListElement")
+        # Spans == 2 means we only have > Home > Conferences and Workshops
+        if len(spans) == 2:
+            continue
+        direct_parent = _get_span_with_highest_position(spans)
+        a_tag: Tag = direct_parent.find("a", {"itemprop": "item"})
+        dblp_id = get_dblp_id_from_url(a_tag["href"])
+        name = a_tag.find("span").string
+        if not is_likely_dblp_event_series(dblp_id):
+            logging.warning("Extracted suspicious series id %s in tag %s", dblp_id, parent_li)
+            continue
+        direct_parents.append({"name": name, "dblp_id": dblp_id})
+
+    return direct_parents
+
+
+def parse_conf_index_page(html: str, page_url: str) -> Tuple[List[str], Optional[str]]:
+    """Extract the venue links of a page of the dblp conference index.
+    :returns the absolute links to the venues and the link to the next page if there is one.
+    """
+    soup = BeautifulSoup(
+        html, "html.parser", parse_only=SoupStrainer("div", {"id": "browse-conf-output"})
+    )
+    conferences_div = soup.find("div", {"id": "browse-conf-output"})
+    if conferences_div is None:
+        raise ValueError("Page is not part of the conference index: " + page_url)
+    links = [
+        urljoin(page_url, a_tag["href"])
+        for ul_tag in conferences_div.find_all("ul")
+        for li_tag in ul_tag.find_all("li")
+        for a_tag in li_tag.find_all("a", href=True)
+    ]
+    navigation = conferences_div.find("p")
+    next_page_link = next(
+        (
+            urljoin(page_url, a_tag["href"])
+            for a_tag in ([] if navigation is None else navigation.find_all("a", href=True))
+            if a_tag.get_text() == "[next 100 entries]"
+        ),
+        None,
+    )
+    return links, next_page_link
+
+
+def _get_span_with_highest_position(span_tags: List[Tag]) -> Tag:
+    highest_position = -1
+    highest_span = None
+    for span in span_tags:
+        position = int(span.find("meta", {"itemprop": "position"})["content"])
+        if position > highest_position:
+            highest_position = position
+            highest_span = span
+    return highest_span
+
+
 class EventSeriesParser:
     @staticmethod
     def is_event_series(soup: BeautifulSoup):
@@ -199,14 +342,13 @@ def event_series_from_soup(soup: BeautifulSoup,
     headline = header.find("h1")
     name = str(headline.string)
     if "Redirecting" in name:
-        print("Suspicious name found: " + name + " for dblp_id: " + dblp_id)
+        PARSE_DIAGNOSTICS.record(diagnostics.SUSPICIOUS_SERIES_NAME, dblp_id, name)
     opt_abbreviation = re.search(r"\((\w{1,20})\)", name)
     if opt_abbreviation is None:
         long_abbreviation = re.search(r"\((\w+)\)", name)
         if long_abbreviation is not None:
-            print(
-                "Possible abbreviation longer than 20 characters: "
-                + long_abbreviation.groups()[0]
+            PARSE_DIAGNOSTICS.record(
+                diagnostics.LONG_ABBREVIATION, dblp_id, long_abbreviation.groups()[0]
             )
     abbreviation = None
     if opt_abbreviation is not None and len(opt_abbreviation.groups()) == 1:
@@ -215,10 +357,7 @@ def event_series_from_soup(soup: BeautifulSoup,
     if abbreviation:
         non_word = re.search(r"\W+", abbreviation)
         if non_word is not None:
-            print(
-                f"Suspicious characters found in abbreviation: '{non_word.group()}'"
-                f" Found in series name '{name}'"
-            )
+            PARSE_DIAGNOSTICS.record(diagnostics.NON_WORD_ABBREVIATION, dblp_id, name)
 
     infos = soup.find(id="info-section")
     venue_info = parse_venue_div(infos) if infos is not None else None
@@ -304,7 +443,7 @@ class VenueInformationParser:
             try:
                 years = year_range_from_string(em_text)
             except ValueError as exc:
-                print(exc)
+                PARSE_DIAGNOSTICS.record(diagnostics.INVALID_YEAR_RANGE, em_text, str(exc))
         part = name_with_opt_reference_from_tag(li_tag)
         return HasPart(part=part, years=years)
 
@@ -316,7 +455,7 @@ class VenueInformationParser:
             try:
                 years = year_range_from_string(em_text)
             except ValueError as exc:
-                print(exc)
+                PARSE_DIAGNOSTICS.record(diagnostics.INVALID_YEAR_RANGE, em_text, str(exc))
         part = name_with_opt_reference_from_tag(li_tag)
         return IsPartOf(partOf=part, years=years)
 
@@ -334,7 +473,7 @@ class VenueInformationParser:
             try:
                 years = year_range_from_string(em_text)
             except ValueError as exc:
-                print(exc)
+                PARSE_DIAGNOSTICS.record(diagnostics.INVALID_YEAR_RANGE, em_text, str(exc))
         reference = name_with_opt_reference_from_tag(li_tag)
         return Predecessor(reference=reference, year_range=years)
 
@@ -367,7 +506,7 @@ class VenueInformationParser:
                 try:
                     years = year_range_from_string(em_text)
                 except ValueError as exc:
-                    print(exc)
+                    PARSE_DIAGNOSTICS.record(diagnostics.INVALID_YEAR_RANGE, em_text, str(exc))
         reference = name_with_opt_reference_from_tag(li_tag)
         return Successor(reference=reference, year_range=years, merged_into=merged_into)
 
@@ -408,5 +547,5 @@ def parse_venue_div(info_section_div: BeautifulSoup) -> Optional[VenueInformatio
 
         return VenueInformation(**parameter)
     except Exception as exc:
-        print(f"Could not parse div: {info_section_div} got exception: {str(exc)}")
+        PARSE_DIAGNOSTICS.record(diagnostics.UNPARSEABLE_VENUE_DIV, repr(exc))
         return None
@@ -1,19 +1,21 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Tuple, Union, Dict
 
 import bs4
-from bs4 import BeautifulSoup, SoupStrainer
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.webdriver import WebDriver
-from selenium.webdriver.remote.webelement import WebElement
+import requests
 
+from eventseries.src.main.dblp.crawl_job import CrawlJob
 from eventseries.src.main.dblp.dblp_context import (
     DblpContext,
-    is_likely_dblp_event_series,
     get_dblp_id_from_url,
 )
+from eventseries.src.main.dblp.diagnostics import PARSE_DIAGNOSTICS
+from eventseries.src.main.dblp.parsing import (
+    dblp_parents_from_html_content,
+    parse_conf_index_page,
+)
 from eventseries.src.main.repository.repository import Repository
 
 
@@ -35,114 +37,119 @@ class DblpScraper:
     def __init__(self, ctx: DblpContext) -> None:
         self.ctx: DblpContext = ctx
 
-    def crawl_conf_index(
-        self, index_url: str, pos: int = 0, driver_instance: Optional[WebDriver] = None
+    def crawl_conf_index(self, index_url: str, pos: int = 0, max_workers: int = 4):
+        """Crawl the index of conferences and workshops from dblp. Store results in cache.
+        The index pages are followed one after another, the venues linked on a page are loaded
+        concurrently. All requests share the timeout of the context.
+        :param max_workers: number of venues that are requested at the same time.
+        """
+        next_url: Optional[str] = index_url if pos == 0 else index_url + "?pos=" + str(pos)
+        logging.info("Crawling everything from %s onward.", next_url)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while next_url is not None:
+                links, next_url = self.scrape_conf_index(conf_index_url=next_url)
+                self.resolve_and_load_conf_index_links(links=links, executor=executor)
+                self.ctx.store_cache()
+
+    def scrape_conf_index(self, conf_index_url: str) -> Tuple[List[str], Optional[str]]:
+        """Request an index page.
+        :returns the links to the venues and the link to the next page if there is one."""
+        return parse_conf_index_page(self.ctx.request_dblp(conf_index_url), conf_index_url)
+
+    def resolve_and_load_conf_index_links(
+        self, links: List[str], executor: Optional[ThreadPoolExecutor] = None
     ):
-        """Crawl the index of conferences and workshops from dblp. Store results in cache."""
-        full_url = index_url if pos == 0 else index_url + "?pos=" + str(pos)
-        logging.info("Crawling everything from %s onward.", index_url)
-        driver = webdriver.Firefox() if driver_instance is None else driver_instance
-        a_elements, opt_next_link = DblpScraper.scrape_conf_index(
-            conf_index_url=full_url, driver_instance=driver
-        )
-        self.resolve_and_load_conf_index_links(links=a_elements)
-        self.ctx.store_cache()
-        if opt_next_link is not None:
-            self.crawl_conf_index(index_url=opt_next_link, driver_instance=driver)
-        if driver_instance is None:
-            driver.quit()
-
-    @staticmethod
-    def scrape_conf_index(
-        conf_index_url: str, driver_instance: Optional[WebDriver] = None
-    ) -> Tuple[List[str], Optional[str]]:
-        driver: WebDriver = driver_instance if driver_instance is not None else webdriver.Firefox()
-        driver.get(conf_index_url)
-        conferences_div = driver.find_element(By.id, "browse-conf-output")
-        ul_elements: list[WebElement] = conferences_div.find_elements(By.TAG_NAME, "ul")
-        a_elements: list[WebElement] = []
-        for ul in ul_elements:
-            li_elements = ul.find_elements(By.TAG_NAME, "li")
-            for li in li_elements:
-                a_elements.extend(li.find_elements(By.TAG_NAME, "a"))
-
-        links = [a_ele.get_attribute("href") for a_ele in a_elements]
-
-        next_page_link_list = [
-            nextPage.get_attribute("href")
-            for nextPage in conferences_div.find_element(By.TAG_NAME, "p").find_elements(
-                By.TAG_NAME, "a"
-            )
-            if nextPage.text == "[next 100 entries]"
-        ]
-        if len(next_page_link_list) > 0:
-            next_page_link = next_page_link_list[0]
+        """Request or load every linked venue, concurrently if an executor is given."""
+        if executor is None:
+            for href in links:
+                self._load_conf_index_link(href)
         else:
-            next_page_link = None
-
-        # Only quit if this method created the driver
-        if driver_instance is None:
-            driver.quit()
-        # Don't close the window as this might quit the driver it is the only window.
-
-        return links, next_page_link
-
-    def resolve_and_load_conf_index_links(self, links: List[str]):
-        for href in links:
-            dblp_id = href.removeprefix(self.ctx.base_url)
-            self.ctx.request_or_load_dblp(dblp_id, wait_time=1)
-
-    def _resolve_redirecting(self, dblp_id: str, content: str):
-        if "Redirecting ..." not in content:
-            return
-        soup = BeautifulSoup(content, "html.parser", parse_only=SoupStrainer("div", {"id": "main"}))
-        real_url = (
-            soup.find("div", {"id": "main"}).find("p", recursive=False).find("a").attrs["href"]
-        )
-        redirected_dblp_id = get_dblp_id_from_url(real_url)
-        redirected_content = self.ctx.request_or_load_dblp(redirected_dblp_id)
-        self.ctx.cache_dblp_id(dblp_id, redirected_content)
-
-    def crawl_events(self, event_dblp_ids: List[str]) -> Dict[str, List[Dict]]:
+            # Consume the results to wait for all venues of this page.
+            list(executor.map(self._load_conf_index_link, links))
+
+    def _load_conf_index_link(self, href: str):
+        dblp_id = get_dblp_id_from_url(href)
+        try:
+            self.ctx.request_or_load_dblp(dblp_id)
+        except ValueError as exc:
+            logging.warning("Failed to load %s from the conference index: %s", dblp_id, exc)
+
+    def crawl_events(
+        self,
+        event_dblp_ids: List[str],
+        job_file: Optional[Path] = None,
+        max_attempts: int = 3,
+        checkpoint_every: int = 100,
+    ) -> Dict[str, List[Dict]]:
         """
         1. Request or load the content of each event.
         2. Extract possible series which the event is part of.
         3. Request or load the parent series.
         4. Stores both in the dblp context of the scraper class.
+        The state of every event is tracked in a CrawlJob, so an interrupted crawl resumes
+        with the events that are not crawled yet and failed events are retried.
+        :param job_file: json file of the crawl job, defaults to crawl_events.json next to the
+        dblp cache.
+        :param max_attempts: number of times an event is tried before it is given up.
+        :param checkpoint_every: store the dblp cache and the job after this many events.
         @:returns a dictionary mapping event dblp-ids to a dictionary {"dblp_id","name"}.
         """
-        counter = 0
+        if job_file is None:
+            job_file = self.ctx.dblp_base_path / "crawl_events.json"
+        job = CrawlJob(event_dblp_ids, job_file=job_file, max_attempts=max_attempts)
         logging.info("Crawling %s events.", len(event_dblp_ids))
-        event_to_series: Dict[str, List[Dict]] = {}
-        for dblp_id in event_dblp_ids:
-            counter += 1
-            try:
-                html = self.ctx.request_or_load_dblp(dblp_db_entry=dblp_id, wait_time=1)
-                self._resolve_redirecting(dblp_id, html)
-
-            except ValueError as exc:
-                logging.warning("Got exception for event: %s with error %s", dblp_id, exc)
-            dblp_stem: str = str(Path(dblp_id).parent)
-            parents: List[Dict] = self.extract_parents_from_dblp_event_id(event_id=dblp_id)
-            if not any(parent["dblp_id"] == dblp_stem for parent in parents):
-                logging.warning(
-                    "Could not find stem of event id in breadcrumbs. Expected %s in %s for id %s.",
-                    dblp_stem,
-                    parents,
-                    dblp_id
-                )
-            event_to_series[dblp_id] = parents
+        counter = 0
+        pending = job.pending()
+        while pending:
+            for dblp_id in pending:
+                counter += 1
+                try:
+                    self.ctx.request_or_load_dblp(dblp_db_entry=dblp_id, wait_time=1)
+                    redirected = self.ctx.canonical_id(dblp_id) != dblp_id
+                    parents = self._extract_parents(dblp_id)
+                except (ValueError, requests.RequestException) as exc:
+                    logging.warning("Got exception for event: %s with error %s", dblp_id, exc)
+                    job.mark_failed(dblp_id, str(exc))
+                else:
+                    parent_error = self._load_parents(parents)
+                    job.mark_fetched(dblp_id, parents, redirected, error=parent_error)
+                if counter % checkpoint_every == 0:
+                    self._checkpoint(job)
+            pending = job.pending()
+        self._checkpoint(job)
+        PARSE_DIAGNOSTICS.log_summary()
+        return job.event_to_series()
+
+    def _extract_parents(self, dblp_id: str) -> List[Dict[str, str]]:
+        dblp_stem: str = str(Path(dblp_id).parent)
+        parents: List[Dict] = self.extract_parents_from_dblp_event_id(event_id=dblp_id)
+        if not any(parent["dblp_id"] == dblp_stem for parent in parents):
+            logging.warning(
+                "Could not find stem of event id in breadcrumbs. Expected %s in %s for id %s.",
+                dblp_stem,
+                parents,
+                dblp_id,
+            )
+        return parents
 
+    def _load_parents(self, parents: List[Dict[str, str]]) -> Optional[str]:
+        """Request or load every parent series.
+        :returns the errors of the parents that could not be loaded or None."""
+        errors = []
+        for parent in parents:
             try:
-                for parent in parents:
-                    self.ctx.request_or_load_dblp(dblp_db_entry=parent["dblp_id"], wait_time=1)
-            except ValueError as exc:
-                logging.warning("Got exception for event: %s with error %s.", dblp_stem, exc)
-            if counter % 100 == 0:
-                logging.info("Loaded: %s events.", counter)
-            if counter % 200 == 0:
-                self.ctx.store_cache(overwrite=True)
-        return event_to_series
+                self.ctx.request_or_load_dblp(dblp_db_entry=parent["dblp_id"], wait_time=1)
+            except (ValueError, requests.RequestException) as exc:
+                logging.warning("Got exception for parent: %s with error %s.", parent, exc)
+                errors.append(f"{parent['dblp_id']}: {exc}")
+        return "; ".join(errors) if errors else None
+
+    def _checkpoint(self, job: CrawlJob):
+        # The cache is stored first, so the job never names an event as crawled
+        # whose content is missing on disk.
+        self.ctx.store_cache(overwrite=True)
+        job.store()
+        job.log_progress()
 
     def extract_parents_from_dblp_event_id(
         self, event_id: str, **kwargs: object
@@ -165,38 +172,4 @@ class DblpScraper:
         """
         :returns  a list of parents each a dictionary containing dblp_id and name as keys.
         """
-        soup = (
-            event_content
-            if isinstance(event_content, bs4.Tag)
-            else BeautifulSoup(
-                event_content, "html.parser", parse_only=SoupStrainer("div", {"id": "breadcrumbs"})
-            )
-        )
-        breadcrumbs = soup.find("div", {"id": "breadcrumbs"})
-        parents_lists = breadcrumbs.find_all("li")
-        direct_parents: List[Dict] = []
-        for parent_li in parents_lists:
-            spans = parent_li.find_all("span", itemprop="itemListElement")
-            # Spans == 2 means we only have > Home > Conferences and Workshops
-            if len(spans) == 2:
-                continue
-            direct_parent = self._get_span_with_highest_position(spans)
-            a_tag: bs4.Tag = direct_parent.find("a", {"itemprop": "item"})
-            dblp_id = get_dblp_id_from_url(a_tag["href"])
-            name = a_tag.find("span").string
-            if not is_likely_dblp_event_series(dblp_id):
-                logging.warning("Extracted suspicious series id %s in tag %s", dblp_id, parent_li)
-                continue
-            direct_parents.append({"name": name, "dblp_id": dblp_id})
-
-        return direct_parents
-
-    def _get_span_with_highest_position(self, span_tags: List[bs4.Tag]) -> bs4.Tag:
-        highest_position = -1
-        highest_span = None
-        for span in span_tags:
-            position = int(span.find("meta", {"itemprop": "position"})["content"])
-            if position > highest_position:
-                highest_position = position
-                highest_span = span
-        return highest_span
+        return dblp_parents_from_html_content(event_content)
@@ -0,0 +1,144 @@
+import gzip
+import logging
+import re
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from html.entities import html5
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from eventseries.src.main.dblp.diagnostics import PARSE_DIAGNOSTICS
+from eventseries.src.main.dblp.event_classes import DblpEvent, DblpEventSeries, Event
+from eventseries.src.main.dblp.parsing import EventTitleParser
+from eventseries.src.main.repository.dblp_respository import DblpRepository
+
+# The dump declares its named entities (like &ouml;) in dblp.dtd, which the parser does not load.
+# They are replaced by numeric character references before the bytes reach the parser.
+_XML_ENTITIES = {b"amp", b"lt", b"gt", b"quot", b"apos"}
+_ENTITY_PATTERN = re.compile(rb"&([A-Za-z][A-Za-z0-9]*);")
+
+
+def _replace_entity(match: "re.Match[bytes]") -> bytes:
+    name = match.group(1)
+    replacement = html5.get(name.decode("ascii") + ";")
+    if name in _XML_ENTITIES or replacement is None:
+        return match.group(0)
+    return b"".join(b"&#%d;" % ord(character) for character in replacement)
+
+
+def iter_dump_records(
+    dump_path: Path, tags: Tuple[str, ...] = ("proceedings",)
+) -> Iterator[ET.Element]:
+    """Stream the records of a dblp.xml(.gz) dump with the given tags.
+    Every record is cleared after it was yielded, so memory stays constant:
+    use a record before requesting the next one.
+    """
+    opener = gzip.open if dump_path.suffix == ".gz" else open
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: Optional[ET.Element] = None
+    depth = 0
+    with opener(dump_path, "rb") as dump:
+        for line in dump:
+            parser.feed(_ENTITY_PATTERN.sub(_replace_entity, line))
+            for event, element in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = element
+                    depth += 1
+                    continue
+                depth -= 1
+                # Records are the direct children of the root element.
+                if depth == 1:
+                    if element.tag in tags:
+                        yield element
+                    root.clear()
+    parser.close()
+
+
+@dataclass
+class DblpDump:
+    """Events, series and parents of events read from a dblp dump."""
+
+    events: Dict[str, DblpEvent] = field(default_factory=dict)
+    event_series: Dict[str, DblpEventSeries] = field(default_factory=dict)
+    # Parents of each event, each a dictionary containing dblp_id and name as keys.
+    parents: Dict[str, List[Dict[str, str]]] = field(default_factory=dict)
+
+    def store_in(self, dblp_repo: DblpRepository, overwrite: bool = False):
+        """Add the dump to the repository.
+        :param overwrite: replace entries the repository already has, which are usually parsed
+        from the dblp pages and hold more information, like the venue information of series.
+        """
+        for source, target in (
+            (self.events, dblp_repo.events),
+            (self.event_series, dblp_repo.event_series),
+            (self.parents, dblp_repo.parents),
+        ):
+            for dblp_id, item in source.items():
+                if overwrite or dblp_id not in target:
+                    target[dblp_id] = item
+
+
+def _event_id_of_record(record: ET.Element) -> str:
+    """The id of the dblp page listing the proceedings, like the ids of scraped events.
+    It differs from the record key (conf/esws/2019 is listed on conf/esws/eswc2019)."""
+    url = record.findtext("url")
+    if url is None:
+        return record.get("key")
+    return url.split("#", maxsplit=1)[0].removeprefix("db/").removesuffix(".html")
+
+
+def read_dblp_dump(dump_path: Path, prefix: str = "conf/") -> DblpDump:
+    """Build the events, their series and the parent graph of all proceedings in the dump
+    whose key starts with prefix in a single pass.
+    The dump has no names of series, the most common booktitle of their proceedings is used
+    as name and abbreviation. Series have no venue information.
+    """
+    dump = DblpDump()
+    booktitles: Dict[str, Counter] = defaultdict(Counter)
+    mentioned_events: Dict[str, List[Event]] = defaultdict(list)
+    for record in iter_dump_records(dump_path):
+        if not record.get("key", "").startswith(prefix):
+            continue
+        event_id = _event_id_of_record(record)
+        if event_id in dump.events:
+            continue  # Further volumes of the same proceedings.
+        title_element = record.find("title")
+        title = "" if title_element is None else "".join(title_element.itertext()).strip()
+        year_text = record.findtext("year")
+        event = Event(
+            title=title,
+            year=int(year_text) if year_text and year_text.isdigit() else None,
+            location=None,
+            ordinal=EventTitleParser.extract_ordinal(title),
+        )
+        dump.events[event_id] = DblpEvent(dblp_id=event_id, **event.__dict__)
+
+        series_id = event_id.rsplit("/", maxsplit=1)[0]
+        booktitle = record.findtext("booktitle")
+        if booktitle:
+            booktitles[series_id][booktitle] += 1
+        mentioned_events[series_id].append(event)
+        dump.parents[event_id] = [
+            {"dblp_id": series_id, "name": booktitle or series_id.rsplit("/", maxsplit=1)[-1]}
+        ]
+
+    for series_id, events in mentioned_events.items():
+        most_common = booktitles[series_id].most_common(1)
+        abbreviation = most_common[0][0] if most_common else None
+        dump.event_series[series_id] = DblpEventSeries(
+            dblp_id=series_id,
+            name=abbreviation or series_id.rsplit("/", maxsplit=1)[-1],
+            abbreviation=abbreviation,
+            venue_information=None,
+            mentioned_events=events,
+        )
+    logging.info(
+        "Read %s events of %s series from %s.",
+        len(dump.events),
+        len(dump.event_series),
+        dump_path,
+    )
+    PARSE_DIAGNOSTICS.log_summary()
+    return dump
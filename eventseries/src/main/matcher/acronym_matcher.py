@@ -1,10 +1,12 @@
 import logging
-from typing import List
+from typing import List, Optional
 
 import pandas as pd
 
 from eventseries.src.main.completion.attribute_completion import extract_acronym
+from eventseries.src.main.matcher.model_cache import ModelCache
 from eventseries.src.main.matcher.phrase_matcher import PhraseMatch
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import FullMatch
 from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEvent, WikiDataEventSeries
 
@@ -19,20 +21,38 @@ def _find_acronyms(matches_df: pd.DataFrame) -> pd.DataFrame:
 
 
 class AcronymMatch:
-    def __init__(self, matches_df: pd.DataFrame) -> None:
+    def __init__(
+        self,
+        matches_df: pd.DataFrame,
+        batch_size: int = 256,
+        n_process: int = 1,
+        model_cache: Optional[ModelCache] = None,
+    ) -> None:
         self.acronym_df = _find_acronyms(matches_df)
-        self.phrase_matcher = PhraseMatch(self.acronym_df)
+        self.phrase_matcher = PhraseMatch(
+            self.acronym_df, batch_size=batch_size, n_process=n_process, model_cache=model_cache
+        )
 
     def test_accuracy(self):
         logging.debug("Acronym matcher only trains phrase matcher.")
         self.phrase_matcher.test_accuracy()
 
     def wikidata_match(
-        self, events: List[WikiDataEvent], event_series: List[WikiDataEventSeries]
+        self,
+        events: List[WikiDataEvent],
+        event_series: List[WikiDataEventSeries],
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
-        events_with_acronym = [event for event in events if event.acronym is not None]
-        event_series = [series for series in event_series if series.acronym is not None]
-
-        acronym_matches_df = self.phrase_matcher.wikidata_match(events_with_acronym, event_series)
+        """:param features: Title features of the events and series, computed if not given."""
+        event_rows = [row for row, event in enumerate(events) if event.acronym is not None]
+        series_cols = [col for col, series in enumerate(event_series) if series.acronym is not None]
+        if features is not None:
+            features = features.take_events(event_rows).take_series(series_cols)
+
+        acronym_matches_df = self.phrase_matcher.wikidata_match(
+            [events[row] for row in event_rows],
+            [event_series[col] for col in series_cols],
+            features,
+        )
 
         return acronym_matches_df
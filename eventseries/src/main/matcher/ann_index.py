@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import zipfile
+from importlib import resources as ires
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from eventseries.src.main.matcher.similarity import dense_best_match, normalize_rows
+from eventseries.src.main.util.atomic_file import atomic_write
+
+
+def default_index_file(name: str) -> Path:
+    """File in the model resources an index named name is persisted to."""
+    return ires.files("eventseries.src.main") / "resources" / "models" / f"ivf_{name}_index.npz"
+
+
+class IvfIndex:
+    """Approximate nearest neighbour index (inverted file) over L2-normalized vectors.
+    The vectors are clustered with spherical k-means. A query is only compared to the vectors
+    of the n_probe clusters with the most similar centroids, so n_probe trades recall for speed.
+    Probing all clusters gives the same result as dense_best_match.
+    The fitted index is stored in index_file and only refitted if the vectors change."""
+
+    def __init__(
+        self,
+        index_file: Optional[Path] = default_index_file("series"),
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        seed: int = 0,
+    ) -> None:
+        """
+        :param index_file: File the index is persisted to. None keeps the index in memory.
+        :param n_lists: Number of clusters. Defaults to the square root of the number of vectors.
+        :param n_probe: Number of clusters searched per query.
+        :param seed: Seed of the k-means initialisation.
+        """
+        if n_probe < 1:
+            raise ValueError("n_probe must be at least 1 but was " + str(n_probe))
+        self.index_file: Optional[Path] = index_file
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.fingerprint: Optional[str] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        # Members of cluster c are list_members[list_offsets[c]:list_offsets[c + 1]].
+        self.list_offsets: Optional[np.ndarray] = None
+        self.list_members: Optional[np.ndarray] = None
+        if self.index_file is not None and self.index_file.is_file():
+            self.load()
+
+    @staticmethod
+    def vectors_fingerprint(vectors: np.ndarray, n_lists: Optional[int] = None) -> str:
+        """Identify the indexed vectors and the configured number of lists."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        sha = hashlib.sha256()
+        sha.update(f"{vectors.shape} {n_lists}".encode("utf-8"))
+        sha.update(vectors.tobytes())
+        return sha.hexdigest()
+
+    def is_fitted(self) -> bool:
+        return self.vectors is not None and self.centroids is not None
+
+    def fit(self, vectors: np.ndarray, n_iterations: int = 10) -> bool:
+        """Cluster the vectors if they differ from the already indexed ones.
+        :param vectors: Matrix with one row per indexed item, normalized with normalize_rows.
+        :param n_iterations: Number of k-means iterations.
+        :returns True if the index had to be refitted."""
+        fingerprint = IvfIndex.vectors_fingerprint(vectors, self.n_lists)
+        if self.is_fitted() and fingerprint == self.fingerprint:
+            return False
+        if len(vectors) == 0:
+            raise ValueError("The ivf index needs at least one vector.")
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n_lists = self.n_lists or max(1, int(round(np.sqrt(len(vectors)))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        logging.debug("Fitting ivf index with %s lists on %s vectors.", n_lists, len(vectors))
+
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)]
+        assignment = np.zeros(len(vectors), dtype=np.int64)
+        for _ in range(n_iterations):
+            assignment, _ = dense_best_match(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            # Clusters that lost all their vectors keep their previous centroid.
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_members = np.argsort(assignment, kind="stable")
+        self.list_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(assignment, minlength=n_lists)))
+        )
+        self.fingerprint = fingerprint
+        if self.index_file is not None:
+            self.store()
+        return True
+
+    def search(
+        self, queries: np.ndarray, n_probe: Optional[int] = None, block_size: int = 1024
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the (approximately) most similar indexed vector for every query.
+        :param queries: Matrix normalized with normalize_rows.
+        :param n_probe: Number of clusters searched per query, defaults to the one of the index.
+        :returns (best, similarities) as described by dense_best_match."""
+        if not self.is_fitted():
+            raise ValueError("The ivf index has to be fitted before searching.")
+        n_probe = min(self.n_probe if n_probe is None else n_probe, len(self.centroids))
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        best = np.full(len(queries), -1, dtype=np.int64)
+        best_similarities = np.zeros(len(queries), dtype=np.float32)
+        for block_start in range(0, len(queries), block_size):
+            block = queries[block_start : block_start + block_size]
+            centroid_similarities = block @ self.centroids.T
+            probed = np.argpartition(-centroid_similarities, n_probe - 1, axis=1)[:, :n_probe]
+            for local_row, clusters in enumerate(probed):
+                # Sorted candidates resolve ties like the exact search does.
+                candidates = np.sort(
+                    np.concatenate(
+                        [
+                            self.list_members[self.list_offsets[c] : self.list_offsets[c + 1]]
+                            for c in clusters
+                        ]
+                    )
+                )
+                if len(candidates) == 0:
+                    continue
+                similarities = self.vectors[candidates] @ block[local_row]
+                position = np.argmax(similarities)
+                best[block_start + local_row] = candidates[position]
+                best_similarities[block_start + local_row] = similarities[position]
+        return best, best_similarities
+
+    def store(self):
+        with atomic_write(self.index_file) as file:
+            np.savez(
+                file,
+                fingerprint=np.array(self.fingerprint),
+                vectors=self.vectors,
+                centroids=self.centroids,
+                list_offsets=self.list_offsets,
+                list_members=self.list_members,
+            )
+
+    def load(self):
+        """Load the stored index, an unreadable index file leaves the index unfitted."""
+        try:
+            with np.load(self.index_file, allow_pickle=False) as stored:
+                arrays = {name: stored[name] for name in stored.files}
+            fingerprint = str(arrays["fingerprint"])
+            vectors, centroids = arrays["vectors"], arrays["centroids"]
+            list_offsets, list_members = arrays["list_offsets"], arrays["list_members"]
+        except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile) as exc:
+            logging.warning("Ignoring unreadable ivf index %s: %s", self.index_file, exc)
+            return
+        self.fingerprint = fingerprint
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_members = list_members
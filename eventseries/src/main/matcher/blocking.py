@@ -0,0 +1,120 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from eventseries.src.main.matcher.title_features import MatchingFeatures, TitleFeatures
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    WikiDataEvent,
+    WikiDataEventSeries,
+    WikiDataEventType,
+)
+
+
+@dataclass(frozen=True)
+class CandidatePairs:
+    """Pairs of (event row, series column) that are worth comparing, ordered by row and column."""
+
+    rows: np.ndarray
+    cols: np.ndarray
+    shape: Tuple[int, int]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def contains(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Mask of the given pairs that are candidates."""
+        pair_keys = self.rows * self.shape[1] + self.cols
+        return np.isin(np.asarray(rows, dtype=np.int64) * self.shape[1] + cols, pair_keys)
+
+    def series_of(self, row: int) -> np.ndarray:
+        """Candidate series columns of the event row."""
+        start, end = np.searchsorted(self.rows, [row, row + 1])
+        return self.cols[start:end]
+
+    def restrict(self, event_rows: Sequence[int]) -> "CandidatePairs":
+        """Candidates of the given ascending event rows, renumbered to their positions."""
+        event_rows = np.asarray(event_rows, dtype=np.int64)
+        positions = np.full(self.shape[0], -1, dtype=np.int64)
+        positions[event_rows] = np.arange(len(event_rows))
+        kept = positions[self.rows] >= 0
+        return CandidatePairs(
+            positions[self.rows[kept]], self.cols[kept], (len(event_rows), self.shape[1])
+        )
+
+
+class Blocker:
+    """Generate candidate pairs of events and series, so that matchers skip implausible pairs.
+    An event and a series are a candidate if they share an acronym or a title word
+    (ignoring stopwords, ordinals and years) and their types do not contradict each other."""
+
+    def __init__(self, max_series_per_token: int = 100) -> None:
+        """
+        :param max_series_per_token: Words of more series (like "conference") are too common
+        to tell series apart and are not used for blocking.
+        """
+        self.max_series_per_token = max_series_per_token
+
+    def candidate_pairs(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        features: Optional[MatchingFeatures] = None,
+    ) -> CandidatePairs:
+        """:param features: Title features of events and series, computed if not given."""
+        if features is None:
+            features = MatchingFeatures.from_items(events, series)
+        token_columns: Dict[str, int] = {}
+        series_matrix = self._key_matrix(features.series, token_columns, add_tokens=True)
+        # Ignore the tokens shared by too many series.
+        token_counts = np.bincount(series_matrix.indices, minlength=series_matrix.shape[1])
+        series_matrix.data[token_counts[series_matrix.indices] > self.max_series_per_token] = 0
+        series_matrix.eliminate_zeros()
+        event_matrix = self._key_matrix(features.events, token_columns, add_tokens=False)
+
+        shared = (event_matrix @ series_matrix.T).tocoo()
+        shared.eliminate_zeros()
+        rows = shared.row.astype(np.int64)
+        cols = shared.col.astype(np.int64)
+
+        # Only workshops and conferences contradict each other, unknown types match both.
+        event_types = np.array([event.type.value for event in events], dtype=object)
+        series_types = np.array([item.type.value for item in series], dtype=object)
+        unknown = WikiDataEventType.UNKNOWN.value
+        compatible = (
+            (event_types[rows] == unknown)
+            | (series_types[cols] == unknown)
+            | (event_types[rows] == series_types[cols])
+        )
+        rows, cols = rows[compatible], cols[compatible]
+
+        order = np.lexsort((cols, rows))
+        candidates = CandidatePairs(rows[order], cols[order], (len(events), len(series)))
+        logging.info(
+            "Blocking kept %s of %s event-series pairs.", len(candidates), len(events) * len(series)
+        )
+        return candidates
+
+    @staticmethod
+    def _key_matrix(
+        features: TitleFeatures,
+        token_columns: Dict[str, int],
+        add_tokens: bool,
+    ) -> csr_matrix:
+        """Binary matrix of items x tokens and acronyms.
+        Unknown tokens get a column if add_tokens is set."""
+        indptr = [0]
+        indices: List[int] = []
+        for tokens, acronym_keys in zip(features.tokens, features.acronym_keys):
+            for key in tokens | acronym_keys:
+                if key not in token_columns:
+                    if not add_tokens:
+                        continue
+                    token_columns[key] = len(token_columns)
+                indices.append(token_columns[key])
+            indptr.append(len(indices))
+        return csr_matrix(
+            (np.ones(len(indices)), indices, indptr), shape=(len(features), len(token_columns))
+        )
@@ -0,0 +1,558 @@
+import abc
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from eventseries.src.main.dblp.dblp_context import get_dblp_id_from_url
+from eventseries.src.main.dblp.event_classes import DblpEvent
+from eventseries.src.main.dblp.venue_information import (
+    HasPart,
+    NameWithOptionalReference,
+    YearRange,
+)
+from eventseries.src.main.repository.dblp_respository import DblpRepository
+from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEventType
+
+
+class SnapshotEvent(NamedTuple):
+    title: str
+    year: Optional[int]
+    type: WikiDataEventType
+
+
+class SnapshotParent(NamedTuple):
+    """Parent series of an event as named in its breadcrumbs."""
+
+    dblp_id: str
+    name: str
+
+
+class SeriesFinding(NamedTuple):
+    """Series found for a dblp event.
+    series_id is None if the series is only known by name."""
+
+    event_id: str
+    series_id: Optional[str]
+    series_name: str
+    found_by: str
+
+
+class SeriesKind(NamedTuple):
+    """Whether the name of a series says it is a workshop, a conference or both."""
+
+    workshop: bool
+    conference: bool
+
+
+def classify_series_name(name: str) -> SeriesKind:
+    lowercase_name = name.lower()
+    return SeriesKind("workshop" in lowercase_name, "conference" in lowercase_name)
+
+
+class IndexedHasPart(NamedTuple):
+    lowercase_name: str
+    has_part: HasPart
+
+
+class DblpSnapshot(abc.ABC):
+    """Read-only access to the dblp data the matching of events needs."""
+
+    @abc.abstractmethod
+    def event_ids(self) -> List[str]:
+        pass
+
+    @abc.abstractmethod
+    def get_event(self, event_id: str) -> SnapshotEvent:
+        pass
+
+    @abc.abstractmethod
+    def get_parents(self, event_id: str) -> List[SnapshotParent]:
+        pass
+
+    @abc.abstractmethod
+    def get_series_name(self, series_id: str) -> str:
+        pass
+
+    @abc.abstractmethod
+    def get_has_parts(self, series_id: str) -> List[HasPart]:
+        pass
+
+    def get_series_kind(self, series_id: str) -> SeriesKind:
+        return classify_series_name(self.get_series_name(series_id))
+
+    def get_indexed_has_parts(self, series_id: str) -> List[IndexedHasPart]:
+        return [
+            IndexedHasPart(has_part.part.name.lower(), has_part)
+            for has_part in self.get_has_parts(series_id)
+        ]
+
+
+@dataclass(frozen=True)
+class DblpMatchingSnapshot(DblpSnapshot):
+    """Read-only data the dblp matching of events needs, without repositories and caches.
+    It is small enough to be sent to every worker process once.
+    Every series is classified and its has_parts are indexed once, when the snapshot is created,
+    so that matching an event only looks them up."""
+
+    events: Dict[str, SnapshotEvent]
+    parents: Dict[str, List[SnapshotParent]]
+    # Name and has_part venue information of every parent series by dblp id.
+    series_names: Dict[str, str]
+    has_parts: Dict[str, List[HasPart]]
+    series_kinds: Dict[str, SeriesKind] = field(init=False, repr=False, compare=False)
+    indexed_has_parts: Dict[str, List[IndexedHasPart]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        # The dataclass is frozen, derived fields have to be set through object.
+        object.__setattr__(
+            self,
+            "series_kinds",
+            {
+                series_id: classify_series_name(name)
+                for series_id, name in self.series_names.items()
+            },
+        )
+        object.__setattr__(
+            self,
+            "indexed_has_parts",
+            {
+                series_id: DblpSnapshot.get_indexed_has_parts(self, series_id)
+                for series_id in self.has_parts
+            },
+        )
+
+    @staticmethod
+    def from_repository(
+        dblp_repo: DblpRepository, events: Iterable[Tuple[DblpEvent, WikiDataEventType]]
+    ) -> "DblpMatchingSnapshot":
+        """Load parents and parent series of the events, requesting them from dblp if needed.
+        :param events: dblp events and the type of their wikidata event.
+        """
+        snapshot_events: Dict[str, SnapshotEvent] = {}
+        parents: Dict[str, List[SnapshotParent]] = {}
+        series_names: Dict[str, str] = {}
+        has_parts: Dict[str, List[HasPart]] = {}
+        for event, event_type in events:
+            snapshot_events[event.dblp_id] = SnapshotEvent(event.title, event.year, event_type)
+            parents[event.dblp_id] = [
+                SnapshotParent(parent["dblp_id"], parent["name"])
+                for parent in dblp_repo.get_or_load_parents(event.dblp_id)
+            ]
+            for parent in parents[event.dblp_id]:
+                if parent.dblp_id in series_names:
+                    continue
+                series = dblp_repo.get_or_load_event_series(parent.dblp_id)
+                series_names[parent.dblp_id] = series.name
+                has_parts[parent.dblp_id] = (
+                    series.venue_information.has_part if series.venue_information else []
+                )
+        return DblpMatchingSnapshot(snapshot_events, parents, series_names, has_parts)
+
+    def event_ids(self) -> List[str]:
+        return list(self.events)
+
+    def get_event(self, event_id: str) -> SnapshotEvent:
+        return self.events[event_id]
+
+    def get_parents(self, event_id: str) -> List[SnapshotParent]:
+        return self.parents[event_id]
+
+    def get_series_name(self, series_id: str) -> str:
+        return self.series_names[series_id]
+
+    def get_has_parts(self, series_id: str) -> List[HasPart]:
+        return self.has_parts[series_id]
+
+    def get_series_kind(self, series_id: str) -> SeriesKind:
+        return self.series_kinds[series_id]
+
+    def get_indexed_has_parts(self, series_id: str) -> List[IndexedHasPart]:
+        return self.indexed_has_parts[series_id]
+
+
+def extract_possible_series_abbreviation(event_title: str) -> Optional[str]:
+    # Often the title says that the workshop is part of a conference like workshop@conference.
+    at_pattern = r"(\w+)@\w+"
+    match = re.search(at_pattern, event_title)
+    if not match:
+        return None
+    return match.group(1)
+
+
+def get_next_or_none(sequence: Sequence, predicate: Callable):
+    return next((item for item in sequence if predicate(item)), None)
+
+
+def find_series(snapshot: DblpSnapshot, event_id: str) -> Optional[SeriesFinding]:
+    """Try to find the series of this event. Depending on whether it is a conference or workshop
+    different strategies will be applied.
+    :return: The found series or None if nothing could be found.
+    """
+    event = snapshot.get_event(event_id)
+    if event.type == WikiDataEventType.CONFERENCE:
+        return find_series_for_conference(snapshot, event_id)
+    if event.type == WikiDataEventType.WORKSHOP:
+        return find_series_for_workshop(snapshot, event_id)
+    logging.info("Skipping event with unknown type: %s", event_id)
+    return None
+
+
+def find_series_for_conference(
+    snapshot: DblpSnapshot, event_id: str
+) -> Optional[SeriesFinding]:
+    possible_parents = snapshot.get_parents(event_id)
+    if len(possible_parents) == 0:
+        logging.warning("Could not find any parents in dblp for conference: %s", event_id)
+        return None
+    if len(possible_parents) > 1:
+        logging.info(
+            "Found multiple possible series (%s) for conference (%s).", possible_parents, event_id
+        )
+    parent: Optional[SnapshotParent] = (
+        possible_parents[0]
+        if len(possible_parents) == 1
+        else get_next_or_none(possible_parents, lambda parent: event_id.startswith(parent.dblp_id))
+    )
+    if parent is None:
+        return None
+    # Make sure the parent is not a workshop.
+    kind = snapshot.get_series_kind(parent.dblp_id)
+    if kind.workshop and not kind.conference:
+        logging.warning(
+            "Found series (%s) for conference (%s) that is a workshop.", parent.dblp_id, event_id
+        )
+        return None
+    return SeriesFinding(
+        event_id,
+        parent.dblp_id,
+        snapshot.get_series_name(parent.dblp_id),
+        "DblpMatcher::_find_series_for_conference",
+    )
+
+
+def find_series_for_workshop(
+    snapshot: DblpSnapshot, event_id: str
+) -> Optional[SeriesFinding]:
+    """Try to identify the series which the workshop is part of.
+    1. Filter possible parents that are likely workshops
+    2. If only one parent remains return it.
+    3. Extract a possible abbreviation of the parent series from the title.
+    4. Try to find series in VenueInformation
+    5. Try to directly find the series from the abbreviation
+    """
+    possible_parents = snapshot.get_parents(event_id)
+    if len(possible_parents) == 0:
+        logging.warning("Could not find any parents in dblp for: %s", event_id)
+    parents_with_workshop_in_title = [
+        parent
+        for parent in possible_parents
+        if snapshot.get_series_kind(parent.dblp_id).workshop
+    ]
+    if len(parents_with_workshop_in_title) == 1:
+        series_id = parents_with_workshop_in_title[0].dblp_id
+        return SeriesFinding(
+            event_id,
+            series_id,
+            snapshot.get_series_name(series_id),
+            "DblpMatcher::_find_parent_for_workshop",
+        )
+    possible_parent_abbreviation = extract_possible_series_abbreviation(
+        snapshot.get_event(event_id).title
+    )
+    if possible_parent_abbreviation is None:
+        return None
+    # Convert to lower case for safer string comparisons
+    possible_parent_abbreviation = possible_parent_abbreviation.lower()
+
+    # Test whether the abbreviation can be found in the has_part venue info of a parent.
+    opt_finding = find_series_of_workshop_through_venue_info(
+        snapshot, event_id, possible_parent_abbreviation
+    )
+    if opt_finding is not None:
+        return opt_finding
+    # Try to find a parent with matching abbreviation
+    parent_with_abbreviation = [
+        parent
+        for parent in parents_with_workshop_in_title
+        if possible_parent_abbreviation in parent.name
+        or possible_parent_abbreviation in parent.dblp_id
+    ]
+    if len(parent_with_abbreviation) == 1:
+        series_id = parent_with_abbreviation[0].dblp_id
+        return SeriesFinding(
+            event_id, series_id, snapshot.get_series_name(series_id), "DblpMatcher::abbreviation"
+        )
+    return None
+
+
+def find_series_of_workshop_through_venue_info(
+    snapshot: DblpSnapshot, event_id: str, parent_abbreviation: str
+) -> Optional[SeriesFinding]:
+    event_year = snapshot.get_event(event_id).year
+    for parent in snapshot.get_parents(event_id):
+        for lowercase_name, has_part in snapshot.get_indexed_has_parts(parent.dblp_id):
+            if parent_abbreviation not in lowercase_name:
+                continue
+            # If both event and has_part define a year it has to match.
+            if has_part.years is not None and event_year is not None:
+                if event_year not in has_part.years:
+                    logging.info(
+                        "Dismissing match based on wrong year."
+                        "Event (%s) had year %s but has_part was only defined for %s.",
+                        event_id,
+                        event_year,
+                        has_part.years,
+                    )
+                    continue
+            # If has part defines a reference the series is known by its dblp id.
+            series_id = (
+                get_dblp_id_from_url(has_part.part.reference)
+                if has_part.part.reference is not None
+                else None
+            )
+            return SeriesFinding(
+                event_id, series_id, has_part.part.name, "DblpMatching::VenueInformation"
+            )
+    return None
+
+
+class MappedDblpSnapshot(DblpSnapshot):
+    """Snapshot stored as flat arrays in .npy files that are memory mapped read-only.
+    Processes attaching to the same directory share the pages of the operating system
+    instead of holding a copy each. Pickling only transfers the directory.
+
+    All strings are kept in one UTF-8 blob, sorted so that a string is found by binary search.
+    Events and series are sorted by dblp id, their parents and has_parts are stored in
+    CSR layout: the entries of row i are at offsets[i]:offsets[i + 1].
+    Missing numbers and strings are -1."""
+
+    ARRAYS = (
+        "string_data",
+        "string_offsets",
+        "event_ids",
+        "event_titles",
+        "event_years",
+        "event_types",
+        "parent_offsets",
+        "parent_ids",
+        "parent_names",
+        "series_ids",
+        "series_names",
+        "series_workshop",
+        "series_conference",
+        "has_part_offsets",
+        "has_part_names",
+        "has_part_lowercase_names",
+        "has_part_references",
+        "has_part_has_years",
+        "has_part_since",
+        "has_part_until",
+        "year_offsets",
+        "years",
+    )
+    EVENT_TYPES = list(WikiDataEventType)
+
+    def __init__(self, directory: Path) -> None:
+        """Use attach or export to create instances."""
+        self.directory = directory
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.load(directory / (name + ".npy"), mmap_mode="r")
+            for name in MappedDblpSnapshot.ARRAYS
+        }
+
+    def __reduce__(self):
+        return MappedDblpSnapshot.attach, (self.directory,)
+
+    @staticmethod
+    def attach(directory: Path) -> "MappedDblpSnapshot":
+        if not (directory / "string_data.npy").is_file():
+            raise ValueError("No exported dblp snapshot in: " + str(directory))
+        return MappedDblpSnapshot(directory)
+
+    @staticmethod
+    def export(snapshot: DblpSnapshot, directory: Path) -> "MappedDblpSnapshot":
+        """Write the snapshot as flat arrays into the existing directory and attach to it."""
+        event_ids = sorted(snapshot.event_ids())
+        events = [snapshot.get_event(event_id) for event_id in event_ids]
+        parents = [snapshot.get_parents(event_id) for event_id in event_ids]
+        series_ids = sorted({parent.dblp_id for ps in parents for parent in ps})
+        series_names = [snapshot.get_series_name(series_id) for series_id in series_ids]
+        series_kinds = [snapshot.get_series_kind(series_id) for series_id in series_ids]
+        has_parts = [snapshot.get_indexed_has_parts(series_id) for series_id in series_ids]
+        lowercase_names = [indexed.lowercase_name for hs in has_parts for indexed in hs]
+        all_has_parts = [indexed.has_part for hs in has_parts for indexed in hs]
+
+        strings = sorted(
+            set(event_ids)
+            | {event.title for event in events}
+            | {parent.name for ps in parents for parent in ps}
+            | set(series_ids)
+            | set(series_names)
+            | {has_part.part.name for has_part in all_has_parts}
+            | set(lowercase_names)
+            | {has_part.part.reference for has_part in all_has_parts if has_part.part.reference}
+        )
+        string_index = {string: index for index, string in enumerate(strings)}
+        encoded = [string.encode("utf-8") for string in strings]
+
+        def indices(values: Iterable[Optional[str]]) -> np.ndarray:
+            return np.array(
+                [-1 if value is None else string_index[value] for value in values], dtype=np.int64
+            )
+
+        def offsets(lengths: Iterable[int]) -> np.ndarray:
+            return np.concatenate([[0], np.cumsum(list(lengths), dtype=np.int64)]).astype(np.int64)
+
+        def optional_ints(values: Iterable[Optional[int]]) -> np.ndarray:
+            return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+
+        year_ranges = [has_part.years for has_part in all_has_parts]
+        arrays = {
+            "string_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "string_offsets": offsets(len(string) for string in encoded),
+            "event_ids": indices(event_ids),
+            "event_titles": indices(event.title for event in events),
+            "event_years": optional_ints(event.year for event in events),
+            "event_types": np.array(
+                [MappedDblpSnapshot.EVENT_TYPES.index(event.type) for event in events],
+                dtype=np.int8,
+            ),
+            "parent_offsets": offsets(len(event_parents) for event_parents in parents),
+            "parent_ids": indices(parent.dblp_id for ps in parents for parent in ps),
+            "parent_names": indices(parent.name for ps in parents for parent in ps),
+            "series_ids": indices(series_ids),
+            "series_names": indices(series_names),
+            "series_workshop": np.array([kind.workshop for kind in series_kinds], dtype=bool),
+            "series_conference": np.array([kind.conference for kind in series_kinds], dtype=bool),
+            "has_part_offsets": offsets(len(series_has_parts) for series_has_parts in has_parts),
+            "has_part_names": indices(has_part.part.name for has_part in all_has_parts),
+            "has_part_lowercase_names": indices(lowercase_names),
+            "has_part_references": indices(
+                has_part.part.reference or None for has_part in all_has_parts
+            ),
+            "has_part_has_years": np.array(
+                [years is not None for years in year_ranges], dtype=bool
+            ),
+            "has_part_since": optional_ints(years and years.since for years in year_ranges),
+            "has_part_until": optional_ints(years and years.until for years in year_ranges),
+            "year_offsets": offsets(len(years.years) if years else 0 for years in year_ranges),
+            "years": np.array(
+                [year for years in year_ranges if years is not None for year in years.years],
+                dtype=np.int64,
+            ),
+        }
+        for name, array in arrays.items():
+            np.save(directory / (name + ".npy"), array)
+        logging.info("Exported dblp snapshot of %s events to %s.", len(event_ids), directory)
+        return MappedDblpSnapshot.attach(directory)
+
+    def _string(self, index: int) -> str:
+        start, end = self.arrays["string_offsets"][index : index + 2]
+        return bytes(self.arrays["string_data"][start:end]).decode("utf-8")
+
+    def _string_index(self, string: str) -> int:
+        """Index of the string in the sorted string table, -1 if it is missing."""
+        low, high = 0, len(self.arrays["string_offsets"]) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self._string(middle) < string:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.arrays["string_offsets"]) - 1 and self._string(low) == string:
+            return low
+        return -1
+
+    def _row(self, keys: str, dblp_id: str) -> int:
+        """Row of the dblp id in the sorted id array keys, raises KeyError if it is missing."""
+        index = self._string_index(dblp_id)
+        row = int(np.searchsorted(self.arrays[keys], index))
+        if index < 0 or row == len(self.arrays[keys]) or self.arrays[keys][row] != index:
+            raise KeyError(dblp_id)
+        return row
+
+    def event_ids(self) -> List[str]:
+        return [self._string(index) for index in self.arrays["event_ids"]]
+
+    def get_event(self, event_id: str) -> SnapshotEvent:
+        row = self._row("event_ids", event_id)
+        year = int(self.arrays["event_years"][row])
+        return SnapshotEvent(
+            self._string(self.arrays["event_titles"][row]),
+            None if year == -1 else year,
+            MappedDblpSnapshot.EVENT_TYPES[self.arrays["event_types"][row]],
+        )
+
+    def get_parents(self, event_id: str) -> List[SnapshotParent]:
+        row = self._row("event_ids", event_id)
+        start, end = self.arrays["parent_offsets"][row : row + 2]
+        return [
+            SnapshotParent(
+                self._string(self.arrays["parent_ids"][entry]),
+                self._string(self.arrays["parent_names"][entry]),
+            )
+            for entry in range(start, end)
+        ]
+
+    def get_series_name(self, series_id: str) -> str:
+        return self._string(self.arrays["series_names"][self._row("series_ids", series_id)])
+
+    def get_has_parts(self, series_id: str) -> List[HasPart]:
+        row = self._row("series_ids", series_id)
+        start, end = self.arrays["has_part_offsets"][row : row + 2]
+        return [self._has_part(entry) for entry in range(start, end)]
+
+    def get_series_kind(self, series_id: str) -> SeriesKind:
+        row = self._row("series_ids", series_id)
+        return SeriesKind(
+            bool(self.arrays["series_workshop"][row]), bool(self.arrays["series_conference"][row])
+        )
+
+    def get_indexed_has_parts(self, series_id: str) -> List[IndexedHasPart]:
+        row = self._row("series_ids", series_id)
+        start, end = self.arrays["has_part_offsets"][row : row + 2]
+        return [
+            IndexedHasPart(
+                self._string(self.arrays["has_part_lowercase_names"][entry]), self._has_part(entry)
+            )
+            for entry in range(start, end)
+        ]
+
+    def _has_part(self, entry: int) -> HasPart:
+        reference = self.arrays["has_part_references"][entry]
+        years: Optional[YearRange] = None
+        if self.arrays["has_part_has_years"][entry]:
+            since = int(self.arrays["has_part_since"][entry])
+            until = int(self.arrays["has_part_until"][entry])
+            year_start, year_end = self.arrays["year_offsets"][entry : entry + 2]
+            years = YearRange(
+                [int(year) for year in self.arrays["years"][year_start:year_end]],
+                since=None if since == -1 else since,
+                until=None if until == -1 else until,
+            )
+        return HasPart(
+            NameWithOptionalReference(
+                self._string(self.arrays["has_part_names"][entry]),
+                None if reference == -1 else self._string(reference),
+            ),
+            years,
+        )
+
+
+# Snapshot of a worker process, set once by _init_worker.
+_worker_snapshot: Optional[DblpSnapshot] = None
+
+
+def _init_worker(snapshot: DblpSnapshot):
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _find_series_in_worker(event_id: str) -> Optional[SeriesFinding]:
+    return find_series(_worker_snapshot, event_id)
@@ -0,0 +1,48 @@
+import logging
+from importlib import resources as ires
+from pathlib import Path
+from typing import Dict
+
+import gensim.downloader as api
+from gensim.models import KeyedVectors
+
+GLOVE_WIKI_GIGAWORD_300 = "glove-wiki-gigaword-300"
+
+DEFAULT_STORE_DIR: Path = ires.files("eventseries.src.main") / "resources" / "models" / "embeddings"
+
+# Embeddings already loaded by this process, shared read-only by all matcher instances.
+# Forked workers inherit the mapping, spawned workers map the same file again.
+_loaded_embeddings: Dict[str, KeyedVectors] = {}
+
+
+def embedding_file(name: str, store_dir: Path = DEFAULT_STORE_DIR) -> Path:
+    return store_dir / (name + ".kv")
+
+
+def convert_embeddings(name: str, store_dir: Path = DEFAULT_STORE_DIR) -> Path:
+    """Download the embeddings through gensim-data and store them in gensim's native format.
+    This is only done once, the vectors are stored as separate .npy file that can be mmap'ed.
+    :returns the path of the stored KeyedVectors file."""
+    target = embedding_file(name, store_dir)
+    if target.is_file():
+        return target
+    logging.info("Converting embeddings %s to %s, this is only done once.", name, target)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    vectors: KeyedVectors = api.load(name)
+    # Always store the vectors separately, only then they can be memory-mapped.
+    vectors.save(str(target), separately=["vectors"])
+    return target
+
+
+def load_embeddings(
+    name: str = GLOVE_WIKI_GIGAWORD_300, store_dir: Path = DEFAULT_STORE_DIR
+) -> KeyedVectors:
+    """Load the embeddings memory-mapped and read-only.
+    Every process loads them at most once, all callers share the same instance.
+    The vectors must not be modified."""
+    target = embedding_file(name, store_dir)
+    key = str(target)
+    if key not in _loaded_embeddings:
+        convert_embeddings(name, store_dir)
+        _loaded_embeddings[key] = KeyedVectors.load(key, mmap="r")
+    return _loaded_embeddings[key]
@@ -0,0 +1,114 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Label of events for which a matcher did not report any series.
+NO_MATCH = -1
+# Label of series titles that are not part of the gold standard.
+UNKNOWN_SERIES = -2
+
+
+@dataclass(frozen=True)
+class MatchStatistics:
+    """Quality of the matches a matcher found on the training set."""
+
+    true_positives: int
+    false_positives: int
+    false_negatives: int
+
+    @property
+    def precision(self) -> float:
+        found = self.true_positives + self.false_positives
+        return self.true_positives / found if found > 0 else 0.0
+
+    @property
+    def recall(self) -> float:
+        expected = self.true_positives + self.false_negatives
+        return self.true_positives / expected if expected > 0 else 0.0
+
+    @property
+    def f1_score(self) -> float:
+        if self.precision + self.recall == 0:
+            return 0.0
+        return 2 * (self.precision * self.recall) / (self.precision + self.recall)
+
+    def log(self, description: str, level: int = logging.INFO):
+        logging.log(level, "Statistics from %s: ", description)
+        logging.log(level, "true positives: %s", self.true_positives)
+        logging.log(level, "false positives: %s", self.false_positives)
+        logging.log(level, "false negatives: %s", self.false_negatives)
+        logging.log(
+            level,
+            "Precision %s, recall %s and f1 %s",
+            self.precision,
+            self.recall,
+            self.f1_score,
+        )
+
+
+class GoldStandard:
+    """Event to series mapping of a training set with "event" and "series" columns.
+    Series titles are encoded as integer labels once, so that the predictions of a matcher
+    can be compared against the expected series without searching the dataframe."""
+
+    def __init__(self, matches_df: pd.DataFrame, nbr_of_events: Optional[int] = None) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns containing titles.
+        :param nbr_of_events: Number of events that should have been matched.
+        Defaults to the number of rows.
+        """
+        codes, uniques = pd.factorize(matches_df["series"])
+        self.row_labels: np.ndarray = codes
+        self.label_by_series: Dict[str, int] = {title: code for code, title in enumerate(uniques)}
+        # Events that occur more than once are expected to match the series of their first row.
+        first_rows = ~matches_df["event"].duplicated().to_numpy()
+        self.label_by_event: Dict[str, int] = dict(
+            zip(matches_df["event"].to_numpy()[first_rows], codes[first_rows])
+        )
+        self.nbr_of_events = len(matches_df) if nbr_of_events is None else nbr_of_events
+
+    def encode_series(self, series_titles: Iterable[Optional[str]]) -> np.ndarray:
+        """Labels for the series titles. None is encoded as NO_MATCH."""
+        return np.fromiter(
+            (
+                NO_MATCH if title is None else self.label_by_series.get(title, UNKNOWN_SERIES)
+                for title in series_titles
+            ),
+            dtype=np.int64,
+        )
+
+    def labels_for_events(self, event_titles: Iterable[str]) -> np.ndarray:
+        """Labels of the expected series for each event title."""
+        return np.fromiter(
+            (self.label_by_event.get(title, UNKNOWN_SERIES) for title in event_titles),
+            dtype=np.int64,
+        )
+
+    def evaluate(self, predicted: np.ndarray, expected: np.ndarray) -> MatchStatistics:
+        """
+        Compare aligned arrays of predicted and expected series labels.
+        Predictions with the label NO_MATCH are ignored.
+        Events that did not give out a (correct or wrong) match are counted as false negatives.
+        """
+        predicted = np.asarray(predicted)
+        expected = np.asarray(expected)
+        found = predicted != NO_MATCH
+        true_positives = int(np.count_nonzero(found & (expected >= 0) & (predicted == expected)))
+        false_positives = int(np.count_nonzero(found)) - true_positives
+        return MatchStatistics(
+            true_positives=true_positives,
+            false_positives=false_positives,
+            false_negatives=self.nbr_of_events - (true_positives + false_positives),
+        )
+
+    def evaluate_titles(
+        self, event_titles: Iterable[str], predicted_series: Iterable[Optional[str]]
+    ) -> MatchStatistics:
+        """Evaluate predicted (event title, series title) pairs.
+        A series title of None means that nothing was found for the event."""
+        return self.evaluate(
+            self.encode_series(predicted_series), self.labels_for_events(event_titles)
+        )
@@ -0,0 +1,123 @@
+import logging
+import multiprocessing
+import queue
+import time
+from math import inf
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+# A matcher task fits a matcher on the training set and matches the events to the series.
+# It returns matches or scored candidates, which have to be picklable.
+# Tasks run in worker processes and therefore have to be module level functions.
+MatcherTask = Callable[[pd.DataFrame, List[WikiDataEvent], List[WikiDataEventSeries]], Any]
+
+# Inputs shared read-only by all tasks of a worker process, set by _init_worker.
+_worker_inputs: Optional[
+    Tuple[pd.DataFrame, List[WikiDataEvent], List[WikiDataEventSeries]]
+] = None
+
+
+def _init_worker(
+    train_test_set: pd.DataFrame,
+    events: List[WikiDataEvent],
+    series: List[WikiDataEventSeries],
+):
+    global _worker_inputs
+    _worker_inputs = (train_test_set, events, series)
+
+
+def _run_task(task: MatcherTask) -> Any:
+    train_test_set, events, series = _worker_inputs
+    # Matchers modify their training dataframe in place, every task gets its own copy.
+    return task(train_test_set.copy(), events, series)
+
+
+class MatcherExecutor:
+    """Run independent matcher tasks concurrently in a process pool.
+    The inputs are transferred once per worker process instead of once per task.
+    A task that raises or exceeds its timeout is logged and skipped,
+    the results of the other tasks are yielded as soon as they are available."""
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        :param processes: Number of worker processes, defaults to one per task.
+        0 runs all tasks sequentially in this process without timeouts.
+        :param timeouts: Seconds each named task may take.
+        :param default_timeout: Seconds for tasks without a timeout, None waits indefinitely.
+        """
+        self.processes = processes
+        self.timeouts: Dict[str, float] = {} if timeouts is None else timeouts
+        self.default_timeout = default_timeout
+
+    def run(
+        self,
+        tasks: Dict[str, MatcherTask],
+        train_test_set: pd.DataFrame,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+    ) -> Iterator[Tuple[str, Any]]:
+        """Run the named tasks and yield (name, result) in the order the tasks finish.
+        Closing the iterator early terminates the tasks that are still running."""
+        if not tasks:
+            return
+        if self.processes == 0:
+            _init_worker(train_test_set, events, series)
+            try:
+                for name, task in tasks.items():
+                    try:
+                        yield name, _run_task(task)
+                    except Exception:
+                        logging.exception("Matcher %s failed, its matches are skipped.", name)
+            finally:
+                _init_worker(None, None, None)
+            return
+
+        processes = len(tasks) if self.processes is None else self.processes
+        # (name, matches, error) of every finished task, put by the result handler of the pool.
+        finished: queue.Queue = queue.Queue()
+        with multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(train_test_set, events, series)
+        ) as pool:
+            started = time.monotonic()
+            deadlines: Dict[str, float] = {}
+            for name, task in tasks.items():
+                pool.apply_async(
+                    _run_task,
+                    (task,),
+                    callback=lambda result, name=name: finished.put((name, result, None)),
+                    error_callback=lambda error, name=name: finished.put((name, None, error)),
+                )
+                timeout = self.timeouts.get(name, self.default_timeout)
+                deadlines[name] = inf if timeout is None else started + timeout
+
+            while deadlines:
+                wait = max(min(deadlines.values()) - time.monotonic(), 0)
+                try:
+                    name, result, error = finished.get(timeout=None if wait == inf else wait)
+                except queue.Empty:
+                    now = time.monotonic()
+                    for name in [name for name, deadline in deadlines.items() if deadline <= now]:
+                        logging.error("Matcher %s timed out, its matches are skipped.", name)
+                        del deadlines[name]
+                    continue
+                if name not in deadlines:
+                    continue  # Finished after its timeout.
+                del deadlines[name]
+                if error is not None:
+                    logging.error(
+                        "Matcher %s failed, its matches are skipped.", name, exc_info=error
+                    )
+                    continue
+                yield name, result
+            # Leaving the pool terminates workers that are still busy with timed out tasks.
@@ -0,0 +1,448 @@
+import abc
+import logging
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from eventseries.src.main.matcher.acronym_matcher import AcronymMatch
+from eventseries.src.main.matcher.ann_index import IvfIndex, default_index_file
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.embedding_store import load_embeddings
+from eventseries.src.main.matcher.matcher_execution import MatcherTask
+from eventseries.src.main.matcher.model_cache import ModelCache
+from eventseries.src.main.matcher.naive_word2vec_matcher import NaiveWord2VecMatch
+from eventseries.src.main.matcher.ngram_matcher import NgramMatch
+from eventseries.src.main.matcher.phrase_matcher import PhraseMatch, spacy_package_exists
+from eventseries.src.main.matcher.score_fusion import ScoredCandidates
+from eventseries.src.main.matcher.tfidf_matcher import TfIdfMatch
+from eventseries.src.main.matcher.title_features import MatchingFeatures
+from eventseries.src.main.matcher.word2vec_matcher import Word2VecMatch
+from eventseries.src.main.repository.completions import FullMatch
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+T = TypeVar("T")
+
+
+class BatchMatcher:
+    """Common interface of the matchers that match wikidata events to event series by title.
+    A matcher is fitted once on the training set and then matches batches of events."""
+
+    def __init__(self, model_cache: Optional[ModelCache] = None) -> None:
+        """:param model_cache: Cache of fitted models, defaults to the one in the resources."""
+        self.model_cache = ModelCache() if model_cache is None else model_cache
+
+    @abc.abstractmethod
+    def fit(self, train_test_set: pd.DataFrame):
+        """Fit the matcher on a dataframe with "event" and "series" columns containing titles."""
+
+    @abc.abstractmethod
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        """:param candidates: Pairs of events and series worth comparing, None compares all.
+        Matchers that cannot restrict their comparisons may ignore it.
+        :param features: Title features of the events and series, computed if not given."""
+
+    def score_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> ScoredCandidates:
+        """Scored candidates as arrays (event rows, series columns, scores).
+        Matchers without a score report every match of match_batch with a score of 1.
+        :param candidates: Only pairs contained in it are reported, None reports all."""
+        event_rows = {id(event): row for row, event in enumerate(events)}
+        series_cols = {id(event_series): col for col, event_series in enumerate(series)}
+        pairs = [
+            (event_rows[id(match.event)], series_cols[id(match.series)])
+            for match in self.match_batch(events, series, candidates, features)
+        ]
+        rows = np.fromiter((row for row, _ in pairs), dtype=np.int64, count=len(pairs))
+        cols = np.fromiter((col for _, col in pairs), dtype=np.int64, count=len(pairs))
+        if candidates is not None:
+            kept = candidates.contains(rows, cols)
+            rows, cols = rows[kept], cols[kept]
+        return rows, cols, np.ones(len(rows))
+
+
+class PhraseBatchMatcher(BatchMatcher):
+    def __init__(self, model_cache: Optional[ModelCache] = None) -> None:
+        super().__init__(model_cache)
+        self.matcher: Optional[PhraseMatch] = None
+
+    def fit(self, train_test_set: pd.DataFrame):
+        self.matcher = PhraseMatch(matches_df=train_test_set, model_cache=self.model_cache)
+        self.matcher.test_accuracy()
+
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        return self.matcher.wikidata_match(events, series, features)
+
+
+class AcronymBatchMatcher(BatchMatcher):
+    def __init__(self, model_cache: Optional[ModelCache] = None) -> None:
+        super().__init__(model_cache)
+        self.matcher: Optional[AcronymMatch] = None
+
+    def fit(self, train_test_set: pd.DataFrame):
+        self.matcher = AcronymMatch(train_test_set, model_cache=self.model_cache)
+        self.matcher.test_accuracy()
+
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        return self.matcher.wikidata_match(events, series, features)
+
+
+class NgramBatchMatcher(BatchMatcher):
+    def __init__(self, model_cache: Optional[ModelCache] = None) -> None:
+        super().__init__(model_cache)
+        self.matcher: Optional[NgramMatch] = None
+
+    def fit(self, train_test_set: pd.DataFrame):
+        self.matcher = NgramMatch(matches_df=train_test_set, model_cache=self.model_cache)
+
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        return self.matcher.match_events_to_series(
+            event_list=events, series_list=series, candidates=candidates, features=features
+        )
+
+
+class TfIdfBatchMatcher(BatchMatcher):
+    def __init__(self, model_cache: Optional[ModelCache] = None) -> None:
+        super().__init__(model_cache)
+        self.matcher: Optional[TfIdfMatch] = None
+
+    def fit(self, train_test_set: pd.DataFrame):
+        self.matcher = TfIdfMatch(train_test_set, model_cache=self.model_cache)
+
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        return self.matcher.wikidata_match(
+            events, series, candidates=candidates, features=features
+        )
+
+    def score_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> ScoredCandidates:
+        return self.matcher.wikidata_scores(
+            events, series, candidates=candidates, features=features
+        )
+
+
+class Word2VecBatchMatcher(BatchMatcher):
+    """Naive word2vec matching, followed by CBOW and skip-gram matching of the events
+    the naive matcher did not match."""
+
+    def __init__(
+        self, model_cache: Optional[ModelCache] = None, ann_min_series: Optional[int] = 10_000
+    ) -> None:
+        """
+        :param ann_min_series: Search the series through an approximate IvfIndex per model
+        if there are at least this many, fewer series are compared exactly.
+        None always compares exactly. Candidate pairs are always compared exactly.
+        """
+        super().__init__(model_cache)
+        self.ann_min_series = ann_min_series
+        self.naive_matcher: Optional[NaiveWord2VecMatch] = None
+        self.cbow_matcher: Optional[Word2VecMatch] = None
+        self.skip_gram_matcher: Optional[Word2VecMatch] = None
+        # Every model embeds the series differently, so each gets its own index.
+        self.series_indices: Dict[str, IvfIndex] = {}
+
+    def series_index(
+        self, model_name: str, series: List[WikiDataEventSeries]
+    ) -> Optional[IvfIndex]:
+        if self.ann_min_series is None or len(series) < self.ann_min_series:
+            return None
+        if model_name not in self.series_indices:
+            self.series_indices[model_name] = IvfIndex(
+                index_file=default_index_file("word2vec_" + model_name)
+            )
+        return self.series_indices[model_name]
+
+    def fit(self, train_test_set: pd.DataFrame):
+        self.naive_matcher = NaiveWord2VecMatch(train_test_set, model_cache=self.model_cache)
+        # Both matchers share the same read-only memory-mapped embeddings.
+        embeddings = load_embeddings()
+        # Since our training data is less we start with skip grams = 0 i.e. - CBOW
+        self.cbow_matcher = Word2VecMatch(
+            train_test_set, 0, embeddings, model_cache=self.model_cache
+        )
+        self.skip_gram_matcher = Word2VecMatch(
+            train_test_set, 1, embeddings, model_cache=self.model_cache
+        )
+
+    def match_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> List[FullMatch]:
+        rows, cols, _ = self.score_batch(events, series, candidates, features)
+        # Pairs found by both the CBOW and skip-gram model are only reported once.
+        return [
+            FullMatch(event=events[row], series=series[col], found_by="Word2VecMatch")
+            for row, col in dict.fromkeys(zip(rows, cols))
+        ]
+
+    def score_batch(
+        self,
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> ScoredCandidates:
+        naive_rows, naive_cols, naive_scores = self.naive_matcher.wikidata_scores(
+            events,
+            series,
+            self.series_index("naive", series),
+            candidates=candidates,
+            features=features,
+        )
+        remaining_rows = np.setdiff1d(np.arange(len(events)), naive_rows)
+        remaining_events = [events[row] for row in remaining_rows]
+        remaining_candidates = None if candidates is None else candidates.restrict(remaining_rows)
+        remaining_features = None if features is None else features.take_events(remaining_rows)
+
+        cbow_rows, cbow_cols, cbow_scores = self.cbow_matcher.wikidata_scores(
+            remaining_events,
+            series,
+            self.series_index("cbow", series),
+            candidates=remaining_candidates,
+            features=remaining_features,
+        )
+        skip_gram_rows, skip_gram_cols, skip_gram_scores = self.skip_gram_matcher.wikidata_scores(
+            remaining_events,
+            series,
+            self.series_index("skip_gram", series),
+            candidates=remaining_candidates,
+            features=remaining_features,
+        )
+        logging.info(
+            "Found %s matches with skip_grams=0 and %s for skp_grams=1",
+            len(cbow_rows),
+            len(skip_gram_rows),
+        )
+        # Pairs found by both models are reported twice, the fusion keeps the better score.
+        return (
+            np.concatenate(
+                (naive_rows, remaining_rows[cbow_rows], remaining_rows[skip_gram_rows])
+            ),
+            np.concatenate((naive_cols, cbow_cols, skip_gram_cols)),
+            np.concatenate((naive_scores, cbow_scores, skip_gram_scores)),
+        )
+
+
+def _run_in_batches(
+    factory: Callable[[], BatchMatcher],
+    batch_size: Optional[int],
+    candidates: Optional[CandidatePairs],
+    features: Optional[MatchingFeatures],
+    train_test_set: pd.DataFrame,
+    events: List[WikiDataEvent],
+    series: List[WikiDataEventSeries],
+    run_batch: Callable[..., T],
+) -> List[Tuple[int, T]]:
+    """Fit a new matcher and call run_batch with the matcher and every batch of batch_size
+    events (None for one batch), the series and the candidates and features of the batch.
+    :param candidates: Pairs of events and series worth comparing, None compares all.
+    :param features: Title features of the events and series, computed once if not given.
+    :returns the index of the first event of every batch with the result of run_batch."""
+    matcher = factory()
+    matcher.fit(train_test_set)
+    if features is None:
+        features = MatchingFeatures.from_items(events, series)
+    batch_size = max(len(events), 1) if batch_size is None else batch_size
+    results: List[Tuple[int, T]] = []
+    for batch_start in range(0, len(events), batch_size):
+        batch_end = min(batch_start + batch_size, len(events))
+        batch_candidates = (
+            None if candidates is None else candidates.restrict(np.arange(batch_start, batch_end))
+        )
+        result = run_batch(
+            matcher,
+            events[batch_start:batch_end],
+            series,
+            batch_candidates,
+            features.take_events(range(batch_start, batch_end)),
+        )
+        results.append((batch_start, result))
+    return results
+
+
+def run_batch_matcher(
+    factory: Callable[[], BatchMatcher],
+    batch_size: Optional[int],
+    candidates: Optional[CandidatePairs],
+    features: Optional[MatchingFeatures],
+    train_test_set: pd.DataFrame,
+    events: List[WikiDataEvent],
+    series: List[WikiDataEventSeries],
+) -> List[FullMatch]:
+    """Fit a new matcher and match the events in batches of batch_size (None for one batch).
+    :param candidates: Pairs of events and series worth comparing, None compares all.
+    :param features: Title features of the events and series, computed once if not given."""
+    batches = _run_in_batches(
+        factory,
+        batch_size,
+        candidates,
+        features,
+        train_test_set,
+        events,
+        series,
+        lambda matcher, *batch: matcher.match_batch(*batch),
+    )
+    return [match for _, matches in batches for match in matches]
+
+
+def score_batch_matcher(
+    factory: Callable[[], BatchMatcher],
+    batch_size: Optional[int],
+    candidates: Optional[CandidatePairs],
+    features: Optional[MatchingFeatures],
+    train_test_set: pd.DataFrame,
+    events: List[WikiDataEvent],
+    series: List[WikiDataEventSeries],
+) -> ScoredCandidates:
+    """Fit a new matcher and score the events in batches of batch_size (None for one batch).
+    :param candidates: Pairs of events and series worth comparing, None compares all.
+    :param features: Title features of the events and series, computed once if not given.
+    :returns the scored candidates with rows relative to events."""
+    batches = _run_in_batches(
+        factory,
+        batch_size,
+        candidates,
+        features,
+        train_test_set,
+        events,
+        series,
+        lambda matcher, *batch: matcher.score_batch(*batch),
+    )
+    found_rows = [np.empty(0, dtype=np.int64)]
+    found_cols = [np.empty(0, dtype=np.int64)]
+    found_scores = [np.empty(0)]
+    for batch_start, (rows, cols, scores) in batches:
+        found_rows.append(np.asarray(rows, dtype=np.int64) + batch_start)
+        found_cols.append(np.asarray(cols, dtype=np.int64))
+        found_scores.append(np.asarray(scores, dtype=np.float64))
+    return np.concatenate(found_rows), np.concatenate(found_cols), np.concatenate(found_scores)
+
+
+@dataclass(frozen=True)
+class MatcherRegistration:
+    """A matcher the NlpMatcher can run.
+    :param name: Unique name used to enable the matcher and in logs.
+    :param factory: Creates an unfitted matcher, has to be picklable (e.g. a class).
+    :param cost: Relative running time, cheaper matchers run first.
+    :param fast: Whether the matcher is suited for latency-sensitive runs.
+    :param is_available: Whether the dependencies of the matcher are installed.
+    :param batch_size: Number of events matched at once, None matches all events at once."""
+
+    name: str
+    factory: Callable[[], BatchMatcher]
+    cost: int
+    fast: bool
+    is_available: Callable[[], bool] = lambda: True
+    batch_size: Optional[int] = None
+
+    def task(
+        self,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> MatcherTask:
+        """Task returning the matches of the matcher.
+        :param candidates: Pairs of events and series worth comparing, None compares all.
+        :param features: Title features of the events and series, computed if not given."""
+        return partial(run_batch_matcher, self.factory, self.batch_size, candidates, features)
+
+    def scoring_task(
+        self,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> MatcherTask:
+        """Task returning the scored candidates of the matcher.
+        :param candidates: Pairs of events and series worth comparing, None compares all.
+        :param features: Title features of the events and series, computed if not given."""
+        return partial(score_batch_matcher, self.factory, self.batch_size, candidates, features)
+
+
+MATCHER_REGISTRY: Dict[str, MatcherRegistration] = {}
+
+
+def register_matcher(registration: MatcherRegistration):
+    if registration.name in MATCHER_REGISTRY:
+        raise ValueError("A matcher is already registered as " + registration.name)
+    MATCHER_REGISTRY[registration.name] = registration
+
+
+def registered_matchers(
+    names: Optional[Sequence[str]] = None, fast_only: bool = False
+) -> List[MatcherRegistration]:
+    """Available registered matchers ordered by cost.
+    :param names: Only these matchers, None for all registered matchers.
+    :param fast_only: Only matchers flagged as fast."""
+    if names is None:
+        names = list(MATCHER_REGISTRY.keys())
+    unknown = [name for name in names if name not in MATCHER_REGISTRY]
+    if unknown:
+        raise ValueError("Unknown matchers: " + ", ".join(unknown))
+    registrations = [MATCHER_REGISTRY[name] for name in names]
+    registrations = [
+        registration
+        for registration in registrations
+        if (registration.fast or not fast_only) and registration.is_available()
+    ]
+    return sorted(registrations, key=lambda registration: registration.cost)
+
+
+register_matcher(MatcherRegistration("tfidf", TfIdfBatchMatcher, cost=1, fast=True))
+register_matcher(
+    MatcherRegistration(
+        "phrase", PhraseBatchMatcher, cost=2, fast=True, is_available=spacy_package_exists
+    )
+)
+register_matcher(
+    MatcherRegistration(
+        "acronym", AcronymBatchMatcher, cost=2, fast=True, is_available=spacy_package_exists
+    )
+)
+register_matcher(MatcherRegistration("ngram", NgramBatchMatcher, cost=3, fast=False))
+register_matcher(MatcherRegistration("word2vec", Word2VecBatchMatcher, cost=5, fast=False))
@@ -0,0 +1,79 @@
+import hashlib
+import logging
+import pickle
+from importlib import resources as ires
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import pandas as pd
+
+from eventseries.src.main.util.atomic_file import atomic_write
+
+DEFAULT_MODEL_DIR: Path = ires.files("eventseries.src.main") / "resources" / "models" / "fitted"
+
+
+def training_fingerprint(matches_df: pd.DataFrame, **hyperparameters) -> str:
+    """Identify a fit by the "event" and "series" titles of the training set
+    and the hyperparameters of the matcher."""
+    sha = hashlib.sha256()
+    for event, series in zip(matches_df["event"], matches_df["series"]):
+        sha.update(str(event).encode("utf-8"))
+        sha.update(b"\x00")
+        sha.update(str(series).encode("utf-8"))
+        sha.update(b"\x01")
+    sha.update(repr(sorted(hyperparameters.items())).encode("utf-8"))
+    return sha.hexdigest()
+
+
+class ModelCache:
+    """Fitted attributes of matchers stored as one pickle file per matcher and fingerprint."""
+
+    def __init__(self, model_dir: Path = DEFAULT_MODEL_DIR) -> None:
+        self.model_dir = model_dir
+
+    def model_file(self, matcher_name: str, fingerprint: str) -> Path:
+        return self.model_dir / f"{matcher_name}-{fingerprint}.pickle"
+
+    def load(self, matcher_name: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """:returns the stored attributes, None if there are none or they are unreadable."""
+        model_file = self.model_file(matcher_name, fingerprint)
+        if not model_file.is_file():
+            return None
+        try:
+            with model_file.open("rb") as file:
+                return pickle.load(file)
+        except (EOFError, pickle.UnpicklingError) as exc:
+            logging.warning("Ignoring unreadable fitted model %s: %s", model_file, exc)
+            return None
+
+    def store(self, matcher_name: str, fingerprint: str, state: Dict[str, Any]):
+        with atomic_write(self.model_file(matcher_name, fingerprint)) as file:
+            pickle.dump(state, file)
+
+
+def fit_cached(
+    model_cache: Optional[ModelCache],
+    matcher: object,
+    fingerprint: str,
+    attributes: Sequence[str],
+    fit: Callable[[], None],
+) -> bool:
+    """Restore the fitted attributes of matcher from the cache, or fit it and cache them.
+    :param model_cache: Cache to use, None always fits.
+    :param attributes: Names of the attributes that fit sets on the matcher.
+    :returns True if the attributes were restored instead of fitted."""
+    matcher_name = type(matcher).__name__
+    state = None if model_cache is None else model_cache.load(matcher_name, fingerprint)
+    if state is not None:
+        logging.info("Restored fitted %s from the model cache.", matcher_name)
+        for attribute in attributes:
+            setattr(matcher, attribute, state[attribute])
+        return True
+    fit()
+    if model_cache is not None:
+        model_cache.store(
+            matcher_name,
+            fingerprint,
+            {attribute: getattr(matcher, attribute) for attribute in attributes},
+        )
+    return False
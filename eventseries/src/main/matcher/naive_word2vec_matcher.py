@@ -1,166 +1,166 @@
-import re
-from typing import List
+import logging
+from typing import List, Optional, Tuple
 
-import nltk
 import numpy as np
 import pandas as pd
 from gensim.models import Word2Vec
-from nltk.corpus import stopwords
-from sklearn.metrics.pairwise import cosine_similarity
 
+from eventseries.src.main.matcher.ann_index import IvfIndex
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.evaluation import GoldStandard, NO_MATCH
+from eventseries.src.main.matcher.model_cache import ModelCache, fit_cached, training_fingerprint
+from eventseries.src.main.matcher.similarity import (
+    best_pair_per_row,
+    dense_best_match,
+    normalize_rows,
+    pair_similarities,
+)
+from eventseries.src.main.matcher.title_cache import TitleCache, load_title_cache
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import FullMatch
 from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEvent, WikiDataEventSeries, \
     get_title_else_label
 
 
 class NaiveWord2VecMatch:
-    def __init__(self, matches_df: pd.DataFrame) -> None:
+    # Similarities from which fit chooses the one with the best f1 score on the training set.
+    similarity_thresholds = (0.8, 0.85, 0.9, 0.93, 0.95)
+
+    def __init__(
+            self,
+            matches_df: pd.DataFrame,
+            title_cache: Optional[TitleCache] = None,
+            model_cache: Optional[ModelCache] = None,
+    ) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns used for training.
+        :param title_cache: Cache of tokens and title vectors, defaults to the shared persisted one.
+        :param model_cache: Cache of fitted models, None always fits.
+        """
         matches_df.dropna(inplace=True)
         self.matches_df = matches_df
         self.matches_df.dropna(inplace=True)
         self.matches_df.reset_index(drop=True, inplace=True)
-        self.stop_words = set(stopwords.words("english"))
-        self.event_titles = self.remove_stopwords_tokenize(matches_df["event"].tolist())
-        self.event_titles = [[token.lower() for token in tokens] for tokens in self.event_titles]
-        self.series_titles = self.remove_stopwords_tokenize(matches_df["series"].tolist())
-        self.series_titles = [[token.lower() for token in tokens] for tokens in self.series_titles]
-        self.model = Word2Vec(self.event_titles + self.series_titles, vector_size=100, window=5, min_count=1, sg=0)
+        self.title_cache = load_title_cache() if title_cache is None else title_cache
+        self.event_titles = self.title_cache.tokens(matches_df["event"].tolist())
+        self.series_titles = self.title_cache.tokens(matches_df["series"].tolist())
         self.matches_df["event_tokenized"] = self.event_titles
         self.matches_df["series_tokenized"] = self.series_titles
         self.recall = 0
-        self.event_vector_list = []
-        for event_tokens in self.event_titles:
-            event_vector = np.mean([self.model.wv[token] for token in event_tokens], axis=0)
-            event_vector = event_vector.reshape(1, -1)
-            self.event_vector_list.append(event_vector)
-        self.matches_df["event_vectors"] = self.event_vector_list
-
-        series_vector_list = []
-        for series_tokens in self.series_titles:
-            series_vector = np.mean([self.model.wv[token] for token in series_tokens], axis=0)
-            series_vector = series_vector.reshape(1, -1)
-            series_vector_list.append(series_vector)
-        self.matches_df["event_series_vectors"] = series_vector_list
-        self.fit()
+        self.gold_standard = GoldStandard(self.matches_df)
+        self.model: Optional[Word2Vec] = None
+        self.best_threshold = self.similarity_thresholds[0]
+        fit_cached(
+            model_cache,
+            self,
+            training_fingerprint(
+                self.matches_df,
+                vector_size=100,
+                window=5,
+                sg=0,
+                similarity_thresholds=self.similarity_thresholds,
+            ),
+            ["model", "best_threshold", "recall"],
+            self.fit,
+        )
+        self.title_cache.flush()
 
     def fit(self):
-        true_positives = 0
-        false_positives = 0
-        for i in range(0, len(self.matches_df["event_vectors"])):
-            max_similarity = 0
-            best_j = -1
-            for j in range(0, len(self.matches_df["event_series_vectors"])):
-                similarity = cosine_similarity(self.matches_df.loc[i, "event_vectors"],
-                                               self.matches_df.loc[j, "event_series_vectors"])[0][0]
-                if i == j:
-                    same_index_similarity = similarity
-                if similarity > max_similarity:
-                    max_similarity = similarity
-                    best_j = j
-            # FIXME same_index_similarity might not be defined at this point
-            if i != best_j and max_similarity > same_index_similarity:
-                false_positives += 1
-                # print("EVENT: ", self.matches_df.loc[i, "event"])
-                # print("SERIES: ", self.matches_df.loc[best_j, "event_series"])
-                # print("i: ", i)
-                # print("j: ", best_j)
-                # print()
-            else:
-                true_positives += 1
-
-        # We consider all the events that did not give out a match as the false negative set.
-        false_negatives = len(self.event_titles) - (true_positives + false_positives)
-
-        print(f"\nStatistics from Naive Word2Vec matching: ")
-        precision = true_positives / (true_positives + false_positives)
-        print("Precision: ", precision)
-        recall = true_positives / (true_positives + false_negatives)
-        print("Recall: ", recall)
-        self.recall = recall
-        f1_score = 2 * (precision * recall) / (precision + recall)
-        print("F1-Score: ", f1_score)
+        self.model = Word2Vec(self.event_titles + self.series_titles, vector_size=100, window=5, min_count=1, sg=0)
+        # Title embeddings stacked as normalized float32 matrices, one row per training pair.
+        self.event_vectors = normalize_rows(
+            self.title_cache.vectors(self.matches_df["event"].tolist(), self.model.wv)
+        )
+        self.series_vectors = normalize_rows(
+            self.title_cache.vectors(self.matches_df["series"].tolist(), self.model.wv)
+        )
+
+        # The most similar series for every event of the training set.
+        best_series, max_similarities = dense_best_match(self.event_vectors, self.series_vectors)
+        best_series[max_similarities <= 0] = -1
+
+        expected = self.gold_standard.row_labels
+        best_f1score = 0
+        statistics_by_threshold = {}
+        for threshold in self.similarity_thresholds:
+            # Events below the threshold are not matched and count as false negatives.
+            predicted = np.where(
+                (best_series >= 0) & (max_similarities >= threshold),
+                expected[best_series],
+                NO_MATCH,
+            )
+            statistics = self.gold_standard.evaluate(predicted, expected)
+            statistics_by_threshold[threshold] = statistics
+            if statistics.f1_score > best_f1score:
+                best_f1score = statistics.f1_score
+                self.best_threshold = threshold
+        best_statistics = statistics_by_threshold[self.best_threshold]
+        logging.info("Best threshold for Naive Word2Vec matching: %s", self.best_threshold)
+        best_statistics.log("Naive Word2Vec matching")
+        self.recall = best_statistics.recall
 
     def wikidata_match(
             self,
             events_list: List[WikiDataEvent],
             series_list: List[WikiDataEventSeries],
+            series_index: Optional[IvfIndex] = None,
+            candidates: Optional[CandidatePairs] = None,
+            features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
+        """
+        Match every event to the series with the most similar title embedding,
+        if their similarity reaches the threshold chosen in fit.
+        :param series_index: Approximate index used instead of comparing all pairs.
+        It is refitted if the series vectors differ from the indexed ones.
+        :param candidates: Only compare these pairs of events and series, None compares all.
+        :param features: Title features of the events and series, computed if not given.
+        """
+        rows, cols, _ = self.wikidata_scores(
+            events_list, series_list, series_index, candidates, features
+        )
+        return [
+            FullMatch(
+                event=events_list[row],
+                series=series_list[col],
+                found_by="NaiveWord2VecMatch::wikidata_match",
+            )
+            for row, col in zip(rows, cols)
+        ]
+
+    def wikidata_scores(
+            self,
+            events_list: List[WikiDataEvent],
+            series_list: List[WikiDataEventSeries],
+            series_index: Optional[IvfIndex] = None,
+            candidates: Optional[CandidatePairs] = None,
+            features: Optional[MatchingFeatures] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(event rows, series columns, similarities) of the events wikidata_match matches."""
         if self.recall == 1:
-            print("Model is overfitting, and cannot be used")
-            return []
-
-        event_titles = [get_title_else_label(event) for event in events_list]
-        series_titles = [get_title_else_label(series) for series in series_list]
-
-        event_tokenized_titles = self.remove_stopwords_tokenize(event_titles)
-        event_tokenized_titles = [[token.lower() for token in tokens] for tokens in event_tokenized_titles]
-
-        series_tokenized_titles = self.remove_stopwords_tokenize(series_titles)
-        series_tokenized_titles = [[token.lower() for token in tokens] for tokens in series_tokenized_titles]
-
-        data_list_single_column = [[inner_list] for inner_list in event_tokenized_titles]
-        matches_events_df = pd.DataFrame(
-            {"events_tokenized": data_list_single_column, "events": event_titles,
-             "event_id": events_list})
-
-        data_list_single_column = [[inner_list] for inner_list in series_tokenized_titles]
-        matches_series_df = pd.DataFrame(
-            {"series_tokenized": data_list_single_column, "series": series_titles,
-             "series_id": series_list})
-
-        event_vector_list = []
-        for event_tokens in event_tokenized_titles:
-            event_vector = np.mean([self.model.wv[token] for token in event_tokens if token in self.model.wv], axis=0)
-            event_vector = event_vector.reshape(1, -1)
-            event_vector_list.append(event_vector)
-        matches_events_df["event_vectors"] = event_vector_list
-
-        series_vector_list = []
-        for series_tokens in series_tokenized_titles:
-            series_vector = np.mean([self.model.wv[token] for token in series_tokens if token in self.model.wv], axis=0)
-            series_vector = series_vector.reshape(1, -1)
-            series_vector_list.append(series_vector)
-        matches_series_df["event_series_vectors"] = series_vector_list
-
-
-        found_matches: List[FullMatch] = []
-        for i in range(0, len(matches_events_df["event_vectors"])):
-            max_similarity = 0
-            best_event_id = None
-            best_series_id = None
-            for j in range(0, len(matches_series_df["event_series_vectors"])):
-                try:
-                    similarity = cosine_similarity(matches_events_df.loc[i, "event_vectors"],
-                                                   matches_series_df.loc[j, "event_series_vectors"])[0][0]
-                except ValueError:
-                    continue
-                if similarity > max_similarity:
-                    best_event_id = matches_events_df.loc[i, "event_id"]
-                    best_series_id = matches_series_df.loc[j, "series_id"]
-                    max_similarity = similarity
-            found_matches.append(FullMatch(
-                event=best_event_id,
-                series=best_series_id,
-                found_by="NaiveWord2VecMatch::wikidata_match"
-            ))
-            return found_matches
-
-    def remove_stopwords_tokenize(self, text_list) -> List[List[str]]:
-        # Remove stopwords from each string in the list
-        filtered_list = []
-        for text in text_list:
-            # Keep only alphanumeric characters and spaces
-            text = self.clean_string(text)
-            # Tokenize the string into individual words
-            words = nltk.word_tokenize(text)
-            # Remove stopwords from the list of words
-            filtered_words = [
-                word for word in words if word.lower() not in self.stop_words
-            ]
-            filtered_list.append(filtered_words)
-        return filtered_list
-
-    def clean_string(self, title):
-        # Remove brackets and special characters using regular expressions
-        cleaned_title = re.sub(r'[^\w\s]', '', title)  # Keep only alphanumeric characters and spaces
-        return cleaned_title
+            logging.warning("Model is overfitting, and cannot be used")
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        if features is None:
+            event_titles = [get_title_else_label(event) for event in events_list]
+            series_titles = [get_title_else_label(series) for series in series_list]
+        else:
+            event_titles, series_titles = features.events.titles, features.series.titles
+
+        event_vectors = normalize_rows(self.title_cache.vectors(event_titles, self.model.wv))
+        series_vectors = normalize_rows(self.title_cache.vectors(series_titles, self.model.wv))
+        self.title_cache.flush()
+        if candidates is not None:
+            best_series, max_similarities = best_pair_per_row(
+                len(events_list),
+                candidates.rows,
+                candidates.cols,
+                pair_similarities(event_vectors, series_vectors, candidates.rows, candidates.cols),
+            )
+        elif series_index is None or len(series_list) == 0:
+            best_series, max_similarities = dense_best_match(event_vectors, series_vectors)
+        else:
+            series_index.fit(series_vectors)
+            best_series, max_similarities = series_index.search(event_vectors)
+
+        rows = np.flatnonzero(max_similarities >= self.best_threshold)
+        return rows, best_series[rows], max_similarities[rows]
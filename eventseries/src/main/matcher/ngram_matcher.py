@@ -1,15 +1,14 @@
 import logging
-from typing import List, Optional, Set, Dict
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Set, Dict, Tuple
 
 import pandas as pd
-from nltk import ngrams
 
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.evaluation import GoldStandard
+from eventseries.src.main.matcher.model_cache import ModelCache, fit_cached, training_fingerprint
+from eventseries.src.main.matcher.title_features import MatchingFeatures, TitleFeatures
 from eventseries.src.main.repository.completions import FullMatch
-from eventseries.src.main.repository.wikidata_dataclasses import (
-    WikiDataEvent,
-    WikiDataEventSeries,
-    get_title_else_label,
-)
+from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEvent, WikiDataEventSeries
 
 
 def dice_coefficient(ngrams_first: Set, ngrams_second: Set):
@@ -20,19 +19,57 @@ def dice_coefficient(ngrams_first: Set, ngrams_second: Set):
     )
 
 
+def best_dice_score(
+    event_ngrams: FrozenSet, series_ngrams: Sequence[FrozenSet], cols: Iterable[int]
+) -> Tuple[Optional[int], float]:
+    """The first of cols with the most similar series n-grams and its dice coefficient,
+    (None, 0) if there are no cols."""
+    best_similarity_value: Optional[float] = None
+    best_col: Optional[int] = None
+    for col in cols:
+        similarity = dice_coefficient(event_ngrams, series_ngrams[col])
+        if best_similarity_value is None or similarity > best_similarity_value:
+            best_col = col
+            best_similarity_value = similarity
+    return best_col, 0 if best_similarity_value is None else best_similarity_value
+
+
+def best_dice_match(
+    event_ngrams: FrozenSet, series_ngrams: Sequence[FrozenSet], cols: Iterable[int], threshold
+) -> Optional[int]:
+    """The first of cols with the most similar series n-grams reaching the threshold."""
+    best_col, best_similarity_value = best_dice_score(event_ngrams, series_ngrams, cols)
+    return best_col if best_similarity_value >= threshold else None
+
+
 class NgramMatch:
-    def __init__(self, matches_df: pd.DataFrame) -> None:
+    def __init__(self, matches_df: pd.DataFrame, model_cache: Optional[ModelCache] = None) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns used for training.
+        :param model_cache: Cache of fitted models, None always fits.
+        """
         matches_df.dropna(inplace=True)
         self.matches_df = matches_df
         self.event_titles_to_series_titles: Dict[str, str] = {}
         for _, row in matches_df.iterrows():
             self.event_titles_to_series_titles[row["event"]] = row["series"]
+        self.gold_standard = GoldStandard(
+            pd.DataFrame(self.event_titles_to_series_titles.items(), columns=["event", "series"])
+        )
         self.n_grams = [3, 4, 5]
         self.recall = 0.835909631391201
         self.threshold_values = [0.8, 0.7, 0.6]
         self.best_threshold = 0.6
         self.best_n = 3
-        self.fit()
+        fit_cached(
+            model_cache,
+            self,
+            training_fingerprint(
+                self.matches_df, n_grams=self.n_grams, threshold_values=self.threshold_values
+            ),
+            ["best_n", "best_threshold", "recall"],
+            self.fit,
+        )
 
     def fit(self):
         max_f1_score = 0
@@ -42,41 +79,40 @@ class NgramMatch:
         best_n_gram = 0
         best_threshold = 0
 
-        all_series_titles: List[str] = list(self.event_titles_to_series_titles.values())
+        # Series titles of several events are only compared once.
+        series_titles: List[str] = list(dict.fromkeys(self.event_titles_to_series_titles.values()))
+        event_titles: List[str] = list(self.event_titles_to_series_titles.keys())
+        expected_labels = self.gold_standard.labels_for_events(event_titles)
+        event_features = TitleFeatures.from_titles(event_titles)
+        series_features = TitleFeatures.from_titles(series_titles)
 
         for n_gram_size in self.n_grams:
+            event_ngrams = event_features.ngram_hashes(n_gram_size)
+            series_ngrams = series_features.ngram_hashes(n_gram_size)
+            # The best series only depends on n, the thresholds only decide whether it matches.
+            best_scores = [
+                best_dice_score(ngrams, series_ngrams, range(len(series_titles)))
+                for ngrams in event_ngrams
+            ]
             for threshold in self.threshold_values:
                 # threshold is the minimum required similarity for a partial match.
-                true_positives = 0
-                false_positives = 0
-                false_negatives = 0
-                for event, true_match in self.event_titles_to_series_titles.items():
-                    matched_series: Optional[str] = self.match_to_series(
-                        event, all_series_titles, n_gram_size, threshold
-                    )
-
-                    if matched_series is not None and matched_series == true_match:
-                        true_positives += 1
-                    elif matched_series is None:
-                        # We consider all events that did not match as false negative set.
-                        false_negatives += 1
-                    else:
-                        # We found a match, but it wasn't the right one.
-                        false_positives += 1
-
-                # Calculate the quality of matches.
-                precision = true_positives / (true_positives + false_positives)
-                recall = true_positives / (true_positives + false_negatives)
-                f1_score = 2 * (precision * recall) / (precision + recall)
+                matched_series: List[Optional[str]] = [
+                    None if col is None or similarity < threshold else series_titles[col]
+                    for col, similarity in best_scores
+                ]
+                # Events that did not match are counted as false negatives.
+                statistics = self.gold_standard.evaluate(
+                    predicted=self.gold_standard.encode_series(matched_series),
+                    expected=expected_labels,
+                )
+                precision = statistics.precision
+                recall = statistics.recall
+                f1_score = statistics.f1_score
 
                 # Log results for this combination of parameter.
-                logging.debug(
-                    "Statistics for %s n-grams and threshold: %s ->", n_gram_size, threshold
+                statistics.log(
+                    f"{n_gram_size} n-grams and threshold {threshold}", level=logging.DEBUG
                 )
-                logging.debug("true positives: %s", true_positives)
-                logging.debug("false positives: %s", false_positives)
-                logging.debug("false negatives: %s", false_negatives)
-                logging.debug("Precision %s, recall %s and f1 %s", precision, recall, f1_score)
 
                 if f1_score > max_f1_score:
                     best_precision = precision
@@ -95,44 +131,45 @@ class NgramMatch:
         self.best_n = best_n_gram
         self.best_threshold = best_threshold
 
-    @staticmethod
-    def match_to_series(
-        event: str, series_list: List[str], n_gram_size, threshold, word_wise=False
-    ):
-        event_ngrams = set(ngrams(event.split() if word_wise else event, n_gram_size))
-        best_similarity_value: Optional[float] = None
-        best_match: Optional[str] = None
-        for series in series_list:
-            series_ngrams = set(ngrams(series.split() if word_wise else series, n_gram_size))
-            similarity = dice_coefficient(event_ngrams, series_ngrams)
-            if similarity < threshold:
-                continue
-            if best_similarity_value is None or similarity > best_similarity_value:
-                best_match = series
-                best_similarity_value = similarity
-
-        return best_match
-
     def match_events_to_series(
-        self, event_list: List[WikiDataEvent], series_list: List[WikiDataEventSeries]
+        self,
+        event_list: List[WikiDataEvent],
+        series_list: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
+        """
+        :param candidates: Only compare these pairs of events and series, None compares all.
+        :param features: Title features of the events and series, computed if not given.
+        """
         if self.recall == 1:
             logging.error("Model is overfitting, and cannot be used")
             return []
-        series_title_to_series = {get_title_else_label(series): series for series in series_list}
+        if features is None:
+            features = MatchingFeatures.from_items(event_list, series_list)
+        # Series with the same title are compared once, the last of them is reported.
+        col_by_title: Dict[str, int] = {}
+        for col, title in enumerate(features.series.titles):
+            col_by_title[title] = col
+        series_titles = features.series.titles
+        event_ngrams = features.events.ngram_hashes(self.best_n)
+        series_ngrams = features.series.ngram_hashes(self.best_n)
 
         found_matches: List[FullMatch] = []
-        for event in event_list:
-            event_title = get_title_else_label(event)
-            found_match = NgramMatch.match_to_series(
-                event_title, list(series_title_to_series.keys()), self.best_n, self.best_threshold
-            )
-            if found_match is None:
+        for row, event in enumerate(event_list):
+            if candidates is None:
+                cols: Iterable[int] = col_by_title.values()
+            else:
+                cols = dict.fromkeys(
+                    col_by_title[series_titles[col]] for col in candidates.series_of(row)
+                )
+            found_col = best_dice_match(event_ngrams[row], series_ngrams, cols, self.best_threshold)
+            if found_col is None:
                 continue
             found_matches.append(
                 FullMatch(
                     event=event,
-                    series=series_title_to_series[found_match],
+                    series=series_list[found_col],
                     found_by="NgramMatch::wikidata_match",
                 )
             )
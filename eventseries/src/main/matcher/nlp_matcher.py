@@ -1,15 +1,15 @@
 import logging
-from typing import List, Optional, Tuple, Dict
+from itertools import groupby
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
-import spacy
-
-from eventseries.src.main.matcher.acronym_matcher import AcronymMatch
-from eventseries.src.main.matcher.naive_word2vec_matcher import NaiveWord2VecMatch
-from eventseries.src.main.matcher.ngram_matcher import NgramMatch
-from eventseries.src.main.matcher.phrase_matcher import PhraseMatch
-from eventseries.src.main.matcher.tfidf_matcher import TfIdfMatch
-from eventseries.src.main.matcher.word2vec_matcher import Word2VecMatch
+
+from eventseries.src.main.matcher.blocking import Blocker, CandidatePairs
+from eventseries.src.main.matcher.matcher_execution import MatcherExecutor, MatcherTask
+from eventseries.src.main.matcher.matcher_registry import MatcherRegistration, registered_matchers
+from eventseries.src.main.matcher.score_fusion import ScoreFusion
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import Match, FullMatch, NameMatch
 from eventseries.src.main.repository.completions import get_titles_from_match
 from eventseries.src.main.repository.wikidata_dataclasses import (
@@ -36,23 +36,41 @@ def read_miscellaneous_event_series() -> List[str]:
     return fetch_event_series.get_bard_event_series()
 
 
-def spacy_package_exists():
-    if not spacy.util.is_package("en_core_web_sm"):
-        logging.error(
-            "Could not find spacy package 'en_core_web_sm' please run"
-            " 'python -m spacy download en_core_web_sm'"
-        )
-        return False
-    return True
-
-
 class NlpMatcher:
     """We use the DBLP matched events with event series
     to test our algorithms and then apply them to wikidata events"""
 
-    def __init__(self, matches_df: pd.DataFrame) -> None:
-        # Dataframe with "event" and "series" as column containing titles of found matches.
+    def __init__(
+        self,
+        matches_df: pd.DataFrame,
+        executor: Optional[MatcherExecutor] = None,
+        enabled_matchers: Optional[Sequence[str]] = None,
+        fast_only: bool = False,
+        weights: Optional[Dict[str, float]] = None,
+        fusion_threshold: float = 2.5,
+        cascade: bool = False,
+        blocker: Optional[Blocker] = None,
+    ) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" as column containing titles of
+        found matches.
+        :param executor: Runs the matchers, defaults to one worker process per matcher.
+        :param enabled_matchers: Names of the registered matchers to run, None runs all.
+        :param fast_only: Only run matchers registered as fast, for latency-sensitive runs.
+        :param weights: Weight of the scores of each matcher by name, see ScoreFusion.
+        :param fusion_threshold: Minimal fused score of a reported match.
+        :param cascade: Run the matchers in stages of equal cost, cheapest first. Every stage only
+        gets the events without a match reaching the fusion threshold in the previous stages.
+        :param blocker: Generates the candidate pairs the matchers compare, None compares all pairs.
+        """
         self.train_test_set: pd.DataFrame = matches_df
+        self.executor = MatcherExecutor() if executor is None else executor
+        self.enabled_matchers = enabled_matchers
+        self.fast_only = fast_only
+        self.weights = weights
+        self.fusion_threshold = fusion_threshold
+        self.cascade = cascade
+        self.blocker = blocker
 
     def match(
         self,
@@ -70,57 +88,41 @@ class NlpMatcher:
         ]
         all_event_series: List[WikiDataEventSeries] = event_series + proxy_event_series
 
-        phrase_matches = []
-        acronym_matches = []
-        if spacy_package_exists():
-            phrase_matcher = PhraseMatch(matches_df=self.train_test_set)
-            phrase_matcher.test_accuracy()
-            phrase_matches = phrase_matcher.wikidata_match(unmatched_events, all_event_series)
-            logging.info("Found %s matched through phrase-matching.", len(phrase_matches))
-
-            acronym_matcher = AcronymMatch(self.train_test_set)
-            acronym_matcher.test_accuracy()
-            acronym_matches = acronym_matcher.wikidata_match(unmatched_events, all_event_series)
-            logging.info("Found %s matched through acronym-matching.", len(acronym_matches))
-
-        ngram_matcher = NgramMatch(matches_df=self.train_test_set)
-        ngram_matches = ngram_matcher.match_events_to_series(
-            event_list=unmatched_events, series_list=all_event_series
-        )
-        logging.info("Found %s matched through n-grams.", len(ngram_matches))
-
-        tfidf_matches = TfIdfMatch(self.train_test_set).wikidata_match(
-            unmatched_events, all_event_series
-        )
-        logging.info("Found %s matched through tf-idf-matches.", len(tfidf_matches))
-
-        naive_matches, word2vec_matches = [], (
-            [] if skip_word2vec else self._word2vec(unmatched_events, all_event_series)
-        )
-
-        all_found_matches: List[FullMatch] = (
-            phrase_matches
-            + acronym_matches
-            + ngram_matches
-            + tfidf_matches
-            + naive_matches
-            + word2vec_matches
+        registrations = [
+            registration
+            for registration in registered_matchers(self.enabled_matchers, self.fast_only)
+            if not (skip_word2vec and registration.name == "word2vec")
+        ]
+        if self.cascade:
+            # registered_matchers is ordered by cost, so every cost forms one stage.
+            stages: List[List[MatcherRegistration]] = [
+                list(stage)
+                for _, stage in groupby(registrations, key=lambda registration: registration.cost)
+            ]
+        else:
+            stages = [registrations]
+        # The title features are computed once and shared by the blocker and all matchers.
+        features = MatchingFeatures.from_items(unmatched_events, all_event_series)
+        candidates = (
+            None
+            if self.blocker is None
+            else self.blocker.candidate_pairs(unmatched_events, all_event_series, features)
         )
-        logging.info(
-            "In total %s matches were reported (possibly duplicate).", len(all_found_matches)
+        fusion = ScoreFusion(
+            len(unmatched_events), len(all_event_series), self.weights, self.fusion_threshold
         )
-
-        cross_validates_matches = self.cross_validate_and_merge(
-            all_found_matches, required_to_pass=3
+        fused_matches = self.fuse(
+            fusion, stages, unmatched_events, all_event_series, candidates, features
         )
         logging.info(
-            "After cross validation with n = 3, %s unique matches were left",
-            len(cross_validates_matches),
+            "After fusing the scores with threshold %s, %s matches were left",
+            self.fusion_threshold,
+            len(fused_matches),
         )
 
         # Filter out the proxy event series and convert to NameMatch
         final_matches: List[Match] = []
-        for found_match in cross_validates_matches:
+        for found_match in fused_matches:
             if found_match.series.qid == QID("Q0"):
                 final_matches.append(
                     NameMatch(
@@ -134,74 +136,61 @@ class NlpMatcher:
 
         return final_matches
 
-    def _word2vec(
-        self, unmatched_events: List[WikiDataEvent], all_event_series: List[WikiDataEventSeries]
-    ):
-        logging.basicConfig(level=logging.WARNING)
-        # Ony log warnings while execution gensin module
-        naive_word2vec_matcher = NaiveWord2VecMatch(self.train_test_set)
-        naive_matches = naive_word2vec_matcher.wikidata_match(unmatched_events, all_event_series)
-        remaining_events = unmatched_events
-        for match in naive_matches:
-            remaining_events.remove(match.event)
-
-        # Since our training data is less we start with skip grams = 0 i.e. - CBOW
-        word2vec_matcher_sg_0 = Word2VecMatch(self.train_test_set, 0)
-        word2vec_sg_0_matches = word2vec_matcher_sg_0.wikidata_match(
-            unmatched_events, all_event_series
-        )
-
-        word2vec_matcher_sg_1 = Word2VecMatch(self.train_test_set, 1)
-        word2vec_sg_1_matches = word2vec_matcher_sg_1.wikidata_match(
-            unmatched_events, all_event_series
-        )
-        logging.basicConfig(level=logging.INFO)
-        logging.info(
-            "Found %s matches with skip_grams=0 and %s for skp_grams=1",
-            len(word2vec_sg_0_matches),
-            len(word2vec_sg_1_matches),
-        )
-        word2vec_qid = set((match.event.qid, match.series.qid) for match in word2vec_sg_0_matches)
-        unique_word2vec = word2vec_sg_0_matches
-        for vec2 in word2vec_sg_1_matches:
-            if (vec2.event.qid, vec2.series.qid) not in word2vec_qid:
-                unique_word2vec.append(vec2)
-        return naive_matches, unique_word2vec
-
-    def cross_validate_and_merge(
-        self, matches: List[FullMatch], required_to_pass: int
+    def fuse(
+        self,
+        fusion: ScoreFusion,
+        stages: List[List[MatcherRegistration]],
+        events: List[WikiDataEvent],
+        series: List[WikiDataEventSeries],
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
-        """Group matches by qids of event and series.
-        Filter out all matches that were found by fewer than required_to_pass matches."""
-        by_qids: Dict[Tuple[QID, QID], List[FullMatch]] = {}
-
-        def get_key(match: FullMatch):
-            return match.event.qid, match.series.qid
-
-        for match in matches:
-            key = get_key(match)
-            if key in by_qids:
-                by_qids[key].append(match)
-            else:
-                by_qids[key] = [match]
-
-        # Frequency of how often the match was found to how often frequency occurred
-        # Only done for insights.
-        by_frequency = {}
-        for key, match_list in by_qids.items():
-            freq = len(match_list)
-            by_frequency[freq] = by_frequency.get(freq, 0) + 1
-        for freqency, occurence in by_frequency.items():
-            logging.info("%s matches were found %s many times", occurence, freqency)
-
-        # Filter out
-        passed_matches = {
-            key: value for key, value in by_qids.items() if len(value) >= required_to_pass
-        }
-        # Merge duplicates
-        merged: List[FullMatch] = []
-        for same_matches in passed_matches.values():
-            first: FullMatch = same_matches[0]
-            all_label: str = "+".join([m.found_by for m in same_matches])
-            merged.append(FullMatch(event=first.event, series=first.series, found_by=all_label))
-        return merged
+        """Run the stages of matchers one after another and fuse the scored candidates of the
+        matchers as soon as they finish. Every stage only gets the events not settled by previous
+        stages. Matchers that are still pending when they can no longer change the outcome are
+        skipped.
+        :param candidates: Pairs of events and series the matchers compare, None compares all.
+        :param features: Title features of the events and series, computed if not given."""
+        if features is None:
+            features = MatchingFeatures.from_items(events, series)
+        pending = {registration.name for stage in stages for registration in stage}
+        decided = False
+        for stage in stages:
+            if decided:
+                logging.info("Skipping matchers %s, the outcome is decided.", sorted(pending))
+                break
+            # Rows of the events passed to this stage.
+            stage_rows = np.flatnonzero(~fusion.settled_events())
+            if len(stage_rows) == 0:
+                logging.info("All events are settled, skipping matchers %s.", sorted(pending))
+                break
+            stage_candidates = None
+            if candidates is not None:
+                stage_candidates = candidates.restrict(stage_rows)
+            stage_features = features.take_events(stage_rows)
+            tasks: Dict[str, MatcherTask] = {
+                registration.name: registration.scoring_task(stage_candidates, stage_features)
+                for registration in stage
+            }
+            if len(stage_rows) < len(events):
+                logging.info("Passing %s unsettled events to %s.", len(stage_rows), sorted(tasks))
+            stage_events = [events[row] for row in stage_rows]
+            results = self.executor.run(tasks, self.train_test_set, stage_events, series)
+            for name, (rows, cols, scores) in results:
+                pending.discard(name)
+                fusion.add(name, (stage_rows[rows], cols, scores))
+                logging.info("Matcher %s finished with %s candidates.", name, len(rows))
+                decided = fusion.is_decided(pending)
+                if decided:
+                    results.close()
+                    break
+
+        rows, cols, _ = fusion.accepted()
+        return [
+            FullMatch(
+                event=events[row],
+                series=series[col],
+                found_by="+".join(sorted(fusion.found_by(row, col))),
+            )
+            for row, col in zip(rows, cols)
+        ]
@@ -1,10 +1,15 @@
 import logging
-from typing import List, Set
+from typing import Iterable, List, Optional, Set
 
 import pandas as pd
 import spacy
 import spacy.matcher
+from spacy.language import Language
+from spacy.tokens import Doc
 
+from eventseries.src.main.matcher.evaluation import GoldStandard
+from eventseries.src.main.matcher.model_cache import ModelCache, fit_cached, training_fingerprint
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import FullMatch
 from eventseries.src.main.repository.wikidata_dataclasses import (
     WikiDataEvent,
@@ -14,7 +19,33 @@ from eventseries.src.main.repository.wikidata_dataclasses import (
 )
 
 
-# from typing import List
+# The PhraseMatcher compares token texts only, every pipeline component besides the tokenizer
+# can be excluded when loading the model.
+_NON_TOKENIZER_COMPONENTS = [
+    "tok2vec",
+    "tagger",
+    "morphologizer",
+    "parser",
+    "senter",
+    "attribute_ruler",
+    "lemmatizer",
+    "ner",
+]
+
+
+def spacy_package_exists():
+    if not spacy.util.is_package("en_core_web_sm"):
+        logging.error(
+            "Could not find spacy package 'en_core_web_sm' please run"
+            " 'python -m spacy download en_core_web_sm'"
+        )
+        return False
+    return True
+
+
+def load_tokenizer_pipeline(model: str = "en_core_web_sm") -> Language:
+    """Load the spacy model without any component besides its tokenizer."""
+    return spacy.load(model, exclude=_NON_TOKENIZER_COMPONENTS)
 
 
 class PhraseMatch:
@@ -25,78 +56,91 @@ class PhraseMatch:
     EVENT_SERIES - International Semantic Web Conference (https://www.wikidata.org/wiki/Q6053150)
     """
 
-    def __init__(self, matches_df: pd.DataFrame) -> None:
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(
+        self,
+        matches_df: pd.DataFrame,
+        batch_size: int = 256,
+        n_process: int = 1,
+        model_cache: Optional[ModelCache] = None,
+    ) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns used for training.
+        :param batch_size: Number of titles that are tokenized together by nlp.pipe.
+        :param n_process: Number of processes used by nlp.pipe, use -1 for all cpus.
+        :param model_cache: Cache of the accuracy test, None always tests.
+        """
+        self.nlp = load_tokenizer_pipeline()
+        self.batch_size = batch_size
+        self.n_process = n_process
         self.phrase_matcher = spacy.matcher.PhraseMatcher(self.nlp.vocab)
-        # Only run nlp.make_doc to speed things up
         self.matches_df = matches_df
         self.matches_df.dropna(inplace=True)
         self.recall = 0
+        self.gold_standard = GoldStandard(self.matches_df)
         series_titles = matches_df["series"].tolist()
-        patterns = [self.nlp.make_doc(text) for text in series_titles]
+        patterns = self.make_docs(series_titles)
         self.event_titles = matches_df["event"].tolist()
         self.phrase_matcher.add("Event_EventSeries_Matcher", patterns)
         # Capturing all the distinct series
         self.series_distinct: List[str] = []
+        self.model_cache = model_cache
+
+    def make_docs(self, texts: Iterable[str]) -> List[Doc]:
+        """Tokenize all texts in batches. Only the tokenizer is run."""
+        return list(
+            self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+        )
 
     def test_accuracy(self):
-        true_positives = 0
-        false_positives = 0
-        false_negatives = 0
-
-        matching_events = []
-        for event in self.event_titles:
-            doc = self.nlp(event)
-            matches = self.phrase_matcher(doc)
-            for match_id, start, end in matches:
+        fit_cached(
+            self.model_cache,
+            self,
+            training_fingerprint(self.matches_df),
+            ["recall", "series_distinct"],
+            self._test_accuracy,
+        )
+
+    def _test_accuracy(self):
+        matched_events: List[str] = []
+        matched_series: List[str] = []
+        for event, doc in zip(self.event_titles, self.make_docs(self.event_titles)):
+            for _, start, end in self.phrase_matcher(doc):
                 span = doc[start:end]
-                if event not in matching_events:
-                    matching_events.append(event)
                 if span.text not in self.series_distinct:
                     self.series_distinct.append(span.text)
-                if (
-                    self.matches_df.loc[self.matches_df["event"] == event, "series"].values[0]
-                ) == span.text:
-                    true_positives += 1
-                else:
-                    false_positives += 1
-        #         print(f"Series: '{span.text}' Event: '{event}'")
+                matched_events.append(event)
+                matched_series.append(span.text)
 
         # We consider all the events that did not give out a match as the false negative set.
-        false_negatives = len(self.event_titles) - (true_positives + false_positives)
-
-        # print("true positives: ", true_positives)
-        # print("false positives: ", false_positives)
-        # print("false negatives: ", false_negatives)
-        logging.info("Statistics from Phrase matching: ")
-        precision = true_positives / (true_positives + false_positives)
-        logging.info("Precision: %s", precision)
-        recall = true_positives / (true_positives + false_negatives)
-        self.recall = recall
-        logging.info("Recall: %s", recall)
-        f1_score = 2 * (precision * recall) / (precision + recall)
-        logging.info("F1-Score: %s", f1_score)
-
-        # print("Number of containment matches from event titles: ", len(matching_events))
+        statistics = self.gold_standard.evaluate_titles(matched_events, matched_series)
+        statistics.log("Phrase matching")
+        self.recall = statistics.recall
 
     def wikidata_match(
-        self, events: List[WikiDataEvent], event_series: List[WikiDataEventSeries]
+        self,
+        events: List[WikiDataEvent],
+        event_series: List[WikiDataEventSeries],
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
+        """:param features: Title features of the events and series, computed if not given."""
         if self.recall == 1:
-            print("Model is overfitting, and cannot be used")
+            logging.warning("Model is overfitting, and cannot be used")
             return []
-        series_titles_to_series = {get_title_else_label(series): series for series in event_series}
-
-        nlp = spacy.load("en_core_web_sm")
-        patterns = [nlp.make_doc(text) for text in series_titles_to_series.keys()]
-        phrase_matcher = spacy.matcher.PhraseMatcher(nlp.vocab)
+        if features is None:
+            event_titles = [get_title_else_label(event) for event in events]
+            series_titles = [get_title_else_label(series) for series in event_series]
+        else:
+            event_titles, series_titles = features.events.titles, features.series.titles
+        series_titles_to_series = dict(zip(series_titles, event_series))
+
+        patterns = self.make_docs(series_titles_to_series.keys())
+        phrase_matcher = spacy.matcher.PhraseMatcher(self.nlp.vocab)
         phrase_matcher.add("Event_EventSeries_Matcher", patterns)
 
         found_matches = []
         matched_events: Set[QID] = set()
-        for event in events:
-            event_title = get_title_else_label(event)
-            doc = nlp(event_title)
+        event_docs = self.make_docs(event_titles)
+        for event, doc in zip(events, event_docs):
             matches = phrase_matcher(doc)
             for _, start, end in matches:
                 if event.qid in matched_events:
@@ -0,0 +1,83 @@
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Scored candidates of a matcher: arrays (event rows, series columns, scores).
+ScoredCandidates = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class ScoreFusion:
+    """Combine the scored candidates of several matchers into a sparse events x series table.
+    The fused score of a pair is the weighted sum of the scores the matchers gave it,
+    pairs reaching the threshold are accepted.
+    Scores are expected in [0, 1], so a pair can gain at most the weights of the pending matchers.
+    This decides pairs before all matchers finished (see is_decided)."""
+
+    def __init__(
+        self,
+        nbr_of_events: int,
+        nbr_of_series: int,
+        weights: Optional[Dict[str, float]] = None,
+        threshold: float = 2.5,
+        default_weight: float = 1.0,
+    ) -> None:
+        """
+        :param weights: Weight of each matcher by name.
+        :param threshold: Minimal fused score of an accepted pair.
+        The default accepts pairs found by three matchers unless their scores are low.
+        :param default_weight: Weight of matchers without an entry in weights.
+        """
+        self.shape = (nbr_of_events, nbr_of_series)
+        self.weights: Dict[str, float] = {} if weights is None else weights
+        if any(weight < 0 for weight in self.weights.values()) or default_weight < 0:
+            raise ValueError("Matcher weights must not be negative.")
+        self.threshold = threshold
+        self.default_weight = default_weight
+        self.table = csr_matrix(self.shape, dtype=np.float64)
+        self.reported_by: Dict[str, csr_matrix] = {}
+
+    def weight(self, matcher_name: str) -> float:
+        return self.weights.get(matcher_name, self.default_weight)
+
+    def add(self, matcher_name: str, candidates: ScoredCandidates):
+        """Add the candidates of a matcher. Duplicate pairs only count with their best score."""
+        rows = np.asarray(candidates[0], dtype=np.int64)
+        cols = np.asarray(candidates[1], dtype=np.int64)
+        scores = np.clip(np.asarray(candidates[2], dtype=np.float64), 0, 1)
+        # csr_matrix sums duplicates, keep the first pair of the ones ordered by descending score.
+        order = np.lexsort((-scores, cols, rows))
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        reported = csr_matrix(
+            (scores[first], (rows[first], cols[first])), shape=self.shape
+        )
+        self.reported_by[matcher_name] = reported
+        self.table = self.table + reported * self.weight(matcher_name)
+
+    def accepted(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, cols, fused scores) of all pairs reaching the threshold."""
+        table = self.table.tocoo()
+        passed = table.data >= self.threshold
+        return table.row[passed], table.col[passed], table.data[passed]
+
+    def settled_events(self) -> np.ndarray:
+        """Mask of the events with an accepted pair."""
+        rows, _, _ = self.accepted()
+        settled = np.zeros(self.shape[0], dtype=bool)
+        settled[rows] = True
+        return settled
+
+    def is_decided(self, pending_matchers: Iterable[str]) -> bool:
+        """Whether the pending matchers can no longer change which pairs are accepted."""
+        reachable = sum(self.weight(name) for name in pending_matchers)
+        if reachable == 0:
+            return True
+        if reachable >= self.threshold:
+            return False
+        scores = self.table.data
+        return not np.any((scores < self.threshold) & (scores + reachable >= self.threshold))
+
+    def found_by(self, row: int, col: int) -> Set[str]:
+        return {name for name, reported in self.reported_by.items() if reported[row, col] > 0}
@@ -0,0 +1,122 @@
+from typing import Dict, List, Optional, Sequence
+
+from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEventSeries
+
+
+class SubstringAutomaton:
+    """Generalized suffix automaton over texts that are each added with an index.
+    find returns the smallest index of the texts that contain a pattern in O(len(pattern)).
+    Texts have to be added in order of non-decreasing index."""
+
+    def __init__(self) -> None:
+        # State 0 is the root, it represents the empty string.
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.links: List[int] = [-1]
+        self.lengths: List[int] = [0]
+        # Smallest index of the texts containing the substrings of a state, None before any text.
+        self.min_index: List[Optional[int]] = [None]
+        self._last_index: Optional[int] = None
+
+    def add(self, text: str, index: int):
+        if self._last_index is not None and index < self._last_index:
+            raise ValueError("Texts have to be added in order of their index.")
+        self._last_index = index
+        last = 0
+        for character in text:
+            last = self._extend(last, character)
+        # Every substring of text ends at some prefix, so marking the states of all prefixes
+        # and their suffix links marks all substrings. A state that already has an index
+        # was marked with an index <= index, just as the states on its suffix links.
+        if self.min_index[0] is None:
+            self.min_index[0] = index
+        state = 0
+        for character in text:
+            state = self.transitions[state][character]
+            suffix = state
+            while suffix > 0 and self.min_index[suffix] is None:
+                self.min_index[suffix] = index
+                suffix = self.links[suffix]
+
+    def find(self, pattern: str) -> Optional[int]:
+        state = 0
+        for character in pattern:
+            state = self.transitions[state].get(character)
+            if state is None:
+                return None
+        return self.min_index[state]
+
+    def _new_state(self, length: int, transitions: Dict[str, int], link: int) -> int:
+        self.transitions.append(transitions)
+        self.links.append(link)
+        self.lengths.append(length)
+        self.min_index.append(None)
+        return len(self.lengths) - 1
+
+    def _clone(self, state: int, length: int, character: str, source: int) -> int:
+        """Split the states reaching state with character from source and its suffix links."""
+        clone = self._new_state(length, dict(self.transitions[state]), self.links[state])
+        # The clone represents the shorter substrings of state, which were already marked.
+        self.min_index[clone] = self.min_index[state]
+        while source != -1 and self.transitions[source].get(character) == state:
+            self.transitions[source][character] = clone
+            source = self.links[source]
+        self.links[state] = clone
+        return clone
+
+    def _extend(self, last: int, character: str) -> int:
+        if character in self.transitions[last]:
+            # The extended string already occurs in an earlier text.
+            state = self.transitions[last][character]
+            if self.lengths[last] + 1 == self.lengths[state]:
+                return state
+            return self._clone(state, self.lengths[last] + 1, character, last)
+
+        current = self._new_state(self.lengths[last] + 1, {}, 0)
+        source = last
+        while source != -1 and character not in self.transitions[source]:
+            self.transitions[source][character] = current
+            source = self.links[source]
+        if source != -1:
+            state = self.transitions[source][character]
+            if self.lengths[source] + 1 == self.lengths[state]:
+                self.links[current] = state
+            else:
+                self.links[current] = self._clone(
+                    state, self.lengths[source] + 1, character, source
+                )
+        return current
+
+
+class WikidataSeriesResolver:
+    """Find the wikidata series of a dblp series. Built once, every lookup is either a hash map
+    access or a walk of the name through a SubstringAutomaton over titles and labels.
+    The results are the same as scanning the series in order and returning the first series
+    that matches."""
+
+    def __init__(self, series: Sequence[WikiDataEventSeries]) -> None:
+        self.series: List[WikiDataEventSeries] = list(series)
+        self.by_dblp_id: Dict[str, int] = {}
+        self.by_acronym: Dict[str, int] = {}
+        self.texts = SubstringAutomaton()
+        for index, wikidata_series in enumerate(self.series):
+            if wikidata_series.dblp_id is not None:
+                self.by_dblp_id.setdefault(wikidata_series.dblp_id, index)
+            if wikidata_series.acronym is not None:
+                self.by_acronym.setdefault(wikidata_series.acronym, index)
+            for text in (wikidata_series.title, wikidata_series.label):
+                if text is not None:
+                    self.texts.add(text, index)
+
+    def resolve_dblp_id(self, dblp_id: str) -> Optional[WikiDataEventSeries]:
+        """:returns the first series with this dblp id or None."""
+        index = self.by_dblp_id.get(dblp_id)
+        return None if index is None else self.series[index]
+
+    def resolve(self, name: str, abbreviation: Optional[str]) -> Optional[WikiDataEventSeries]:
+        """:returns the first series whose title or label contains name or whose acronym
+        equals abbreviation, None if there is none."""
+        indices = [self.texts.find(name)]
+        if abbreviation is not None:
+            indices.append(self.by_acronym.get(abbreviation))
+        found = [index for index in indices if index is not None]
+        return self.series[min(found)] if found else None
@@ -0,0 +1,185 @@
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+from gensim.models import KeyedVectors
+from scipy.sparse import csr_matrix
+
+
+def sparse_top_k(
+    queries: csr_matrix,
+    index: csr_matrix,
+    top_k: Optional[int] = 1,
+    threshold: float = 0.0,
+    chunk_size: int = 1024,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the most similar rows of index for every row of queries.
+    Both matrices are expected to have L2-normalized rows (as returned by TfidfVectorizer),
+    so that the dot product is the cosine similarity.
+    The product is computed for chunks of query rows and stays sparse,
+    so memory is bounded by chunk_size and the number of overlapping terms.
+    :param queries: sparse matrix of shape (n_queries, n_features)
+    :param index: sparse matrix of shape (n_index, n_features)
+    :param top_k: Number of neighbours per query row. None keeps every neighbour above threshold.
+    :param threshold: Minimal similarity of a reported pair.
+    :param chunk_size: Number of query rows multiplied at once.
+    :return: Arrays (rows, cols, similarities) of all found pairs.
+    They are ordered by row and by descending similarity within a row.
+    Pairs with equal similarity are ordered by column.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be at least 1 but was " + str(top_k))
+    index_transposed = csr_matrix(index).T.tocsr()
+    queries = csr_matrix(queries)
+    found_rows, found_cols, found_similarities = [], [], []
+    for chunk_start in range(0, queries.shape[0], chunk_size):
+        chunk_queries = queries[chunk_start : chunk_start + chunk_size]
+        chunk: csr_matrix = (chunk_queries @ index_transposed).tocsr()
+        chunk.sort_indices()
+        for local_row in range(chunk.shape[0]):
+            start, end = chunk.indptr[local_row], chunk.indptr[local_row + 1]
+            similarities = chunk.data[start:end]
+            cols = chunk.indices[start:end]
+            above = similarities >= threshold
+            similarities, cols = similarities[above], cols[above]
+            if top_k is not None and len(similarities) > top_k:
+                best = np.argpartition(-similarities, top_k - 1)[:top_k]
+                similarities, cols = similarities[best], cols[best]
+            order = np.lexsort((cols, -similarities))
+            found_rows.append(np.full(len(order), chunk_start + local_row, dtype=np.int64))
+            found_cols.append(cols[order].astype(np.int64))
+            found_similarities.append(similarities[order])
+
+    if not found_rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return (
+        np.concatenate(found_rows),
+        np.concatenate(found_cols),
+        np.concatenate(found_similarities),
+    )
+
+
+def mean_token_vectors(
+    tokenized_titles: Sequence[Sequence[str]], keyed_vectors: KeyedVectors
+) -> np.ndarray:
+    """
+    Stack the mean vector of the known tokens of every title into one float32 matrix.
+    Titles without any known token get a zero row, which is never similar to anything.
+    :param tokenized_titles: Tokens of each title.
+    :param keyed_vectors: Vectors looked up through key_to_index.
+    :return: Matrix of shape (len(tokenized_titles), vector_size).
+    """
+    key_to_index = keyed_vectors.key_to_index
+    vectors = keyed_vectors.vectors
+    title_vectors = np.zeros((len(tokenized_titles), vectors.shape[1]), dtype=np.float32)
+    for row, tokens in enumerate(tokenized_titles):
+        indices = [key_to_index[token] for token in tokens if token in key_to_index]
+        if indices:
+            title_vectors[row] = np.mean(vectors[indices], axis=0)
+    return title_vectors
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Contiguous float32 copy of matrix with L2-normalized rows.
+    Rows with a norm of zero (or which are not finite) are set to zero."""
+    normalized = np.array(matrix, dtype=np.float32, order="C", copy=True)
+    norms = np.linalg.norm(normalized, axis=1)
+    valid = np.isfinite(norms) & (norms > 0)
+    normalized[valid] /= norms[valid, np.newaxis]
+    normalized[~valid] = 0
+    return normalized
+
+
+def dense_best_match(
+    queries: np.ndarray, index: np.ndarray, block_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the most similar row of index for every row of queries.
+    Both matrices are expected to be normalized with normalize_rows,
+    so that the dot product is the cosine similarity.
+    The product is computed for blocks of query rows to bound the memory usage.
+    :param queries: matrix of shape (n_queries, n_features)
+    :param index: matrix of shape (n_index, n_features)
+    :param block_size: Number of query rows multiplied at once.
+    :return: Arrays (best, similarities) with the column of the first most similar index row
+    and its similarity for each query. If index is empty best is -1 and the similarity 0.
+    """
+    best = np.full(queries.shape[0], -1, dtype=np.int64)
+    best_similarities = np.zeros(queries.shape[0], dtype=np.float32)
+    if index.shape[0] == 0:
+        return best, best_similarities
+    index_transposed = np.ascontiguousarray(index.T)
+    for block_start in range(0, queries.shape[0], block_size):
+        block = queries[block_start : block_start + block_size] @ index_transposed
+        block_best = np.argmax(block, axis=1)
+        best[block_start : block_start + len(block)] = block_best
+        best_similarities[block_start : block_start + len(block)] = block[
+            np.arange(len(block)), block_best
+        ]
+    return best, best_similarities
+
+
+def pair_similarities(
+    queries: Union[np.ndarray, csr_matrix],
+    index: Union[np.ndarray, csr_matrix],
+    rows: np.ndarray,
+    cols: np.ndarray,
+) -> np.ndarray:
+    """
+    Similarities of only the given pairs of query rows and index rows.
+    Both matrices are expected to have L2-normalized rows, dense or sparse.
+    :return: Array with the dot product of queries[rows[i]] and index[cols[i]] at i.
+    """
+    if len(rows) == 0:
+        return np.empty(0)
+    if isinstance(queries, np.ndarray):
+        return np.einsum("ij,ij->i", queries[rows], index[cols])
+    return np.asarray(
+        csr_matrix(queries)[rows].multiply(csr_matrix(index)[cols]).sum(axis=1)
+    ).ravel()
+
+
+def best_pair_per_row(
+    nbr_of_rows: int, rows: np.ndarray, cols: np.ndarray, similarities: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the most similar pair of every row, like dense_best_match does for all pairs.
+    :return: Arrays (best, similarities) of length nbr_of_rows with the column of the first most
+    similar pair and its similarity. Rows without pairs get -1 and a similarity of 0.
+    """
+    best = np.full(nbr_of_rows, -1, dtype=np.int64)
+    best_similarities = np.zeros(nbr_of_rows, dtype=np.float32)
+    order = np.lexsort((cols, -similarities, rows))
+    rows, cols, similarities = rows[order], cols[order], similarities[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    best[rows[first]] = cols[first]
+    best_similarities[rows[first]] = similarities[first]
+    return best, best_similarities
+
+
+def top_k_pairs(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    similarities: np.ndarray,
+    top_k: Optional[int] = 1,
+    threshold: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Select the most similar pairs of every row, like sparse_top_k does for all pairs.
+    :param top_k: Number of pairs per row. None keeps every pair above threshold.
+    :param threshold: Minimal similarity of a kept pair.
+    :return: Arrays (rows, cols, similarities) ordered as described by sparse_top_k.
+    """
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be at least 1 but was " + str(top_k))
+    above = similarities >= threshold
+    rows, cols, similarities = rows[above], cols[above], similarities[above]
+    order = np.lexsort((cols, -similarities, rows))
+    rows, cols, similarities = rows[order], cols[order], similarities[order]
+    if top_k is not None:
+        # Position of every pair within its row.
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        kept = rank < top_k
+        rows, cols, similarities = rows[kept], cols[kept], similarities[kept]
+    return rows.astype(np.int64), cols.astype(np.int64), similarities
@@ -1,109 +1,179 @@
+import hashlib
 import logging
-from typing import List
+import pickle
+from importlib import resources as ires
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
 from sklearn.feature_extraction import text
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.evaluation import GoldStandard
+from eventseries.src.main.matcher.model_cache import ModelCache, fit_cached, training_fingerprint
+from eventseries.src.main.matcher.similarity import pair_similarities, sparse_top_k, top_k_pairs
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import FullMatch
 from eventseries.src.main.repository.wikidata_dataclasses import (
     WikiDataEvent,
     WikiDataEventSeries,
     get_title_else_label,
 )
+from eventseries.src.main.util.atomic_file import atomic_write
+
+
+class TfIdfSeriesIndex:
+    """TF-IDF model fitted on the titles of a series catalogue.
+    The fitted vectorizer and the series matrix are stored in index_file and only refitted if
+    the catalogue changes. Events are transformed with the fitted vocabulary."""
+
+    def __init__(
+        self,
+        index_file: Optional[Path] = ires.files("eventseries.src.main")
+        / "resources"
+        / "models"
+        / "tfidf_series_index.pickle",
+    ) -> None:
+        """:param index_file: File the index is persisted to. None keeps the index in memory."""
+        self.index_file: Optional[Path] = index_file
+        self.fingerprint: Optional[str] = None
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.series_matrix: Optional[csr_matrix] = None
+        if self.index_file is not None and self.index_file.is_file():
+            self.load()
+
+    @staticmethod
+    def catalogue_fingerprint(series_titles: Sequence[str]) -> str:
+        sha = hashlib.sha256()
+        for title in series_titles:
+            sha.update(title.encode("utf-8"))
+            sha.update(b"\x00")
+        return sha.hexdigest()
+
+    def is_fitted(self) -> bool:
+        return self.vectorizer is not None and self.series_matrix is not None
+
+    def fit(self, series_titles: Sequence[str]) -> bool:
+        """Fit the index on the series titles if they differ from the already fitted ones.
+        :returns True if the index had to be refitted."""
+        fingerprint = TfIdfSeriesIndex.catalogue_fingerprint(series_titles)
+        if self.is_fitted() and fingerprint == self.fingerprint:
+            return False
+        logging.debug("Fitting tf-idf index on %s series titles.", len(series_titles))
+        self.vectorizer = TfidfVectorizer(stop_words=list(text.ENGLISH_STOP_WORDS))
+        self.series_matrix = self.vectorizer.fit_transform(series_titles)
+        self.fingerprint = fingerprint
+        if self.index_file is not None:
+            self.store()
+        return True
+
+    def transform(self, titles: Sequence[str]) -> csr_matrix:
+        if not self.is_fitted():
+            raise ValueError("The tf-idf index has to be fitted before transforming titles.")
+        return self.vectorizer.transform(titles)
+
+    def search(
+        self,
+        titles: Sequence[str],
+        threshold: float,
+        top_k: Optional[int] = 1,
+        candidates: Optional[CandidatePairs] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the most similar series for each title.
+        :param candidates: Only compare these pairs of titles and series, None compares all.
+        :returns (rows, cols, similarities) as described by sparse_top_k."""
+        if candidates is None:
+            return sparse_top_k(
+                self.transform(titles), self.series_matrix, top_k=top_k, threshold=threshold
+            )
+        similarities = pair_similarities(
+            self.transform(titles), self.series_matrix, candidates.rows, candidates.cols
+        )
+        return top_k_pairs(
+            candidates.rows, candidates.cols, similarities, top_k=top_k, threshold=threshold
+        )
+
+    def store(self):
+        with atomic_write(self.index_file) as file:
+            pickle.dump(
+                {
+                    "fingerprint": self.fingerprint,
+                    "vectorizer": self.vectorizer,
+                    "series_matrix": self.series_matrix,
+                },
+                file,
+            )
+
+    def load(self):
+        """Load the stored index, an unreadable index file leaves the index unfitted."""
+        try:
+            with self.index_file.open("rb") as file:
+                stored = pickle.load(file)
+        except (EOFError, pickle.UnpicklingError) as exc:
+            logging.warning("Ignoring unreadable tf-idf index %s: %s", self.index_file, exc)
+            return
+        self.fingerprint = stored["fingerprint"]
+        self.vectorizer = stored["vectorizer"]
+        self.series_matrix = stored["series_matrix"]
 
 
 class TfIdfMatch:
-    def __init__(self, matches_df: pd.DataFrame) -> None:
+    def __init__(
+        self,
+        matches_df: pd.DataFrame,
+        series_index: Optional[TfIdfSeriesIndex] = None,
+        model_cache: Optional[ModelCache] = None,
+    ) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns used for training.
+        :param series_index: Index over the series that events are matched against.
+        Defaults to the index persisted in the resources.
+        :param model_cache: Cache of fitted models, None always fits.
+        """
         self.matches_df = matches_df
         self.matches_df.dropna(inplace=True)
         self.series_titles = matches_df["series"].tolist()
         self.event_titles = matches_df["event"].tolist()
+        self.series_index = TfIdfSeriesIndex() if series_index is None else series_index
         self.best_threshold = -1
         self.best_f1_score = -1
         self.recall = 0
-        self.fit()
+        self.gold_standard = GoldStandard(self.matches_df)
+        # Threshold for partial match
+        self.threshold_values = [0.5, 0.6, 0.7, 0.8, 0.9]
+        fit_cached(
+            model_cache,
+            self,
+            training_fingerprint(self.matches_df, threshold_values=self.threshold_values),
+            ["best_threshold", "best_f1_score", "recall"],
+            self.fit,
+        )
 
     def fit(self):
-        vectorizer = TfidfVectorizer(stop_words=list(text.ENGLISH_STOP_WORDS))
-        array1_strings = self.event_titles
-        array2_strings = self.series_titles
-        tfidf_matrix = vectorizer.fit_transform(self.event_titles + self.series_titles)
-
-        # Calculate cosine similarity between array1 and array2
-        similarity_matrix = cosine_similarity(
-            tfidf_matrix[: len(array1_strings)], tfidf_matrix[len(array1_strings) :]
+        # Use the same kind of model as for matching: series are indexed, events transformed.
+        training_index = TfIdfSeriesIndex(index_file=None)
+        training_index.fit(self.series_titles)
+        threshold_values = self.threshold_values
+
+        # The most similar series of every event, that reaches at least the lowest threshold.
+        rows, cols, similarities = training_index.search(
+            self.event_titles, threshold=min(threshold_values), top_k=1
         )
+        expected_labels = self.gold_standard.labels_for_events(self.event_titles)
 
-        # Threshold for partial match
-        threshold_values = [0.5, 0.6, 0.7, 0.8, 0.9]
-        # threshold_values = [0.9]
-
-        # Find partial matches\
         for threshold in threshold_values:
-            matches = []
-            true_positives = 0
-            false_positives = 0
-            false_negatives = 0
-            num_rows = len(similarity_matrix)
-            num_cols = len(similarity_matrix[0])
-            for row in range(num_rows):
-                score = threshold
-                new_row = -1
-                new_col = -1
-                for col in range(num_cols):
-                    element = similarity_matrix[row][col]
-                    if element >= score:
-                        score = element
-                        new_row = row
-                        new_col = col
-                if new_row != -1 and new_col != -1:
-                    matches.append([new_row, new_col])
-            #     print(matches)
-
-            # matches = np.argwhere(similarity_matrix >= threshold)
-
-            ctr = 0
-            partially_matched_events = []
-
-            # Print partial matches
-            for match in matches:
-                array1_index = match[0]
-                array2_index = match[1]
-                #         print("Partial match found:")
-                #         print(f"#####EVENT#####{array1_strings[array1_index]}")
-                #         print(f"######SERIES######{array2_strings[array2_index]}")
-
-                if (
-                    self.matches_df.loc[
-                        self.matches_df["event"] == array1_strings[array1_index], "series"
-                    ].values[0]
-                ) == array2_strings[array2_index]:
-                    #         if(matched_events_dict[array1_strings[array1_index]] >)
-                    true_positives += 1
-                else:
-                    false_positives += 1
-                partially_matched_events.append(array1_strings[array1_index])
-
-            # Series not matched to any event
-            #     false_negatives = len(series_titles) - len(series_distinct)
-            false_negatives = len(self.event_titles) - (true_positives + false_positives)
-
-            # print("Results with threshold: ", threshold)
-            # print("true positives: ", true_positives)
-            # print("false positives: ", false_positives)
-            # print("false negatives: ", false_negatives)
-            precision = true_positives / (true_positives + false_positives)
-            # print("Precision: ", precision)
-            recall = true_positives / (true_positives + false_negatives)
-            self.recall = recall
-            # print("Recall: ", recall)
-            f1_score = 2 * (precision * recall) / (precision + recall)
-            if f1_score > self.best_f1_score:
+            above_threshold = similarities >= threshold
+            statistics = self.gold_standard.evaluate(
+                predicted=self.gold_standard.row_labels[cols[above_threshold]],
+                expected=expected_labels[rows[above_threshold]],
+            )
+            self.recall = statistics.recall
+            if statistics.f1_score > self.best_f1_score:
                 self.best_threshold = threshold
-                self.best_f1_score = f1_score
+                self.best_f1_score = statistics.f1_score
         logging.info(
             "Best f1 score for TfIdfMatch is %s with threshold %s",
             self.best_f1_score,
@@ -111,37 +181,52 @@ class TfIdfMatch:
         )
 
     def wikidata_match(
-        self, events_list: List[WikiDataEvent], series_list: List[WikiDataEventSeries]
+        self,
+        events_list: List[WikiDataEvent],
+        series_list: List[WikiDataEventSeries],
+        top_k: Optional[int] = None,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
-        if self.recall == 1:
-            print("Model is overfitting, and cannot be used")
-            return []
-
-        vectorizer = TfidfVectorizer(stop_words=list(text.ENGLISH_STOP_WORDS))
-        event_titles = [get_title_else_label(event) for event in events_list]
-        series_titles = [get_title_else_label(series) for series in series_list]
-        tfidf_matrix = vectorizer.fit_transform(event_titles + series_titles)
-
-        # Calculate cosine similarity between array1 and array2
-        similarity_matrix = cosine_similarity(
-            tfidf_matrix[: len(event_titles)], tfidf_matrix[len(event_titles) :]
+        """Match every event to the series that reach the threshold chosen in fit.
+        The series index is only refitted if series_list changed since the last call.
+        :param top_k: Only report the top_k most similar series per event. None reports all.
+        :param candidates: Only compare these pairs of events and series, None compares all.
+        :param features: Title features of the events and series, computed if not given."""
+        rows, cols, _ = self.wikidata_scores(
+            events_list, series_list, top_k, candidates, features
         )
-
-        # Threshold for partial match
-        threshold = self.best_threshold
-
-        # Find partial matches
-        matches = np.argwhere(similarity_matrix >= threshold)
-        found_full_matches = []
-        # Print partial matches
-        for match in matches:
-            array1_index = match[0]
-            array2_index = match[1]
-            found_full_matches.append(
-                FullMatch(
-                    event=events_list[array1_index],
-                    series=series_list[array2_index],
-                    found_by="TfIdfMatch::wikidata_match",
-                )
+        return [
+            FullMatch(
+                event=events_list[row],
+                series=series_list[col],
+                found_by="TfIdfMatch::wikidata_match",
             )
-        return found_full_matches
+            for row, col in zip(rows, cols)
+        ]
+
+    def wikidata_scores(
+        self,
+        events_list: List[WikiDataEvent],
+        series_list: List[WikiDataEventSeries],
+        top_k: Optional[int] = None,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(event rows, series columns, similarities) of the pairs wikidata_match reports."""
+        if self.recall == 1:
+            logging.warning("Model is overfitting, and cannot be used")
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        if features is None:
+            event_titles = [get_title_else_label(event) for event in events_list]
+            series_titles = [get_title_else_label(series) for series in series_list]
+        else:
+            event_titles, series_titles = features.events.titles, features.series.titles
+        self.series_index.fit(series_titles)
+        return self.series_index.search(
+            event_titles,
+            threshold=self.best_threshold,
+            top_k=top_k,
+            candidates=candidates,
+        )
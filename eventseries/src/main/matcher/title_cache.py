@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import pickle
+import re
+from collections import OrderedDict
+from importlib import resources as ires
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+
+import nltk
+import numpy as np
+from gensim.models import KeyedVectors
+from nltk.corpus import stopwords
+
+from eventseries.src.main.matcher.similarity import mean_token_vectors
+from eventseries.src.main.util.atomic_file import atomic_write
+
+DEFAULT_CACHE_FILE: Path = (
+    ires.files("eventseries.src.main") / "resources" / "models" / "title_cache.pickle"
+)
+
+# Caches already loaded by this process, shared by all matcher instances.
+_loaded_caches: Dict[str, "TitleCache"] = {}
+
+
+def clean_string(title: str) -> str:
+    # Keep only alphanumeric characters and spaces
+    return re.sub(r"[^\w\s]", "", title)
+
+
+def remove_stopwords_tokenize(titles: Sequence[str], stop_words: Set[str]) -> List[List[str]]:
+    """Tokenize the titles and remove stopwords. The tokens are lowercased."""
+    filtered_list = []
+    for title in titles:
+        words = nltk.word_tokenize(clean_string(title))
+        filtered_list.append([word.lower() for word in words if word.lower() not in stop_words])
+    return filtered_list
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.split())
+
+
+def model_fingerprint(keyed_vectors: KeyedVectors) -> str:
+    """Identify the vectors a model returns for its vocabulary.
+    Only the rows reachable through the vocabulary are hashed, so models sharing large
+    pretrained vectors (as Word2VecMatch does) are identified without reading all of them."""
+    sha = hashlib.sha256()
+    for key in keyed_vectors.index_to_key:
+        sha.update(str(key).encode("utf-8"))
+        sha.update(b"\x00")
+    vocabulary_vectors = keyed_vectors.vectors[: len(keyed_vectors.index_to_key)]
+    sha.update(np.ascontiguousarray(vocabulary_vectors, dtype=np.float32).tobytes())
+    return sha.hexdigest()
+
+
+class TitleCache:
+    """Memoized tokens and mean title vectors of the word2vec matchers.
+    Tokens are keyed by the normalized title, vectors additionally by the model fingerprint.
+    Vectors of the least recently used models are dropped when more than max_models are cached,
+    which invalidates them once a model is retrained.
+    New entries are only written to the cache file by flush."""
+
+    def __init__(self, cache_file: Optional[Path] = DEFAULT_CACHE_FILE, max_models: int = 4):
+        """
+        :param cache_file: File the cache is persisted to. None keeps the cache in memory.
+        :param max_models: Number of models for which title vectors are kept.
+        """
+        self.cache_file: Optional[Path] = cache_file
+        self.max_models = max_models
+        self.tokens_by_title: Dict[str, List[str]] = {}
+        self.vectors_by_model: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._stop_words: Optional[Set[str]] = None
+        self._changed = False
+        if self.cache_file is not None and self.cache_file.is_file():
+            self.load()
+
+    @property
+    def stop_words(self) -> Set[str]:
+        if self._stop_words is None:
+            self._stop_words = set(stopwords.words("english"))
+        return self._stop_words
+
+    def tokens(self, titles: Sequence[str]) -> List[List[str]]:
+        """Lowercased tokens without stopwords of every title."""
+        keys = [normalize_title(title) for title in titles]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.tokens_by_title))
+        if missing:
+            logging.debug("Tokenizing %s new titles.", len(missing))
+            self.tokens_by_title.update(
+                zip(missing, remove_stopwords_tokenize(missing, self.stop_words))
+            )
+            self._changed = True
+        return [self.tokens_by_title[key] for key in keys]
+
+    def vectors(self, titles: Sequence[str], keyed_vectors: KeyedVectors) -> np.ndarray:
+        """Mean vectors of the known tokens of every title as described by mean_token_vectors."""
+        model_id = model_fingerprint(keyed_vectors)
+        if model_id not in self.vectors_by_model:
+            self.vectors_by_model[model_id] = {}
+            while len(self.vectors_by_model) > self.max_models:
+                self.vectors_by_model.popitem(last=False)
+        self.vectors_by_model.move_to_end(model_id)
+        cached = self.vectors_by_model[model_id]
+
+        keys = [normalize_title(title) for title in titles]
+        missing = list(dict.fromkeys(key for key in keys if key not in cached))
+        if missing:
+            missing_vectors = mean_token_vectors(self.tokens(missing), keyed_vectors)
+            cached.update(zip(missing, missing_vectors))
+            self._changed = True
+        # Rows are sized like mean_token_vectors sizes them, vector_size is not updated
+        # when the vectors of a model are replaced.
+        title_vectors = np.zeros((len(keys), keyed_vectors.vectors.shape[1]), dtype=np.float32)
+        for row, key in enumerate(keys):
+            title_vectors[row] = cached[key]
+        return title_vectors
+
+    def flush(self):
+        """Store the cache if entries were added since it was loaded or last stored."""
+        if self._changed:
+            self.store()
+
+    def store(self):
+        if self.cache_file is None:
+            return
+        with atomic_write(self.cache_file) as file:
+            pickle.dump(
+                {
+                    "tokens_by_title": self.tokens_by_title,
+                    "vectors_by_model": self.vectors_by_model,
+                },
+                file,
+            )
+        self._changed = False
+
+    def load(self):
+        """Load the stored cache, an unreadable cache file is treated as an empty cache."""
+        try:
+            with self.cache_file.open("rb") as file:
+                stored = pickle.load(file)
+        except (EOFError, pickle.UnpicklingError) as exc:
+            logging.warning("Ignoring unreadable title cache %s: %s", self.cache_file, exc)
+            return
+        self.tokens_by_title = stored["tokens_by_title"]
+        self.vectors_by_model = stored["vectors_by_model"]
+
+
+def load_title_cache(cache_file: Optional[Path] = DEFAULT_CACHE_FILE) -> TitleCache:
+    """The cache for cache_file, loaded at most once per process."""
+    key = str(cache_file)
+    if key not in _loaded_caches:
+        _loaded_caches[key] = TitleCache(cache_file)
+    return _loaded_caches[key]
@@ -0,0 +1,207 @@
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Union
+
+import numpy as np
+import regex as re
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from eventseries.src.main.completion.attribute_completion import extract_acronym
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    WikiDataEvent,
+    WikiDataEventSeries,
+    get_title_else_label,
+)
+
+# Words without digits, so years and numeric ordinals like "12th" are never tokens.
+_WORD_PATTERN = re.compile(r"\b[^\W\d_]+\b")
+_YEAR_PATTERN = re.compile(r"(?<!\d)(?:19|20)\d{2}(?!\d)")
+_NUMERIC_ORDINAL_PATTERN = re.compile(r"\b(\d+)(?:st|nd|rd|th)\b", re.IGNORECASE)
+_ORDINAL_WORDS = {
+    word: number
+    for number, word in enumerate(
+        [
+            "first",
+            "second",
+            "third",
+            "fourth",
+            "fifth",
+            "sixth",
+            "seventh",
+            "eighth",
+            "ninth",
+            "tenth",
+            "eleventh",
+            "twelfth",
+            "thirteenth",
+            "fourteenth",
+            "fifteenth",
+            "sixteenth",
+            "seventeenth",
+            "eighteenth",
+            "nineteenth",
+            "twentieth",
+        ],
+        start=1,
+    )
+}
+
+
+def blocking_tokens(title: str) -> Set[str]:
+    """Lowercased words of title without stopwords, ordinals and years."""
+    return {
+        word
+        for word in _WORD_PATTERN.findall(title.lower())
+        if len(word) > 1 and word not in ENGLISH_STOP_WORDS and word not in _ORDINAL_WORDS
+    }
+
+
+def acronym_key(acronym: Optional[str]) -> Optional[str]:
+    """Lowercased letters of acronym, so that "ESWC 2019" and "ESWC'19" both become "eswc"."""
+    if acronym is None:
+        return None
+    key = "".join(character for character in acronym.lower() if character.isalpha())
+    return key if len(key) > 1 else None
+
+
+def extract_year(title: str) -> Optional[int]:
+    found = _YEAR_PATTERN.search(title)
+    return int(found.group(0)) if found else None
+
+
+def extract_ordinal(title: str) -> Optional[int]:
+    """Ordinal written as number ("12th") or as word ("Second") in title."""
+    found = _NUMERIC_ORDINAL_PATTERN.search(title)
+    if found:
+        return int(found.group(1))
+    for word in _WORD_PATTERN.findall(title.lower()):
+        if word in _ORDINAL_WORDS:
+            return _ORDINAL_WORDS[word]
+    return None
+
+
+def char_ngram_hashes(title: str, n: int) -> FrozenSet[int]:
+    """Hashes of the character n-grams of title, as nltk.ngrams(title, n) would return them.
+    crc32 is used since the builtin hash of strings differs between processes."""
+    return frozenset(
+        zlib.crc32(title[start : start + n].encode("utf-8"))
+        for start in range(len(title) - n + 1)
+    )
+
+
+@dataclass
+class TitleFeatures:
+    """Title features of events or series computed once and shared by all matchers.
+    Every column has one entry per item, in the order of the items.
+    Years and ordinals are -1 if they are unknown."""
+
+    titles: List[str]
+    normalized: List[str]
+    tokens: List[FrozenSet[str]]
+    acronyms: List[Optional[str]]
+    acronym_keys: List[FrozenSet[str]]
+    years: np.ndarray
+    ordinals: np.ndarray
+    # Character n-gram hashes by n, computed on first use.
+    _ngram_hashes: Dict[int, List[FrozenSet[int]]] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @staticmethod
+    def from_items(
+        items: Sequence[Union[WikiDataEvent, WikiDataEventSeries]]
+    ) -> "TitleFeatures":
+        titles = [get_title_else_label(item) for item in items]
+        texts = [[text for text in (item.title, item.label) if text is not None] for item in items]
+        extracted_acronyms = [
+            [extract_acronym(text) for text in item_texts] for item_texts in texts
+        ]
+        acronyms = [
+            item.acronym if item.acronym is not None else next(filter(None, found), None)
+            for item, found in zip(items, extracted_acronyms)
+        ]
+        years: List[Optional[int]] = []
+        ordinals: List[Optional[int]] = []
+        for item, title in zip(items, titles):
+            # Only events have a start time and an ordinal.
+            start_time = getattr(item, "start_time", None)
+            year = extract_year(title)
+            years.append(year if year is not None or start_time is None else start_time.year)
+            ordinal = getattr(item, "ordinal", None)
+            ordinals.append(ordinal if ordinal is not None else extract_ordinal(title))
+        return TitleFeatures(
+            titles=titles,
+            normalized=[" ".join(title.lower().split()) for title in titles],
+            tokens=[
+                frozenset().union(*(blocking_tokens(text) for text in item_texts))
+                for item_texts in texts
+            ],
+            acronyms=acronyms,
+            acronym_keys=[
+                frozenset(filter(None, map(acronym_key, [acronym] + found)))
+                for acronym, found in zip(acronyms, extracted_acronyms)
+            ],
+            years=_optional_ints(years),
+            ordinals=_optional_ints(ordinals),
+        )
+
+    @staticmethod
+    def from_titles(titles: Sequence[str]) -> "TitleFeatures":
+        """Features of plain titles, like the ones of the training set."""
+        acronyms = [extract_acronym(title) for title in titles]
+        return TitleFeatures(
+            titles=list(titles),
+            normalized=[" ".join(title.lower().split()) for title in titles],
+            tokens=[frozenset(blocking_tokens(title)) for title in titles],
+            acronyms=acronyms,
+            acronym_keys=[frozenset(filter(None, [acronym_key(acronym)])) for acronym in acronyms],
+            years=_optional_ints([extract_year(title) for title in titles]),
+            ordinals=_optional_ints([extract_ordinal(title) for title in titles]),
+        )
+
+    def ngram_hashes(self, n: int) -> List[FrozenSet[int]]:
+        """Character n-gram hashes of every title, see char_ngram_hashes."""
+        if n not in self._ngram_hashes:
+            self._ngram_hashes[n] = [char_ngram_hashes(title, n) for title in self.titles]
+        return self._ngram_hashes[n]
+
+    def take(self, rows: Sequence[int]) -> "TitleFeatures":
+        """Features of the items at rows, already computed n-gram hashes are kept."""
+        rows = list(rows)
+        return TitleFeatures(
+            titles=[self.titles[row] for row in rows],
+            normalized=[self.normalized[row] for row in rows],
+            tokens=[self.tokens[row] for row in rows],
+            acronyms=[self.acronyms[row] for row in rows],
+            acronym_keys=[self.acronym_keys[row] for row in rows],
+            years=self.years[rows],
+            ordinals=self.ordinals[rows],
+            _ngram_hashes={
+                n: [hashes[row] for row in rows] for n, hashes in self._ngram_hashes.items()
+            },
+        )
+
+
+@dataclass(frozen=True)
+class MatchingFeatures:
+    """Title features of the events and of the series a matcher compares."""
+
+    events: TitleFeatures
+    series: TitleFeatures
+
+    @staticmethod
+    def from_items(
+        events: Sequence[WikiDataEvent], series: Sequence[WikiDataEventSeries]
+    ) -> "MatchingFeatures":
+        return MatchingFeatures(TitleFeatures.from_items(events), TitleFeatures.from_items(series))
+
+    def take_events(self, rows: Sequence[int]) -> "MatchingFeatures":
+        return MatchingFeatures(self.events.take(rows), self.series)
+
+    def take_series(self, cols: Sequence[int]) -> "MatchingFeatures":
+        return MatchingFeatures(self.events, self.series.take(cols))
+
+
+def _optional_ints(values: Sequence[Optional[int]]) -> np.ndarray:
+    return np.array([-1 if value is None else value for value in values], dtype=np.int64)
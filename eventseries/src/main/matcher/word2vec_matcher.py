@@ -1,15 +1,23 @@
 import logging
-import re
-from typing import List
+from typing import List, Optional, Tuple
 
-import gensim.downloader as api
-import nltk
 import numpy as np
 import pandas as pd
-from gensim.models import Word2Vec
-from nltk.corpus import stopwords
-from sklearn.metrics.pairwise import cosine_similarity
-
+from gensim.models import KeyedVectors, Word2Vec
+
+from eventseries.src.main.matcher.ann_index import IvfIndex
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.embedding_store import load_embeddings
+from eventseries.src.main.matcher.evaluation import GoldStandard, NO_MATCH
+from eventseries.src.main.matcher.model_cache import ModelCache, fit_cached, training_fingerprint
+from eventseries.src.main.matcher.similarity import (
+    best_pair_per_row,
+    dense_best_match,
+    normalize_rows,
+    pair_similarities,
+)
+from eventseries.src.main.matcher.title_cache import TitleCache, load_title_cache
+from eventseries.src.main.matcher.title_features import MatchingFeatures
 from eventseries.src.main.repository.completions import FullMatch
 from eventseries.src.main.repository.wikidata_dataclasses import (
     WikiDataEvent,
@@ -19,201 +27,176 @@ from eventseries.src.main.repository.wikidata_dataclasses import (
 
 
 class Word2VecMatch:
-    def __init__(self, matches_df: pd.DataFrame, skip_grams: int) -> None:
+    def __init__(
+        self,
+        matches_df: pd.DataFrame,
+        skip_grams: int,
+        embeddings: Optional[KeyedVectors] = None,
+        title_cache: Optional[TitleCache] = None,
+        model_cache: Optional[ModelCache] = None,
+    ) -> None:
+        """
+        :param matches_df: Dataframe with "event" and "series" columns used for training.
+        :param skip_grams: 1 for skip-gram and 0 for CBOW training.
+        :param embeddings: Pretrained vectors, defaults to the shared memory-mapped GloVe vectors.
+        :param title_cache: Cache of tokens and title vectors, defaults to the shared persisted one.
+        :param model_cache: Cache of fitted models, None always fits.
+        """
         matches_df.dropna(inplace=True)
         self.matches_df = matches_df
         self.matches_df.dropna(inplace=True)
         self.matches_df.reset_index(drop=True, inplace=True)
-        self.stop_words = set(stopwords.words("english"))
-        self.event_titles = self.remove_stopwords_tokenize(matches_df["event"].tolist())
-        self.event_titles = [[token.lower() for token in tokens] for tokens in self.event_titles]
-        self.series_titles = self.remove_stopwords_tokenize(matches_df["series"].tolist())
-        self.series_titles = [[token.lower() for token in tokens] for tokens in self.series_titles]
+        self.title_cache = load_title_cache() if title_cache is None else title_cache
+        self.event_titles = self.title_cache.tokens(matches_df["event"].tolist())
+        self.series_titles = self.title_cache.tokens(matches_df["series"].tolist())
         self.skip_grams = skip_grams
-        glove_model = api.load("glove-wiki-gigaword-300")
-        self.model = Word2Vec(
-            self.event_titles + self.series_titles,
-            vector_size=100,
-            window=5,
-            min_count=1,
-            sg=self.skip_grams,
-        )
-        self.model.wv.vectors = glove_model.vectors
+        self.embeddings = load_embeddings() if embeddings is None else embeddings
+        self.model = Word2Vec(vector_size=100, window=5, min_count=1, sg=self.skip_grams)
         self.matches_df["event_tokenized"] = self.event_titles
         self.matches_df["series_tokenized"] = self.series_titles
         self.recall = 0
-        self.event_vector_list = []
-        for event_tokens in self.event_titles:
-            event_vector = np.mean([self.model.wv[token] for token in event_tokens], axis=0)
-            event_vector = event_vector.reshape(1, -1)
-            self.event_vector_list.append(event_vector)
-        self.matches_df["event_vectors"] = self.event_vector_list
+        self.gold_standard = GoldStandard(self.matches_df)
         self.best_threshold = 0
-
-        series_vector_list = []
-        for series_tokens in self.series_titles:
-            series_vector = np.mean([self.model.wv[token] for token in series_tokens], axis=0)
-            series_vector = series_vector.reshape(1, -1)
-            series_vector_list.append(series_vector)
-        self.matches_df["event_series_vectors"] = series_vector_list
+        # The trained vectors are replaced by the pretrained ones,
+        # only the vocabulary of the trained model has to be cached.
+        self.vocabulary: List[str] = []
+        restored = fit_cached(
+            model_cache,
+            self,
+            training_fingerprint(
+                self.matches_df,
+                skip_grams=self.skip_grams,
+                vector_size=self.model.vector_size,
+                window=self.model.window,
+                embeddings_shape=self.embeddings.vectors.shape,
+            ),
+            ["vocabulary", "best_threshold", "recall"],
+            self.fit,
+        )
+        if restored:
+            self.use_vocabulary(self.vocabulary)
+        self.title_cache.flush()
+
+    def fit(self):
+        sentences = self.event_titles + self.series_titles
+        self.model.build_vocab(sentences)
+        self.model.train(
+            sentences, total_examples=self.model.corpus_count, epochs=self.model.epochs
+        )
+        self.vocabulary = list(self.model.wv.index_to_key)
+        self.use_vocabulary(self.vocabulary)
+        # Title embeddings stacked as normalized float32 matrices, one row per training pair.
+        self.event_vectors = normalize_rows(
+            self.title_cache.vectors(self.matches_df["event"].tolist(), self.model.wv)
+        )
+        self.series_vectors = normalize_rows(
+            self.title_cache.vectors(self.matches_df["series"].tolist(), self.model.wv)
+        )
         self.matcher()
 
+    def use_vocabulary(self, vocabulary: List[str]):
+        """Look up the tokens of vocabulary in the pretrained vectors, as a trained model does.
+        The vectors of the model are replaced by keyed vectors with the dimension of the
+        embeddings, which share their vectors instead of copying them."""
+        keyed_vectors = KeyedVectors(vector_size=self.embeddings.vector_size)
+        keyed_vectors.index_to_key = list(vocabulary)
+        keyed_vectors.key_to_index = {key: index for index, key in enumerate(vocabulary)}
+        keyed_vectors.vectors = self.embeddings.vectors
+        self.model.wv = keyed_vectors
+
     def matcher(self):
-        true_positives = 0
-        false_positives = 0
-        false_negatives = 0
         similarity_threshold = [0.93, 0.95]
         best_f1score = 0
 
-        for x in range(0, len(similarity_threshold)):
-            for i in range(0, len(self.matches_df["event_vectors"])):
-                max_similarity = 0
-                best_j = -1
-                for j in range(0, len(self.matches_df["event_series_vectors"])):
-                    similarity = cosine_similarity(
-                        self.matches_df.loc[i, "event_vectors"],
-                        self.matches_df.loc[j, "event_series_vectors"],
-                    )[0][0]
-                    if i == j:
-                        same_index_similarity = similarity
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        best_j = j
-                if max_similarity < similarity_threshold[x]:
-                    false_negatives += 1
-                elif i != best_j and max_similarity > same_index_similarity:
-                    false_positives += 1
-                else:
-                    true_positives += 1
-
-            precision = true_positives / (true_positives + false_positives)
-            recall = true_positives / (true_positives + false_negatives)
-            self.recall = recall
-            f1_score = 2 * (precision * recall) / (precision + recall)
-            if f1_score > best_f1score:
-                best_f1score = f1_score
-                self.best_threshold = similarity_threshold[x]
-
-            # print(f"\nStatistics from Word2Vec matching with skip grams: ", self.skip_grams)
-            # print("Precision: ", precision)
-            # # recall = true_positives / (true_positives + false_negatives)
-            # print("Recall: ", recall)
-            # self.recall = recall
-            # # f1_score = 2 * (precision * recall) / (precision + recall)
-            # print("F1-Score: ", f1_score)
+        # The most similar series for every event of the training set.
+        best_series, max_similarities = dense_best_match(self.event_vectors, self.series_vectors)
+        best_series[max_similarities <= 0] = -1
+
+        expected = self.gold_standard.row_labels
+        statistics_by_threshold = {}
+        for threshold in similarity_threshold:
+            # Events below the threshold are not matched and count as false negatives.
+            predicted = np.where(
+                (best_series >= 0) & (max_similarities >= threshold),
+                expected[best_series],
+                NO_MATCH,
+            )
+            statistics = self.gold_standard.evaluate(predicted, expected)
+            statistics_by_threshold[threshold] = statistics
+            if statistics.f1_score > best_f1score:
+                best_f1score = statistics.f1_score
+                self.best_threshold = threshold
+        best_statistics = statistics_by_threshold.get(self.best_threshold, statistics)
 
         if self.skip_grams == 0:
-            logging.info("Statistics from Word2Vec matching for continuous bag of words: ")
+            description = "Word2Vec matching for continuous bag of words"
         else:
-            logging.info("Statistics from Word2Vec matching with skip grams: %s", self.skip_grams)
-        logging.info("Best threshold: %s", self.best_threshold)
-        precision = true_positives / (true_positives + false_positives)
-        logging.info("Precision: %s", precision)
-        recall = true_positives / (true_positives + false_negatives)
-        logging.info("Recall: %s", recall)
-        self.recall = recall
-        f1_score = 2 * (precision * recall) / (precision + recall)
-        logging.info("F1-Score: %s", f1_score)
+            description = f"Word2Vec matching with skip grams: {self.skip_grams}"
+        logging.info("Best threshold for %s: %s", description, self.best_threshold)
+        best_statistics.log(description)
+        self.recall = best_statistics.recall
 
     def wikidata_match(
-        self, events_list: List[WikiDataEvent], series_list: List[WikiDataEventSeries]
+        self,
+        events_list: List[WikiDataEvent],
+        series_list: List[WikiDataEventSeries],
+        series_index: Optional[IvfIndex] = None,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
     ) -> List[FullMatch]:
-        if self.recall == 1:
-            logging.error("Model is overfitting, and cannot be used")
-            return []
-
-        event_titles = [get_title_else_label(event) for event in events_list]
-        series_titles = [get_title_else_label(series) for series in series_list]
-
-        event_tokenized_titles = self.remove_stopwords_tokenize(event_titles)
-        event_tokenized_titles = [
-            [token.lower() for token in tokens] for tokens in event_tokenized_titles
-        ]
-
-        series_tokenized_titles = self.remove_stopwords_tokenize(series_titles)
-        series_tokenized_titles = [
-            [token.lower() for token in tokens] for tokens in series_tokenized_titles
-        ]
-
-        data_list_single_column = [[inner_list] for inner_list in event_tokenized_titles]
-        matches_events_df = pd.DataFrame(
-            {
-                "events_tokenized": data_list_single_column,
-                "title": event_titles,
-                "event": events_list,
-            }
+        """
+        Match every event to the series with the most similar title embedding.
+        :param series_index: Approximate index used instead of comparing all pairs.
+        It is refitted if the series vectors differ from the indexed ones.
+        :param candidates: Only compare these pairs of events and series, None compares all.
+        :param features: Title features of the events and series, computed if not given.
+        """
+        rows, cols, _ = self.wikidata_scores(
+            events_list, series_list, series_index, candidates, features
         )
-
-        data_list_single_column = [[inner_list] for inner_list in series_tokenized_titles]
-        matches_series_df = pd.DataFrame(
-            {
-                "series_tokenized": data_list_single_column,
-                "title": series_titles,
-                "series": series_list,
-            }
-        )
-
-        event_vector_list = []
-        for event_tokens in event_tokenized_titles:
-            event_vector = np.mean(
-                [self.model.wv[token] for token in event_tokens if token in self.model.wv], axis=0
-            )
-            event_vector = event_vector.reshape(1, -1)
-            event_vector_list.append(event_vector)
-        matches_events_df["event_vectors"] = event_vector_list
-
-        series_vector_list = []
-        for series_tokens in series_tokenized_titles:
-            series_vector = np.mean(
-                [self.model.wv[token] for token in series_tokens if token in self.model.wv], axis=0
+        return [
+            FullMatch(
+                event=events_list[row],
+                series=series_list[col],
+                found_by="Word2VecMatch::wikidata_match",
             )
-            series_vector = series_vector.reshape(1, -1)
-            series_vector_list.append(series_vector)
-        matches_series_df["event_series_vectors"] = series_vector_list
-
-        found_matches: List[FullMatch] = []
-        for i in range(0, len(matches_events_df["event_vectors"])):
-            similarities = {}
-            for j in range(0, len(matches_series_df["event_series_vectors"])):
-                try:
-                    similarity = cosine_similarity(
-                        matches_events_df.loc[i, "event_vectors"],
-                        matches_series_df.loc[j, "event_series_vectors"],
-                    )[0][0]
-                    similarities[similarity] = j
-                except ValueError:
-                    continue
+            for row, col in zip(rows, cols)
+        ]
 
-            if len(similarities.keys()) != 0 and max(similarities.keys()) > self.best_threshold:
-                best_event_id = matches_events_df.loc[i, "event"]
-                best_series_id = matches_series_df.loc[
-                    similarities[max(similarities.keys())], "series"
-                ]
-                found_matches.append(
-                    FullMatch(
-                        event=best_event_id,
-                        series=best_series_id,
-                        found_by="Word2VecMatch::wikidata_match",
-                    )
-                )
-        return found_matches
+    def wikidata_scores(
+        self,
+        events_list: List[WikiDataEvent],
+        series_list: List[WikiDataEventSeries],
+        series_index: Optional[IvfIndex] = None,
+        candidates: Optional[CandidatePairs] = None,
+        features: Optional[MatchingFeatures] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(event rows, series columns, similarities) of the events wikidata_match matches."""
+        if self.recall == 1:
+            logging.error("Model is overfitting, and cannot be used")
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
 
-    def remove_stopwords_tokenize(self, text_list) -> List[List[str]]:
-        # Remove stopwords from each string in the list
-        filtered_list = []
-        for text in text_list:
-            # Keep only alphanumeric characters and spaces
-            text = self.clean_string(text)
-            # Tokenize the string into individual words
-            words = nltk.word_tokenize(text)
-            # Remove stopwords from the list of words
-            filtered_words = [word for word in words if word.lower() not in self.stop_words]
-            filtered_list.append(filtered_words)
-        return filtered_list
+        if features is None:
+            event_titles = [get_title_else_label(event) for event in events_list]
+            series_titles = [get_title_else_label(series) for series in series_list]
+        else:
+            event_titles, series_titles = features.events.titles, features.series.titles
+
+        event_vectors = normalize_rows(self.title_cache.vectors(event_titles, self.model.wv))
+        series_vectors = normalize_rows(self.title_cache.vectors(series_titles, self.model.wv))
+        self.title_cache.flush()
+        if candidates is not None:
+            best_series, max_similarities = best_pair_per_row(
+                len(events_list),
+                candidates.rows,
+                candidates.cols,
+                pair_similarities(event_vectors, series_vectors, candidates.rows, candidates.cols),
+            )
+        elif series_index is None or len(series_list) == 0:
+            best_series, max_similarities = dense_best_match(event_vectors, series_vectors)
+        else:
+            series_index.fit(series_vectors)
+            best_series, max_similarities = series_index.search(event_vectors)
 
-    def clean_string(self, title):
-        # Remove brackets and special characters using regular expressions
-        cleaned_title = re.sub(
-            r"[^\w\s]", "", title
-        )  # Keep only alphanumeric characters and spaces
-        return cleaned_title
+        rows = np.flatnonzero(max_similarities > self.best_threshold)
+        return rows, best_series[rows], max_similarities[rows]
@@ -6,6 +6,7 @@ from eventseries.src.main.dblp.dblp_context import DblpContext
 from eventseries.src.main.dblp.event_classes import DblpEvent, DblpEventSeries
 from eventseries.src.main.dblp.parsing import (
     dblp_event_from_html_content,
+    dblp_parents_from_html_content,
     dbpl_event_series_from_html_content,
 )
 from eventseries.src.main.repository.cached_online_context import CachedContext
@@ -14,6 +15,7 @@ from eventseries.src.main.repository.cached_online_context import CachedContext
 class DblpRepository(CachedContext):
     EVENTS = "events"
     EVENT_SERIES = "event_series"
+    PARENTS = "parents"
 
     def __init__(
         self,
@@ -30,15 +32,19 @@ class DblpRepository(CachedContext):
         self.event_series: Dict[str, DblpEventSeries] = self.cache.get(
             DblpRepository.EVENT_SERIES, {}
         )
+        # Parents of each event from its breadcrumbs, see dblp_parents_from_html_content.
+        self.parents: Dict[str, List[Dict[str, str]]] = self.cache.get(DblpRepository.PARENTS, {})
         self.matched: Dict[DblpEvent, DblpEventSeries] = {}
         # make sure that the cache tracks the objects and not the other way around
         self.cache[DblpRepository.EVENTS] = self.events
         self.cache[DblpRepository.EVENT_SERIES] = self.event_series
+        self.cache[DblpRepository.PARENTS] = self.parents
 
     def load_cached(self):
         super().load_cached()
         self.events = self.cache.get(DblpRepository.EVENTS, {})
         self.event_series = self.cache.get(DblpRepository.EVENT_SERIES, {})
+        self.parents = self.cache.get(DblpRepository.PARENTS, {})
 
     def load_cached_file(self, build_dict, file_path: Path):
         if file_path.stem in (DblpRepository.EVENTS, DblpRepository.EVENT_SERIES):
@@ -87,6 +93,21 @@ class DblpRepository(CachedContext):
 
         return self.event_series[dblp_id]
 
+    def get_or_load_parents(self, event_id: str) -> List[Dict[str, str]]:
+        """Parent series of the event, each a dictionary containing dblp_id and name as keys.
+        If the breadcrumbs name no parent the series is derived from the event id."""
+        if event_id not in self.parents:
+            if event_id.count("/") < 2:
+                raise ValueError("Expected an event id but got" + str(event_id))
+            html = self.ctx.request_or_load_dblp(dblp_db_entry=event_id)
+            parents = dblp_parents_from_html_content(html)
+            if not parents:
+                dblp_stem: str = "/".join(event_id.split("/")[:-1])  # remove the event from the id
+                parents = [{"dblp_id": dblp_stem, "name": dblp_stem.rsplit("/", maxsplit=1)[-1]}]
+            self.parents[event_id] = parents
+
+        return self.parents[event_id]
+
     def get_events_for_series(self, series_dblp_id: str) -> List[DblpEvent]:
         if not self.ctx.is_cached(series_dblp_id):
             self.ctx.request_or_load_dblp(series_dblp_id)
@@ -0,0 +1,23 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(target: Path, mode: str = "wb") -> Iterator[IO]:
+    """Open a temporary file next to target that replaces target once the block completes.
+    An interrupted write keeps the previous file and concurrent writers each replace it whole.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary_name = tempfile.mkstemp(
+        dir=target.parent, prefix=target.name + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+        os.replace(temporary_name, target)
+    finally:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
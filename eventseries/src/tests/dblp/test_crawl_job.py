@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from importlib import resources as ires
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from eventseries.src.main.dblp.crawl_job import CrawlJob, CrawlState
+from eventseries.src.main.dblp.dblp_context import DblpContext
+from eventseries.src.main.dblp.scraper import DblpScraper
+
+
+class TestCrawlJob(unittest.TestCase):
+    test_event = ires.files("eventseries.src.tests") / "resources" / "event.html"
+    test_event_series = ires.files("eventseries.src.tests") / "resources" / "event_series.html"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.job_file = self.tmp_path / "job.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_stored_job_resumes_pending_ids(self):
+        job = CrawlJob(["conf/a/a1", "conf/a/a2"], job_file=self.job_file)
+        job.mark_fetched("conf/a/a1", [{"dblp_id": "conf/a", "name": "A"}])
+        job.store()
+
+        resumed = CrawlJob(["conf/a/a1", "conf/a/a2", "conf/b/b1"], job_file=self.job_file)
+        self.assertEqual(["conf/a/a2", "conf/b/b1"], resumed.pending())
+        self.assertEqual(
+            {"conf/a/a1": [{"dblp_id": "conf/a", "name": "A"}]}, resumed.event_to_series()
+        )
+
+    def test_failed_ids_are_retried_until_max_attempts(self):
+        job = CrawlJob(["conf/a/a1"], max_attempts=2)
+        job.mark_failed("conf/a/a1", "timeout")
+        self.assertEqual(["conf/a/a1"], job.pending())
+        job.mark_failed("conf/a/a1", "timeout")
+        self.assertEqual([], job.pending())
+        self.assertEqual(CrawlState.FAILED, job.entries["conf/a/a1"].state)
+        self.assertEqual("timeout", job.entries["conf/a/a1"].error)
+
+    def test_crawl_events_records_failures(self):
+        conf_path = self.tmp_path / "conf"
+        conf_path.mkdir()
+        ctx = DblpContext(cache_file_path=conf_path, load_cache=False)
+        ctx.cache_dblp_id("conf/at/at2012", self.test_event.read_text())
+        ctx.cache_dblp_id("conf/at", self.test_event_series.read_text())
+        scraper = DblpScraper(ctx)
+        with patch.object(DblpContext, "request_dblp", side_effect=ValueError("offline")) as mock:
+            event_to_series = scraper.crawl_events(
+                ["conf/at/at2012", "conf/missing/m1"], job_file=self.job_file, max_attempts=2
+            )
+        self.assertEqual(
+            {"conf/at/at2012": [{"name": "AT", "dblp_id": "conf/at"}]}, event_to_series
+        )
+        self.assertEqual(2, mock.call_count)
+
+        resumed = CrawlJob(["conf/at/at2012", "conf/missing/m1"], job_file=self.job_file)
+        self.assertEqual(CrawlState.FAILED, resumed.entries["conf/missing/m1"].state)
+        self.assertEqual(2, resumed.entries["conf/missing/m1"].attempts)
+
+    def test_crawl_events_records_parents_of_failed_parent_requests(self):
+        conf_path = self.tmp_path / "conf"
+        conf_path.mkdir()
+        ctx = DblpContext(cache_file_path=conf_path, load_cache=False)
+        ctx.cache_dblp_id("conf/at/at2012", self.test_event.read_text())
+        scraper = DblpScraper(ctx)
+        with patch.object(
+            DblpContext, "request_dblp", side_effect=requests.ConnectionError("reset")
+        ):
+            event_to_series = scraper.crawl_events(
+                ["conf/at/at2012", "conf/missing/m1"], job_file=self.job_file, max_attempts=1
+            )
+        self.assertEqual(
+            {"conf/at/at2012": [{"name": "AT", "dblp_id": "conf/at"}]}, event_to_series
+        )
+        entries = CrawlJob([], job_file=self.job_file).entries
+        self.assertEqual(CrawlState.FETCHED, entries["conf/at/at2012"].state)
+        self.assertEqual("conf/at: reset", entries["conf/at/at2012"].error)
+        self.assertEqual(CrawlState.FAILED, entries["conf/missing/m1"].state)
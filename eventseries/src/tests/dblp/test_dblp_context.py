@@ -1,5 +1,7 @@
 import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 from unittest.mock import patch, Mock
@@ -218,6 +220,83 @@ class TestDblpContext(unittest.TestCase):
         del dblp_context
         mocked_store.assert_called_once()
 
+    @patch("time.sleep")
+    @patch("requests.get")
+    def test_request_dblp_waits_remaining_timeout(self, mock_get, mock_sleep):
+        mock_response = Mock(spec=Response)
+        mock_response.status_code = 200
+        mock_response.text = "Mocked response text"
+        mock_get.return_value = mock_response
+        self.dblp_context.dblp_timeout_ns = 10_000_000_000
+        self.dblp_context.last_request_time_ns = time.time_ns()
+
+        self.dblp_context.request_dblp("https://dblp.org/db/conf/test")
+
+        waited = mock_sleep.call_args[0][0]
+        self.assertTrue(9 < waited <= 10)
+
+    @patch("eventseries.src.main.dblp.dblp_context.DblpContext.request_dblp")
+    def test_request_or_load_dblp_records_redirect(self, mock_request_dblp):
+        redirect_page = (
+            '<html><body><div id="main"><p>Redirecting ... '
+            '<a href="https://dblp.org/db/conf/new/index.html">new</a></p></div></body></html>'
+        )
+        mock_request_dblp.side_effect = [redirect_page, "content"]
+
+        self.assertEqual("content", self.dblp_context.request_or_load_dblp("conf/old"))
+
+        self.assertEqual("conf/new", self.dblp_context.canonical_id("conf/old"))
+        self.assertTrue(self.dblp_context.is_cached("conf/old"))
+        self.assertEqual("content", self.dblp_context.get_cached("conf/old"))
+        # The content is only cached once, under the id of the target.
+        self.assertEqual({"conf/new": "content"}, self.dblp_context.dblp_cache)
+
+        self.dblp_context.store_cache()
+        fresh_context = DblpContext(cache_file_path=self.test_cache_path)
+        self.assertEqual("conf/new", fresh_context.canonical_id("conf/old"))
+
+    @patch("eventseries.src.main.dblp.dblp_context.DblpContext.request_dblp")
+    def test_request_or_load_dblp_records_concurrent_redirects(self, mock_request_dblp):
+        def request_dblp(dblp_url, **kwargs):
+            if "/old" not in dblp_url:
+                return "content " + dblp_url
+            new_url = dblp_url.replace("/old", "/new")
+            return (
+                '<html><body><div id="main"><p>Redirecting ... '
+                f'<a href="{new_url}/index.html">new</a></p></div></body></html>'
+            )
+
+        mock_request_dblp.side_effect = request_dblp
+        # Many existing redirects make every add_redirect iterate a large map.
+        self.dblp_context.redirects = {f"conf/gone{i}": f"conf/kept{i}" for i in range(5000)}
+        old_ids = [f"conf/old{i}" for i in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(self.dblp_context.request_or_load_dblp, old_ids))
+
+        for old_id in old_ids:
+            new_id = old_id.replace("/old", "/new")
+            self.assertEqual(new_id, self.dblp_context.canonical_id(old_id))
+            self.assertTrue(self.dblp_context.get_cached(old_id).startswith("content"))
+        self.assertEqual(5200, len(self.dblp_context.redirects))
+
+    def test_load_cache_drops_stale_redirect_pages(self):
+        conf_path = Path(self.tmp_dir_parent.name) / "conf"
+        (conf_path / "old").mkdir(parents=True)
+        (conf_path / "new").mkdir()
+        (conf_path / "old.html").write_text("redirect page")
+        (conf_path / "old" / "old2020.html").write_text("event redirect page")
+        (conf_path / "new.html").write_text("series content")
+        (conf_path / "new" / "new2020.html").write_text("event content")
+        (conf_path / DblpContext.REDIRECTS_FILE).write_text(
+            '{"conf/old": "conf/new", "conf/old/old2020": "conf/new/new2020"}'
+        )
+
+        context = DblpContext(cache_file_path=conf_path)
+
+        self.assertEqual(["conf/new"], context.get_cached_series_keys())
+        self.assertEqual(["conf/new/new2020"], context.get_events_for_series("conf/new"))
+        self.assertEqual("series content", context.get_cached("conf/old"))
+
 
 if __name__ == "__main__":
     unittest.main()
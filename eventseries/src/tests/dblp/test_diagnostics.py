@@ -0,0 +1,72 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from eventseries.src.main.dblp import diagnostics
+from eventseries.src.main.dblp.diagnostics import PARSE_DIAGNOSTICS, ParseDiagnostics
+from eventseries.src.main.dblp.parsing import EventTitleParser
+
+
+class TestParseDiagnostics(unittest.TestCase):
+    def test_counts_codes_and_keeps_first_samples(self):
+        collector = ParseDiagnostics(max_samples=2)
+        for title in ["a", "b", "c"]:
+            collector.record(diagnostics.MISSING_YEAR, title)
+        collector.record(diagnostics.LONG_ABBREVIATION, "conf/x", "VERYLONGABBREVIATION")
+        self.assertEqual(
+            {
+                diagnostics.MISSING_YEAR: {"count": 3, "samples": ["a", "b"]},
+                diagnostics.LONG_ABBREVIATION: {
+                    "count": 1,
+                    "samples": ["conf/x: VERYLONGABBREVIATION"],
+                },
+            },
+            collector.report(),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            report_file = Path(directory) / "report.json"
+            collector.write_report(report_file)
+            with report_file.open("r") as file:
+                self.assertEqual(collector.report(), json.load(file))
+
+        collector.reset()
+        self.assertEqual({}, collector.report())
+
+    def test_disabled_collector_records_nothing(self):
+        collector = ParseDiagnostics(enabled=False)
+        collector.record(diagnostics.MISSING_YEAR, "a")
+        self.assertEqual({}, collector.report())
+
+    def test_title_parser_records_diagnostics(self):
+        PARSE_DIAGNOSTICS.reset()
+        self.addCleanup(PARSE_DIAGNOSTICS.reset)
+        EventTitleParser.parse_title("Workshop Without Year; Somewhere")
+        self.assertEqual(
+            {
+                diagnostics.MISSING_COLON: ["Workshop Without Year; Somewhere"],
+                diagnostics.SEMICOLON_SEPARATOR: ["Workshop Without Year; Somewhere"],
+                diagnostics.MISSING_YEAR: ["Workshop Without Year"],
+            },
+            {code: entry["samples"] for code, entry in PARSE_DIAGNOSTICS.report().items()},
+        )
+
+    def test_memoized_titles_are_reported_in_every_run(self):
+        title = "Workshop On Memoized Titles"
+        self.addCleanup(setattr, PARSE_DIAGNOSTICS, "enabled", True)
+        self.addCleanup(PARSE_DIAGNOSTICS.reset)
+        PARSE_DIAGNOSTICS.enabled = False
+        EventTitleParser.parse_title(title)
+        PARSE_DIAGNOSTICS.enabled = True
+        for _ in range(2):
+            PARSE_DIAGNOSTICS.reset()
+            EventTitleParser.parse_title(title)
+            EventTitleParser.parse_title(title)
+            self.assertEqual(
+                {"count": 2, "samples": [title] * 2},
+                PARSE_DIAGNOSTICS.report()[diagnostics.MISSING_COLON],
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from eventseries.src.main.dblp.parsing import EventTitleParser, ParsedTitle
+
+
+class TestEventTitleParser(unittest.TestCase):
+    def test_parse_title_with_location(self):
+        self.assertEqual(
+            ParsedTitle("1. AT 2012", "Dubrovnik, Croatia", False, 2012, 1),
+            EventTitleParser.parse_title("1. AT 2012: Dubrovnik, Croatia"),
+        )
+
+    def test_parse_virtual_title(self):
+        self.assertEqual(
+            ParsedTitle("12th ESWC 2021", "[virtual event]", True, 2021, 12),
+            EventTitleParser.parse_title("12th ESWC 2021 [virtual event]"),
+        )
+
+    def test_parse_title_with_semicolon(self):
+        parsed = EventTitleParser.parse_title("AT 2013; Valencia, Spain")
+        self.assertEqual("AT 2013", parsed.title)
+        self.assertEqual("Valencia, Spain", parsed.location)
+        self.assertIsNone(parsed.ordinal)
+
+    def test_parse_title_is_memoized(self):
+        EventTitleParser._parse_title_cached.cache_clear()
+        EventTitleParser.parse_title("AT 2014: Madrid, Spain")
+        EventTitleParser.parse_title("AT 2014: Madrid, Spain")
+        self.assertEqual(1, EventTitleParser._parse_title_cached.cache_info().hits)
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from eventseries.src.main.dblp.dblp_context import DblpContext
+from eventseries.src.main.dblp.scraper import DblpScraper
+
+
+def index_page(venues, next_pos=None):
+    items = "".join(
+        f'<li><a href="https://dblp.org/db/conf/{venue}/index.html">{venue}</a></li>'
+        for venue in venues
+    )
+    navigation = (
+        f'<a href="https://dblp.org/db/conf/?pos={next_pos}">[next 100 entries]</a>'
+        if next_pos is not None
+        else ""
+    )
+    return (
+        '<html><body><div id="browse-conf-output">'
+        f'<p><a href="https://dblp.org/db/conf/">[first 100 entries]</a>{navigation}</p>'
+        f"<ul>{items}</ul></div></body></html>"
+    )
+
+
+class TestDblpScraper(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        conf_path = Path(self.tmp_dir.name) / "conf"
+        conf_path.mkdir()
+        self.ctx = DblpContext(cache_file_path=conf_path, load_cache=False, dblp_timeout_ns=0)
+        self.scraper = DblpScraper(self.ctx)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_crawl_conf_index_follows_next_pages(self):
+        pages = {
+            "https://dblp.org/db/conf/": index_page(["aaai", "eswc"], next_pos=101),
+            "https://dblp.org/db/conf/?pos=101": index_page(["iswc"]),
+        }
+
+        def request_dblp(dblp_url, **kwargs):
+            return pages.get(dblp_url, "venue " + dblp_url)
+
+        with patch.object(DblpContext, "request_dblp", side_effect=request_dblp):
+            self.scraper.crawl_conf_index("https://dblp.org/db/conf/", max_workers=2)
+
+        for venue in ["aaai", "eswc", "iswc"]:
+            self.assertTrue(self.ctx.is_cached("conf/" + venue))
+
+    def test_scrape_conf_index_without_next_page(self):
+        with patch.object(DblpContext, "request_dblp", return_value=index_page(["aaai"])):
+            links, next_link = self.scraper.scrape_conf_index("https://dblp.org/db/conf/")
+        self.assertEqual(["https://dblp.org/db/conf/aaai/index.html"], links)
+        self.assertIsNone(next_link)
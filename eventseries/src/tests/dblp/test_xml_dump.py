@@ -0,0 +1,61 @@
+import gzip
+import tempfile
+import unittest
+from pathlib import Path
+
+from eventseries.src.main.dblp.xml_dump import iter_dump_records, read_dblp_dump
+
+DUMP = """<?xml version="1.0" encoding="ISO-8859-1"?>
+<!DOCTYPE dblp SYSTEM "dblp.dtd">
+<dblp>
+<article key="journals/ai/Smith19"><title>An Article</title><year>2019</year></article>
+<proceedings key="conf/esws/2019">
+<title>The Semantic Web - ESWC 2019, Portoro&zcaron;, Slovenia</title>
+<booktitle>ESWC</booktitle><year>2019</year><url>db/conf/esws/eswc2019.html</url>
+</proceedings>
+<proceedings key="conf/esws/2019-2">
+<title>The Semantic Web - 16th International Conference, ESWC 2019, Volume 2</title>
+<booktitle>ESWC</booktitle><year>2019</year><url>db/conf/esws/eswc2019.html#2</url>
+</proceedings>
+<inproceedings key="conf/esws/Doe19">
+<title>A Paper</title><crossref>conf/esws/2019</crossref>
+</inproceedings>
+<proceedings key="conf/semweb/2020">
+<title>2nd Workshop on Linked Data at M&uuml;nchen</title>
+<booktitle>LD@SW</booktitle><year>2020</year><url>db/conf/semweb/ld2020.html</url>
+</proceedings>
+</dblp>
+"""
+
+
+class TestXmlDump(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dump_path = Path(self.tmp_dir.name) / "dblp.xml.gz"
+        with gzip.open(self.dump_path, "wb") as dump:
+            dump.write(DUMP.encode("iso-8859-1", errors="strict"))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_records_are_streamed_with_entities(self):
+        titles = [
+            "".join(record.find("title").itertext())
+            for record in iter_dump_records(self.dump_path, tags=("proceedings", "article"))
+        ]
+        self.assertEqual(4, len(titles))
+        self.assertEqual("An Article", titles[0])
+        self.assertIn("München", titles[3])
+
+    def test_read_dblp_dump(self):
+        dump = read_dblp_dump(self.dump_path)
+        self.assertEqual(["conf/esws/eswc2019", "conf/semweb/ld2020"], list(dump.events))
+        event = dump.events["conf/semweb/ld2020"]
+        self.assertEqual(2020, event.year)
+        self.assertEqual(2, event.ordinal)
+        self.assertEqual(
+            [{"dblp_id": "conf/esws", "name": "ESWC"}], dump.parents["conf/esws/eswc2019"]
+        )
+        series = dump.event_series["conf/esws"]
+        self.assertEqual("ESWC", series.abbreviation)
+        self.assertEqual(1, len(series.mentioned_events))
@@ -0,0 +1,69 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from eventseries.src.main.matcher.ann_index import IvfIndex
+from eventseries.src.main.matcher.similarity import dense_best_match, normalize_rows
+
+
+class TestIvfIndex(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_file = Path(self.temp_dir.name) / "models" / "index.npz"
+        rng = np.random.default_rng(3)
+        centers = rng.normal(size=(8, 16))
+        self.vectors = normalize_rows(
+            np.repeat(centers, 25, axis=0) + 0.1 * rng.normal(size=(200, 16))
+        )
+        self.queries = normalize_rows(
+            np.repeat(centers, 5, axis=0) + 0.1 * rng.normal(size=(40, 16))
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_probing_all_lists_is_exact(self):
+        index = IvfIndex(index_file=None, n_lists=8)
+        index.fit(self.vectors)
+        best, similarities = index.search(self.queries, n_probe=8)
+        expected_best, expected_similarities = dense_best_match(self.queries, self.vectors)
+        self.assertEqual(list(expected_best), list(best))
+        np.testing.assert_allclose(expected_similarities, similarities, atol=1e-6)
+
+    def test_recall_with_few_probes(self):
+        index = IvfIndex(index_file=None, n_lists=8, n_probe=2)
+        index.fit(self.vectors)
+        best, _ = index.search(self.queries)
+        expected_best, _ = dense_best_match(self.queries, self.vectors)
+        self.assertGreaterEqual(np.mean(best == expected_best), 0.9)
+
+    def test_persisted_index_is_reused(self):
+        IvfIndex(index_file=self.index_file).fit(self.vectors)
+        self.assertTrue(self.index_file.is_file())
+        loaded = IvfIndex(index_file=self.index_file)
+        self.assertTrue(loaded.is_fitted())
+        self.assertFalse(loaded.fit(self.vectors))
+        self.assertTrue(loaded.fit(self.vectors[:100]))
+
+    def test_index_with_other_list_count_is_refitted(self):
+        IvfIndex(index_file=self.index_file, n_lists=4).fit(self.vectors)
+        self.assertFalse(IvfIndex(index_file=self.index_file, n_lists=4).fit(self.vectors))
+        other = IvfIndex(index_file=self.index_file, n_lists=8)
+        self.assertTrue(other.fit(self.vectors))
+        self.assertEqual(9, len(other.list_offsets))
+
+    def test_unreadable_index_is_refitted(self):
+        IvfIndex(index_file=self.index_file).fit(self.vectors)
+        for length in (2, 100):
+            self.index_file.write_bytes(self.index_file.read_bytes()[:length])
+            with self.assertLogs(level="WARNING"):
+                index = IvfIndex(index_file=self.index_file)
+            self.assertFalse(index.is_fitted())
+            self.assertTrue(index.fit(self.vectors))
+        self.assertTrue(IvfIndex(index_file=self.index_file).is_fitted())
+
+    def test_search_unfitted(self):
+        with self.assertRaises(ValueError):
+            IvfIndex(index_file=None).search(self.queries)
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+import numpy as np
+
+from eventseries.src.main.matcher.blocking import Blocker
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+    WikiDataEventType,
+)
+
+
+class TestBlocking(TestCase):
+    def test_candidate_pairs(self):
+        events = [
+            WikiDataEvent(qid=QID("Q1"), label="ESWC 2019", acronym="ESWC 2019"),
+            WikiDataEvent(
+                qid=QID("Q2"),
+                label="1st Workshop on Semantic Parsing",
+                type=WikiDataEventType.WORKSHOP,
+            ),
+            WikiDataEvent(qid=QID("Q3"), label="Unrelated Meeting"),
+        ]
+        series = [
+            WikiDataEventSeries(
+                qid=QID("Q10"), label="Extended Semantic Web Conference (ESWC)"
+            ),
+            WikiDataEventSeries(
+                qid=QID("Q11"),
+                label="Conference on Semantic Parsing",
+                type=WikiDataEventType.CONFERENCE,
+            ),
+            WikiDataEventSeries(qid=QID("Q12"), label="Workshop on Parsing"),
+        ]
+        candidates = Blocker().candidate_pairs(events, series)
+        # The workshop shares words with both series, but Q11 is a conference.
+        self.assertEqual([(0, 0), (1, 0), (1, 2)], list(zip(candidates.rows, candidates.cols)))
+        self.assertEqual([0, 2], list(candidates.series_of(1)))
+        self.assertEqual([True, False], list(candidates.contains([0, 2], [0, 1])))
+
+        restricted = candidates.restrict([1, 2])
+        self.assertEqual([0, 0], list(restricted.rows))
+        self.assertEqual((2, 3), restricted.shape)
+
+    def test_common_tokens_are_ignored(self):
+        events = [WikiDataEvent(qid=QID("Q1"), label="Semantic Conference")]
+        series = [
+            WikiDataEventSeries(qid=QID(f"Q{10 + i}"), label=f"Conference on {topic}")
+            for i, topic in enumerate(["Semantics", "Parsing", "Semantic Parsing"])
+        ]
+        candidates = Blocker(max_series_per_token=2).candidate_pairs(events, series)
+        np.testing.assert_array_equal([2], candidates.cols)
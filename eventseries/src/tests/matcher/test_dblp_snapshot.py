@@ -0,0 +1,115 @@
+import pickle
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from eventseries.src.main.dblp.venue_information import (
+    HasPart,
+    NameWithOptionalReference,
+    YearRange,
+)
+from eventseries.src.main.matcher.dblp_snapshot import (
+    DblpMatchingSnapshot,
+    MappedDblpSnapshot,
+    SeriesFinding,
+    SeriesKind,
+    SnapshotEvent,
+    SnapshotParent,
+    find_series,
+)
+from eventseries.src.main.repository.wikidata_dataclasses import WikiDataEventType
+
+
+class TestDblpMatchingSnapshot(TestCase):
+    def setUp(self) -> None:
+        self.snapshot = DblpMatchingSnapshot(
+            events={
+                "conf/esws/eswc2019": SnapshotEvent(
+                    "ESWC 2019", 2019, WikiDataEventType.CONFERENCE
+                ),
+                "conf/esws/ld2019": SnapshotEvent("LD@ESWC 2019", 2019, WikiDataEventType.WORKSHOP),
+                "conf/esws/ld2010": SnapshotEvent("LD@ESWC 2010", 2010, WikiDataEventType.WORKSHOP),
+                "conf/semweb/sw2019": SnapshotEvent("SW 2019", 2019, WikiDataEventType.WORKSHOP),
+            },
+            parents={
+                "conf/esws/eswc2019": [SnapshotParent("conf/esws", "ESWC")],
+                "conf/esws/ld2019": [SnapshotParent("conf/esws", "ESWC")],
+                "conf/esws/ld2010": [SnapshotParent("conf/esws", "ESWC")],
+                "conf/semweb/sw2019": [SnapshotParent("conf/semweb", "SW")],
+            },
+            series_names={
+                "conf/esws": "Extended Semantic Web Conference",
+                "conf/semweb": "Semantic Web Workshop",
+            },
+            has_parts={
+                "conf/esws": [
+                    HasPart(
+                        NameWithOptionalReference("LD: Linked Data Workshop"),
+                        YearRange([], since=2015),
+                    )
+                ],
+                "conf/semweb": [],
+            },
+        )
+
+    def test_conference_is_matched_to_its_parent(self):
+        self.assertEqual(
+            SeriesFinding(
+                "conf/esws/eswc2019",
+                "conf/esws",
+                "Extended Semantic Web Conference",
+                "DblpMatcher::_find_series_for_conference",
+            ),
+            find_series(self.snapshot, "conf/esws/eswc2019"),
+        )
+
+    def test_workshop_is_matched_to_workshop_parent(self):
+        finding = find_series(self.snapshot, "conf/semweb/sw2019")
+        self.assertEqual("conf/semweb", finding.series_id)
+
+    def test_workshop_is_matched_through_venue_information(self):
+        finding = find_series(self.snapshot, "conf/esws/ld2019")
+        self.assertIsNone(finding.series_id)
+        self.assertEqual("LD: Linked Data Workshop", finding.series_name)
+        # The has_part is only defined since 2015.
+        self.assertIsNone(find_series(self.snapshot, "conf/esws/ld2010"))
+
+    def test_series_are_classified_once(self):
+        self.assertEqual(SeriesKind(False, True), self.snapshot.get_series_kind("conf/esws"))
+        self.assertEqual(SeriesKind(True, False), self.snapshot.get_series_kind("conf/semweb"))
+        indexed = self.snapshot.get_indexed_has_parts("conf/esws")
+        self.assertEqual(["ld: linked data workshop"], [item.lowercase_name for item in indexed])
+
+
+class TestMappedDblpSnapshot(TestDblpMatchingSnapshot):
+    """Runs the matching tests against the exported snapshot."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot = MappedDblpSnapshot.export(self.snapshot, Path(self.temp_dir.name))
+
+    def tearDown(self) -> None:
+        # Release the memory maps before the files are removed.
+        del self.snapshot
+        self.temp_dir.cleanup()
+
+    def test_accessors_round_trip(self):
+        self.assertEqual(
+            ["conf/esws/eswc2019", "conf/esws/ld2010", "conf/esws/ld2019", "conf/semweb/sw2019"],
+            self.snapshot.event_ids(),
+        )
+        self.assertEqual(
+            SnapshotEvent("LD@ESWC 2010", 2010, WikiDataEventType.WORKSHOP),
+            self.snapshot.get_event("conf/esws/ld2010"),
+        )
+        has_part = self.snapshot.get_has_parts("conf/esws")[0]
+        self.assertEqual("LD: Linked Data Workshop", has_part.part.name)
+        self.assertEqual(2015, has_part.years.since)
+        self.assertIsNone(has_part.years.until)
+        self.assertRaises(KeyError, self.snapshot.get_event, "conf/unknown/event")
+
+    def test_pickle_only_transfers_directory(self):
+        unpickled = pickle.loads(pickle.dumps(self.snapshot))
+        self.assertEqual(self.snapshot.directory, unpickled.directory)
+        self.assertEqual("Semantic Web Workshop", unpickled.get_series_name("conf/semweb"))
@@ -0,0 +1,41 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from eventseries.src.main.matcher import embedding_store
+
+
+class TestEmbeddingStore(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store_dir = Path(self.temp_dir.name) / "embeddings"
+        self.vectors = KeyedVectors(vector_size=10)
+        self.vectors.add_vectors(
+            [f"word{i}" for i in range(100)],
+            np.random.default_rng(0).random((100, 10), dtype=np.float32),
+        )
+
+    def tearDown(self) -> None:
+        embedding_store._loaded_embeddings.clear()
+        self.temp_dir.cleanup()
+
+    def test_converted_once_and_shared(self):
+        with patch.object(embedding_store.api, "load", return_value=self.vectors) as mocked_load:
+            first = embedding_store.load_embeddings("test-vectors", self.store_dir)
+            second = embedding_store.load_embeddings("test-vectors", self.store_dir)
+            mocked_load.assert_called_once_with("test-vectors")
+        self.assertIs(first, second)
+        self.assertIsInstance(first.vectors, np.memmap)
+        self.assertTrue(embedding_store.embedding_file("test-vectors", self.store_dir).is_file())
+        np.testing.assert_array_equal(self.vectors["word42"], first["word42"])
+
+    def test_reload_without_download(self):
+        with patch.object(embedding_store.api, "load", return_value=self.vectors):
+            embedding_store.convert_embeddings("test-vectors", self.store_dir)
+        with patch.object(embedding_store.api, "load") as mocked_load:
+            embedding_store.load_embeddings("test-vectors", self.store_dir)
+            mocked_load.assert_not_called()
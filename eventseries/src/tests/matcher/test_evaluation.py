@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from eventseries.src.main.matcher.evaluation import GoldStandard, NO_MATCH, UNKNOWN_SERIES
+
+
+class TestGoldStandard(TestCase):
+    def setUp(self) -> None:
+        self.matches_df = pd.DataFrame(
+            {
+                "event": ["1st Conf A", "2nd Conf A", "Workshop B 2020", "1st Conf A"],
+                "series": ["Conf A", "Conf A", "Workshop B", "Other"],
+            }
+        )
+        self.gold_standard = GoldStandard(self.matches_df)
+
+    def test_labels(self):
+        self.assertEqual([0, 0, 1, 2], list(self.gold_standard.row_labels))
+        # Duplicated events expect the series of their first occurrence.
+        self.assertEqual(0, self.gold_standard.label_by_event["1st Conf A"])
+        self.assertEqual(
+            [1, UNKNOWN_SERIES, NO_MATCH],
+            list(self.gold_standard.encode_series(["Workshop B", "Unknown", None])),
+        )
+
+    def test_evaluate_titles(self):
+        statistics = self.gold_standard.evaluate_titles(
+            ["1st Conf A", "2nd Conf A", "Workshop B 2020"], ["Conf A", "Workshop B", None]
+        )
+        self.assertEqual(1, statistics.true_positives)
+        self.assertEqual(1, statistics.false_positives)
+        self.assertEqual(2, statistics.false_negatives)
+        self.assertAlmostEqual(0.5, statistics.precision)
+        self.assertAlmostEqual(1 / 3, statistics.recall)
+        self.assertAlmostEqual(0.4, statistics.f1_score)
+
+    def test_evaluate_unknown_is_never_correct(self):
+        statistics = self.gold_standard.evaluate(
+            predicted=np.array([UNKNOWN_SERIES]), expected=np.array([UNKNOWN_SERIES])
+        )
+        self.assertEqual(0, statistics.true_positives)
+        self.assertEqual(1, statistics.false_positives)
+
+    def test_no_matches(self):
+        statistics = self.gold_standard.evaluate(np.array([], dtype=int), np.array([], dtype=int))
+        self.assertEqual(0.0, statistics.precision)
+        self.assertEqual(0.0, statistics.f1_score)
+        self.assertEqual(4, statistics.false_negatives)
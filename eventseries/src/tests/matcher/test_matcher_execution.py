@@ -0,0 +1,55 @@
+import time
+from typing import List
+from unittest import TestCase
+
+import pandas as pd
+
+from eventseries.src.main.matcher.matcher_execution import MatcherExecutor
+from eventseries.src.main.repository.completions import FullMatch
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+
+def match_first(train_test_set: pd.DataFrame, events, series) -> List[FullMatch]:
+    train_test_set.dropna(inplace=True)
+    return [FullMatch(event=events[0], series=series[0], found_by="first")]
+
+
+def fail(train_test_set: pd.DataFrame, events, series) -> List[FullMatch]:
+    raise RuntimeError("Matcher failed")
+
+
+def sleep(train_test_set: pd.DataFrame, events, series) -> List[FullMatch]:
+    time.sleep(30)
+    return []
+
+
+class TestMatcherExecutor(TestCase):
+    def setUp(self) -> None:
+        self.train_test_set = pd.DataFrame({"event": ["a", None], "series": ["b", "c"]})
+        self.events = [WikiDataEvent(qid=QID("Q1"), label="Event", title="Event")]
+        self.series = [WikiDataEventSeries(qid=QID("Q2"), label="Series", title="Series")]
+
+    def run_tasks(self, executor: MatcherExecutor, tasks) -> dict:
+        return dict(executor.run(tasks, self.train_test_set, self.events, self.series))
+
+    def test_failures_are_isolated(self):
+        for processes in [0, 2]:
+            results = self.run_tasks(
+                MatcherExecutor(processes=processes), {"first": match_first, "fail": fail}
+            )
+            self.assertEqual(["first"], list(results.keys()))
+            self.assertEqual(self.series[0], results["first"][0].series)
+        # Every task works on a copy of the training set.
+        self.assertEqual(2, len(self.train_test_set))
+
+    def test_timeout(self):
+        started = time.monotonic()
+        results = self.run_tasks(
+            MatcherExecutor(timeouts={"sleep": 0.5}), {"sleep": sleep, "first": match_first}
+        )
+        self.assertEqual(["first"], list(results.keys()))
+        self.assertLess(time.monotonic() - started, 10)
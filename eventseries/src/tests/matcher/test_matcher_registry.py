@@ -0,0 +1,93 @@
+from typing import List
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from eventseries.src.main.matcher.ann_index import IvfIndex
+from eventseries.src.main.matcher.blocking import CandidatePairs
+from eventseries.src.main.matcher.matcher_registry import (
+    BatchMatcher,
+    Word2VecBatchMatcher,
+    registered_matchers,
+    run_batch_matcher,
+)
+from eventseries.src.main.repository.completions import FullMatch
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+
+class SameTitleMatcher(BatchMatcher):
+    batches: List[int] = []
+
+    def fit(self, train_test_set: pd.DataFrame):
+        pass
+
+    def match_batch(self, events, series, candidates=None, features=None) -> List[FullMatch]:
+        SameTitleMatcher.batches.append(len(events))
+        return [
+            FullMatch(event=event, series=event_series, found_by="SameTitleMatcher")
+            for event in events
+            for event_series in series
+            if event.title == event_series.title
+        ]
+
+
+class TestMatcherRegistry(TestCase):
+    def setUp(self) -> None:
+        self.events = [
+            WikiDataEvent(qid=QID(f"Q{i}"), label=title, title=title)
+            for i, title in enumerate(["A", "B", "C"])
+        ]
+        self.series = [
+            WikiDataEventSeries(qid=QID(f"Q{10 + i}"), label=title, title=title)
+            for i, title in enumerate(["C", "A"])
+        ]
+
+    def test_registered_matchers(self):
+        names = [registration.name for registration in registered_matchers(["word2vec", "tfidf"])]
+        self.assertEqual(["tfidf", "word2vec"], names)
+        fast = [registration.name for registration in registered_matchers(fast_only=True)]
+        self.assertNotIn("word2vec", fast)
+        self.assertIn("tfidf", fast)
+        with self.assertRaises(ValueError):
+            registered_matchers(["unknown"])
+
+    def test_run_in_batches(self):
+        SameTitleMatcher.batches = []
+        matches = run_batch_matcher(
+            SameTitleMatcher, 2, None, None, pd.DataFrame(), self.events, self.series
+        )
+        self.assertEqual([2, 1], SameTitleMatcher.batches)
+        self.assertEqual(["A", "C"], [match.event.title for match in matches])
+
+    def test_default_scores(self):
+        rows, cols, scores = SameTitleMatcher().score_batch(self.events, self.series)
+        self.assertEqual([0, 2], list(rows))
+        self.assertEqual([1, 0], list(cols))
+        self.assertEqual([1, 1], list(scores))
+
+    def test_default_scores_of_candidates(self):
+        candidates = CandidatePairs(np.array([2]), np.array([0]), (3, 2))
+        rows, cols, _ = SameTitleMatcher().score_batch(self.events, self.series, candidates)
+        self.assertEqual([2], list(rows))
+        self.assertEqual([0], list(cols))
+
+    def test_word2vec_uses_ann_index_for_large_catalogues(self):
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+        for ann_min_series, expected in [(2, IvfIndex), (3, type(None)), (None, type(None))]:
+            matcher = Word2VecBatchMatcher(mock.Mock(), ann_min_series=ann_min_series)
+            for name in ["naive_matcher", "cbow_matcher", "skip_gram_matcher"]:
+                setattr(matcher, name, mock.Mock(**{"wikidata_scores.return_value": empty}))
+            matcher.score_batch(self.events, self.series)
+            for name in ["naive_matcher", "cbow_matcher", "skip_gram_matcher"]:
+                series_index = getattr(matcher, name).wikidata_scores.call_args.args[2]
+                self.assertIsInstance(series_index, expected)
+            # Every model gets its own index.
+            self.assertEqual(
+                3 if expected is IvfIndex else 0,
+                len({id(index) for index in matcher.series_indices.values()}),
+            )
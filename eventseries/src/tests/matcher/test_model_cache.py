@@ -0,0 +1,80 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from eventseries.src.main.matcher.model_cache import (
+    ModelCache,
+    fit_cached,
+    training_fingerprint,
+)
+from eventseries.src.main.matcher.tfidf_matcher import TfIdfMatch, TfIdfSeriesIndex
+
+
+class CountingMatcher:
+    def __init__(self) -> None:
+        self.fits = 0
+        self.best_threshold = None
+
+    def fit(self):
+        self.fits += 1
+        self.best_threshold = 0.7
+
+
+class TestModelCache(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.model_cache = ModelCache(Path(self.temp_dir.name) / "fitted")
+        self.matches_df = pd.DataFrame(
+            {
+                "event": ["1st Workshop on Linked Data", "ISWC 2020", "ECAI 2021"],
+                "series": ["Workshop on Linked Data", "ISWC", "ECAI"],
+            }
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_fingerprint(self):
+        fingerprint = training_fingerprint(self.matches_df, n=3)
+        self.assertEqual(fingerprint, training_fingerprint(self.matches_df.copy(), n=3))
+        self.assertNotEqual(fingerprint, training_fingerprint(self.matches_df, n=4))
+        self.assertNotEqual(fingerprint, training_fingerprint(self.matches_df.iloc[1:], n=3))
+
+    def test_fit_cached(self):
+        first = CountingMatcher()
+        self.assertFalse(fit_cached(self.model_cache, first, "a", ["best_threshold"], first.fit))
+        second = CountingMatcher()
+        self.assertTrue(fit_cached(self.model_cache, second, "a", ["best_threshold"], second.fit))
+        self.assertEqual((1, 0, 0.7), (first.fits, second.fits, second.best_threshold))
+
+        other = CountingMatcher()
+        self.assertFalse(fit_cached(self.model_cache, other, "b", ["best_threshold"], other.fit))
+        self.assertEqual(1, other.fits)
+
+    def test_unreadable_model_is_refitted(self):
+        first = CountingMatcher()
+        fit_cached(self.model_cache, first, "a", ["best_threshold"], first.fit)
+        model_file = self.model_cache.model_file("CountingMatcher", "a")
+        model_file.write_bytes(model_file.read_bytes()[:5])
+
+        second = CountingMatcher()
+        with self.assertLogs(level="WARNING"):
+            restored = fit_cached(self.model_cache, second, "a", ["best_threshold"], second.fit)
+        self.assertFalse(restored)
+        self.assertEqual(1, second.fits)
+        self.assertEqual({"best_threshold": 0.7}, self.model_cache.load("CountingMatcher", "a"))
+        self.assertEqual([model_file], list(model_file.parent.iterdir()))
+
+    def test_tfidf_match_is_restored(self):
+        fitted = TfIdfMatch(
+            self.matches_df.copy(), TfIdfSeriesIndex(index_file=None), self.model_cache
+        )
+        with mock.patch.object(TfIdfMatch, "fit") as fit:
+            restored = TfIdfMatch(
+                self.matches_df.copy(), TfIdfSeriesIndex(index_file=None), self.model_cache
+            )
+            fit.assert_not_called()
+        self.assertEqual(fitted.best_threshold, restored.best_threshold)
+        self.assertEqual(fitted.recall, restored.recall)
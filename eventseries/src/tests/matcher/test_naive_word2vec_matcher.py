@@ -0,0 +1,48 @@
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+
+from eventseries.src.main.matcher import title_cache
+from eventseries.src.main.matcher.naive_word2vec_matcher import NaiveWord2VecMatch
+from eventseries.src.main.matcher.title_cache import TitleCache
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+
+class TestNaiveWord2VecMatch(TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(title_cache.nltk, "word_tokenize", side_effect=str.split)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.title_cache = TitleCache(cache_file=None)
+        self.title_cache._stop_words = {"on", "the"}
+        series = ["Semantic Web", "Linked Data", "Machine Learning", "Computer Vision"]
+        self.matches_df = pd.DataFrame(
+            {
+                "event": [f"{title} {year}" for title in series for year in (2019, 2020)],
+                "series": [title for title in series for _ in (2019, 2020)],
+            }
+        )
+
+    def test_scores_are_limited_by_the_fitted_threshold(self):
+        matcher = NaiveWord2VecMatch(self.matches_df.copy(), title_cache=self.title_cache)
+        self.assertIn(matcher.best_threshold, NaiveWord2VecMatch.similarity_thresholds)
+
+        events = [
+            WikiDataEvent(qid=QID(f"Q{i}"), label=title, title=title)
+            for i, title in enumerate(["Semantic Web 2021", "Linked Vision", "Unknown Title"])
+        ]
+        series = [
+            WikiDataEventSeries(qid=QID(f"Q1{i}"), label=title, title=title)
+            for i, title in enumerate(["Semantic Web", "Linked Data"])
+        ]
+        rows, cols, similarities = matcher.wikidata_scores(events, series)
+        self.assertTrue(np.all(similarities >= matcher.best_threshold))
+        self.assertNotIn(2, rows)
+
+        matcher.best_threshold = 1.01
+        self.assertEqual(0, len(matcher.wikidata_scores(events, series)[0]))
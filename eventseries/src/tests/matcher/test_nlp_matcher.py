@@ -0,0 +1,87 @@
+from typing import List
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from eventseries.src.main.matcher.matcher_execution import MatcherExecutor
+from eventseries.src.main.matcher.matcher_registry import (
+    MATCHER_REGISTRY,
+    BatchMatcher,
+    MatcherRegistration,
+    register_matcher,
+)
+from eventseries.src.main.matcher.nlp_matcher import NlpMatcher
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+# Titles of the events each matcher was given, matchers run in this process.
+seen_titles: List[List[str]] = []
+
+
+class EqualTitleMatcher(BatchMatcher):
+    """Scores every event with the series of the same title."""
+
+    def fit(self, train_test_set: pd.DataFrame):
+        pass
+
+    def match_batch(self, events, series, candidates=None, features=None):
+        return []
+
+    def score_batch(self, events, series, candidates=None, features=None):
+        seen_titles.append([event.title for event in events])
+        series_cols = {event_series.title: col for col, event_series in enumerate(series)}
+        pairs = [
+            (row, series_cols[event.title])
+            for row, event in enumerate(events)
+            if event.title in series_cols
+        ]
+        rows = np.array([row for row, _ in pairs], dtype=np.int64)
+        cols = np.array([col for _, col in pairs], dtype=np.int64)
+        return rows, cols, np.ones(len(pairs))
+
+
+class TestNlpMatcherCascade(TestCase):
+    names = ["cheap_a", "cheap_b", "expensive"]
+
+    def setUp(self) -> None:
+        seen_titles.clear()
+        register_matcher(MatcherRegistration("cheap_a", EqualTitleMatcher, cost=1, fast=True))
+        register_matcher(MatcherRegistration("cheap_b", EqualTitleMatcher, cost=1, fast=True))
+        register_matcher(MatcherRegistration("expensive", EqualTitleMatcher, cost=9, fast=False))
+        self.events = [
+            WikiDataEvent(qid=QID("Q1"), label="a", title="Conference A"),
+            WikiDataEvent(qid=QID("Q2"), label="b", title="Workshop B"),
+        ]
+        self.series = [WikiDataEventSeries(qid=QID("Q3"), label="a", title="Conference A")]
+
+    def tearDown(self) -> None:
+        for name in self.names:
+            MATCHER_REGISTRY.pop(name, None)
+
+    def match(self, cascade: bool):
+        matcher = NlpMatcher(
+            pd.DataFrame(columns=["event", "series"]),
+            executor=MatcherExecutor(processes=0),
+            enabled_matchers=self.names,
+            # The expensive matcher alone can reach the threshold, so it is never skipped.
+            weights={"expensive": 2},
+            fusion_threshold=2,
+            cascade=cascade,
+        )
+        return matcher.match(self.events, self.series, additional_series=[])
+
+    def test_cascade_only_passes_unsettled_events(self):
+        matches = self.match(cascade=True)
+        self.assertEqual(1, len(matches))
+        self.assertEqual("cheap_a+cheap_b", matches[0].found_by)
+        # The first event was settled by the cheap matchers.
+        self.assertEqual([["Workshop B"]], seen_titles[2:])
+
+    def test_without_cascade_all_events_are_passed(self):
+        matches = self.match(cascade=False)
+        self.assertEqual(1, len(matches))
+        self.assertEqual(["Conference A", "Workshop B"], seen_titles[-1])
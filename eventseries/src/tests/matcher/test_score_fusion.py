@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+import numpy as np
+
+from eventseries.src.main.matcher.score_fusion import ScoreFusion
+
+
+def candidates(rows, cols, scores):
+    return np.array(rows), np.array(cols), np.array(scores, dtype=float)
+
+
+class TestScoreFusion(TestCase):
+    def test_weighted_sum(self):
+        fusion = ScoreFusion(3, 2, weights={"tfidf": 2.0}, threshold=2.5)
+        fusion.add("phrase", candidates([0, 1], [1, 0], [1, 1]))
+        # Duplicate pairs of a matcher only count with their best score.
+        fusion.add("tfidf", candidates([0, 1, 1], [1, 0, 0], [0.8, 0.5, 0.6]))
+        rows, cols, scores = fusion.accepted()
+        self.assertEqual([0], list(rows))
+        self.assertEqual([1], list(cols))
+        np.testing.assert_allclose([2.6], scores)
+        self.assertEqual({"phrase", "tfidf"}, fusion.found_by(0, 1))
+        self.assertEqual([True, False, False], list(fusion.settled_events()))
+
+    def test_is_decided(self):
+        fusion = ScoreFusion(2, 2, threshold=2.5)
+        fusion.add("phrase", candidates([0], [0], [1]))
+        self.assertFalse(fusion.is_decided(["acronym", "ngram"]))
+        fusion.add("acronym", candidates([0], [0], [1]))
+        # Only the pair (0, 0) can still reach the threshold.
+        self.assertFalse(fusion.is_decided(["ngram"]))
+        fusion.add("ngram", candidates([0], [0], [0.6]))
+        self.assertTrue(fusion.is_decided(["tfidf"]))
+        self.assertTrue(fusion.is_decided([]))
+
+    def test_negative_weight(self):
+        with self.assertRaises(ValueError):
+            ScoreFusion(1, 1, weights={"phrase": -1})
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from eventseries.src.main.matcher.series_resolver import (
+    SubstringAutomaton,
+    WikidataSeriesResolver,
+)
+from eventseries.src.main.repository.wikidata_dataclasses import QID, WikiDataEventSeries
+
+
+class TestSubstringAutomaton(TestCase):
+    def test_find_returns_smallest_index(self):
+        automaton = SubstringAutomaton()
+        for index, text in enumerate(["semantic web", "web science", "linked data on the web"]):
+            automaton.add(text, index)
+        self.assertEqual(0, automaton.find("web"))
+        self.assertEqual(1, automaton.find("web sci"))
+        self.assertEqual(2, automaton.find("data"))
+        self.assertEqual(0, automaton.find(""))
+        self.assertIsNone(automaton.find("webs"))
+
+    def test_texts_out_of_order_raise(self):
+        automaton = SubstringAutomaton()
+        automaton.add("a", 1)
+        self.assertRaises(ValueError, automaton.add, "b", 0)
+
+
+class TestWikidataSeriesResolver(TestCase):
+    def setUp(self) -> None:
+        self.series = [
+            WikiDataEventSeries(qid=QID("Q1"), label="Semantic Web Workshop", acronym="SW"),
+            WikiDataEventSeries(
+                qid=QID("Q2"),
+                label="ESWC",
+                title="Extended Semantic Web Conference",
+                acronym="ESWC",
+                dblp_id="conf/esws",
+            ),
+            WikiDataEventSeries(qid=QID("Q3"), label="ESWC duplicate", dblp_id="conf/esws"),
+        ]
+        self.resolver = WikidataSeriesResolver(self.series)
+
+    def test_resolve_dblp_id_returns_first_series(self):
+        self.assertEqual(self.series[1], self.resolver.resolve_dblp_id("conf/esws"))
+        self.assertIsNone(self.resolver.resolve_dblp_id("conf/iswc"))
+
+    def test_resolve_keeps_order_of_series(self):
+        # The label of the first series contains the name, the acronym of the second is equal.
+        self.assertEqual(self.series[0], self.resolver.resolve("Semantic Web", "ESWC"))
+        self.assertEqual(self.series[1], self.resolver.resolve("Extended", None))
+        self.assertEqual(self.series[1], self.resolver.resolve("Unknown", "ESWC"))
+        self.assertIsNone(self.resolver.resolve("Unknown", None))
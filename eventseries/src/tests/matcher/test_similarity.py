@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import numpy as np
+from gensim.models import KeyedVectors
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+
+from eventseries.src.main.matcher.similarity import (
+    dense_best_match,
+    mean_token_vectors,
+    normalize_rows,
+    pair_similarities,
+    sparse_top_k,
+    top_k_pairs,
+)
+
+
+class TestSparseTopK(TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        dense_queries = rng.random((7, 12)) * (rng.random((7, 12)) > 0.6)
+        dense_index = rng.random((9, 12)) * (rng.random((9, 12)) > 0.6)
+        self.queries = csr_matrix(normalize(dense_queries))
+        self.index = csr_matrix(normalize(dense_index))
+        self.dense_similarities = normalize(dense_queries) @ normalize(dense_index).T
+
+    def test_top_1_equals_dense_argmax(self):
+        rows, cols, similarities = sparse_top_k(self.queries, self.index, top_k=1, chunk_size=2)
+        for row, col, similarity in zip(rows, cols, similarities):
+            self.assertEqual(np.argmax(self.dense_similarities[row]), col)
+            self.assertAlmostEqual(self.dense_similarities[row].max(), similarity)
+        rows_with_overlap = np.flatnonzero(self.dense_similarities.max(axis=1) > 0)
+        self.assertEqual(list(rows_with_overlap), list(rows))
+
+    def test_all_above_threshold(self):
+        rows, cols, similarities = sparse_top_k(
+            self.queries, self.index, top_k=None, threshold=0.3, chunk_size=3
+        )
+        expected = np.argwhere(self.dense_similarities >= 0.3)
+        self.assertEqual(
+            sorted(map(tuple, expected)), sorted(zip(rows.tolist(), cols.tolist()))
+        )
+        self.assertTrue(np.all(similarities >= 0.3))
+
+    def test_top_k_is_sorted(self):
+        rows, _, similarities = sparse_top_k(self.queries, self.index, top_k=3)
+        for row in np.unique(rows):
+            row_similarities = similarities[rows == row]
+            self.assertLessEqual(len(row_similarities), 3)
+            self.assertTrue(np.all(np.diff(row_similarities) <= 0))
+
+    def test_invalid_top_k(self):
+        with self.assertRaises(ValueError):
+            sparse_top_k(self.queries, self.index, top_k=0)
+
+    def test_top_k_pairs_of_all_pairs(self):
+        rows, cols = np.indices(self.dense_similarities.shape).reshape(2, -1)
+        similarities = pair_similarities(self.queries, self.index, rows, cols)
+        np.testing.assert_allclose(self.dense_similarities.ravel(), similarities)
+        expected = sparse_top_k(self.queries, self.index, top_k=2, threshold=0.1)
+        found = top_k_pairs(rows, cols, similarities, top_k=2, threshold=0.1)
+        np.testing.assert_array_equal(expected[0], found[0])
+        np.testing.assert_array_equal(expected[1], found[1])
+        np.testing.assert_allclose(expected[2], found[2])
+
+
+class TestDenseBestMatch(TestCase):
+    def test_equals_cosine_argmax(self):
+        rng = np.random.default_rng(7)
+        queries = rng.normal(size=(11, 5))
+        index = rng.normal(size=(6, 5))
+        queries[3] = 0
+        best, similarities = dense_best_match(
+            normalize_rows(queries), normalize_rows(index), block_size=4
+        )
+        expected_similarities = normalize(queries) @ normalize(index).T
+        self.assertEqual(list(np.argmax(expected_similarities, axis=1)), list(best))
+        np.testing.assert_allclose(expected_similarities.max(axis=1), similarities, atol=1e-6)
+        self.assertEqual(0, similarities[3])
+
+    def test_empty_index(self):
+        best, similarities = dense_best_match(np.ones((2, 3)), np.empty((0, 3)))
+        self.assertEqual([-1, -1], list(best))
+        self.assertEqual([0, 0], list(similarities))
+
+    def test_mean_token_vectors(self):
+        keyed_vectors = KeyedVectors(vector_size=2)
+        keyed_vectors.add_vectors(["a", "b"], np.array([[1, 0], [0, 3]], dtype=np.float32))
+        vectors = mean_token_vectors([["a", "b", "unknown"], ["unknown"]], keyed_vectors)
+        self.assertEqual(np.float32, vectors.dtype)
+        np.testing.assert_allclose([[0.5, 1.5], [0, 0]], vectors)
@@ -0,0 +1,55 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from eventseries.src.main.matcher.tfidf_matcher import TfIdfSeriesIndex
+
+
+class TestTfIdfSeriesIndex(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.index_file = Path(self.temp_dir.name) / "models" / "index.pickle"
+        self.series_titles = [
+            "International Semantic Web Conference",
+            "Workshop on Linked Data",
+            "European Conference on Artificial Intelligence",
+        ]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_fit_only_if_catalogue_changed(self):
+        index = TfIdfSeriesIndex(index_file=self.index_file)
+        self.assertTrue(index.fit(self.series_titles))
+        self.assertFalse(index.fit(list(self.series_titles)))
+        self.assertTrue(index.fit(self.series_titles + ["Another Series"]))
+
+    def test_persisted_index_is_reused(self):
+        TfIdfSeriesIndex(index_file=self.index_file).fit(self.series_titles)
+        self.assertTrue(self.index_file.is_file())
+        loaded = TfIdfSeriesIndex(index_file=self.index_file)
+        self.assertTrue(loaded.is_fitted())
+        self.assertFalse(loaded.fit(self.series_titles))
+
+    def test_unreadable_index_is_refitted(self):
+        TfIdfSeriesIndex(index_file=self.index_file).fit(self.series_titles)
+        self.index_file.write_bytes(self.index_file.read_bytes()[:20])
+        with self.assertLogs(level="WARNING"):
+            index = TfIdfSeriesIndex(index_file=self.index_file)
+        self.assertFalse(index.is_fitted())
+        self.assertTrue(index.fit(self.series_titles))
+        self.assertTrue(TfIdfSeriesIndex(index_file=self.index_file).is_fitted())
+
+    def test_search(self):
+        index = TfIdfSeriesIndex(index_file=None)
+        index.fit(self.series_titles)
+        rows, cols, similarities = index.search(
+            ["3rd Workshop on Linked Data", "Unrelated"], threshold=0.5
+        )
+        self.assertEqual([0], list(rows))
+        self.assertEqual([1], list(cols))
+        self.assertGreaterEqual(similarities[0], 0.5)
+
+    def test_transform_unfitted(self):
+        with self.assertRaises(ValueError):
+            TfIdfSeriesIndex(index_file=None).transform(["title"])
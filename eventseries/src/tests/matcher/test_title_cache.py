@@ -0,0 +1,76 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+from eventseries.src.main.matcher import title_cache
+from eventseries.src.main.matcher.title_cache import TitleCache
+
+
+def keyed_vectors(vectors) -> KeyedVectors:
+    result = KeyedVectors(vector_size=2)
+    result.add_vectors(["semantic", "web"], np.array(vectors, dtype=np.float32))
+    return result
+
+
+class TestTitleCache(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = Path(self.temp_dir.name) / "models" / "title_cache.pickle"
+        patcher = mock.patch.object(title_cache.nltk, "word_tokenize", side_effect=str.split)
+        self.word_tokenize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def new_cache(self, **kwargs) -> TitleCache:
+        cache = TitleCache(self.cache_file, **kwargs)
+        cache._stop_words = {"on", "the"}
+        return cache
+
+    def test_tokens_are_memoized_and_persisted(self):
+        cache = self.new_cache()
+        tokens = cache.tokens(["Workshop on the Semantic Web!", "Workshop  on the Semantic Web!"])
+        self.assertEqual([["workshop", "semantic", "web"]] * 2, tokens)
+        self.assertEqual(1, self.word_tokenize.call_count)
+        self.assertFalse(self.cache_file.exists())
+
+        cache.flush()
+        reloaded = self.new_cache()
+        reloaded.tokens(["Workshop on the Semantic Web!"])
+        self.assertEqual(1, self.word_tokenize.call_count)
+
+    def test_vectors_are_keyed_by_model(self):
+        cache = self.new_cache(max_models=1)
+        first = cache.vectors(["Semantic Web", "Unknown"], keyed_vectors([[1, 0], [0, 1]]))
+        np.testing.assert_allclose([[0.5, 0.5], [0, 0]], first)
+
+        retrained = cache.vectors(["Semantic Web"], keyed_vectors([[2, 0], [0, 2]]))
+        np.testing.assert_allclose([[1, 1]], retrained)
+        self.assertEqual(1, len(cache.vectors_by_model))
+        cache.flush()
+        self.assertEqual(1, len(self.new_cache().vectors_by_model))
+
+    def test_unreadable_cache_file_is_treated_as_empty(self):
+        cache = self.new_cache()
+        cache.tokens(["Semantic Web"])
+        cache.flush()
+        self.cache_file.write_bytes(self.cache_file.read_bytes()[:10])
+
+        with self.assertLogs(level="WARNING"):
+            truncated = self.new_cache()
+        self.assertEqual({}, truncated.tokens_by_title)
+        truncated.tokens(["Semantic Web"])
+        truncated.flush()
+        self.assertIn("Semantic Web", self.new_cache().tokens_by_title)
+
+    def test_vectors_of_replaced_model_vectors(self):
+        replaced = keyed_vectors([[1, 0], [0, 1]])
+        replaced.vectors = np.array([[1, 0, 2], [0, 1, 2]], dtype=np.float32)
+        self.assertEqual(2, replaced.vector_size)
+        np.testing.assert_allclose(
+            [[0.5, 0.5, 2]], self.new_cache().vectors(["Semantic Web"], replaced)
+        )
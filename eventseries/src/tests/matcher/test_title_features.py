@@ -0,0 +1,61 @@
+from datetime import datetime
+from unittest import TestCase
+
+from nltk import ngrams
+
+from eventseries.src.main.matcher.title_features import (
+    TitleFeatures,
+    acronym_key,
+    blocking_tokens,
+    char_ngram_hashes,
+    extract_ordinal,
+)
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+
+class TestTitleFeatures(TestCase):
+    def test_blocking_tokens(self):
+        self.assertEqual(
+            {"semantic", "web", "conference", "edition"},
+            blocking_tokens("The 12th Semantic Web Conference, Second Edition 2019"),
+        )
+        self.assertEqual("eswc", acronym_key("ESWC'19"))
+        self.assertIsNone(acronym_key("2019"))
+        self.assertEqual(12, extract_ordinal("The 12th Workshop"))
+        self.assertEqual(2, extract_ordinal("Second Workshop"))
+        self.assertIsNone(extract_ordinal("Workshop 2019"))
+
+    def test_char_ngram_hashes(self):
+        title = "Semantic Web"
+        self.assertEqual(len(set(ngrams(title, 3))), len(char_ngram_hashes(title, 3)))
+        self.assertEqual(frozenset(), char_ngram_hashes("ab", 3))
+
+    def test_from_items(self):
+        features = TitleFeatures.from_items(
+            [
+                WikiDataEvent(
+                    qid=QID("Q1"),
+                    label="3rd  Semantic Web Conference (SWC)",
+                    start_time=datetime(2019, 5, 1),
+                ),
+                WikiDataEventSeries(
+                    qid=QID("Q2"), label="Workshop 2020", title="Workshop", acronym="WS"
+                ),
+            ]
+        )
+        self.assertEqual(["3rd  Semantic Web Conference (SWC)", "Workshop"], features.titles)
+        self.assertEqual("3rd semantic web conference (swc)", features.normalized[0])
+        self.assertEqual(["SWC", "WS"], features.acronyms)
+        self.assertEqual(frozenset({"swc"}), features.acronym_keys[0])
+        # The year of the start time is used if the title has none.
+        self.assertEqual([2019, -1], list(features.years))
+        self.assertEqual([3, -1], list(features.ordinals))
+
+        hashes = features.ngram_hashes(3)
+        taken = features.take([1])
+        self.assertEqual(["Workshop"], taken.titles)
+        self.assertEqual([hashes[1]], taken.ngram_hashes(3))
@@ -0,0 +1,59 @@
+from unittest import TestCase, mock
+
+import numpy as np
+import pandas as pd
+from gensim.models import KeyedVectors
+
+from eventseries.src.main.matcher import title_cache
+from eventseries.src.main.matcher.title_cache import TitleCache
+from eventseries.src.main.matcher.word2vec_matcher import Word2VecMatch
+from eventseries.src.main.repository.wikidata_dataclasses import (
+    QID,
+    WikiDataEvent,
+    WikiDataEventSeries,
+)
+
+
+class TestWord2VecMatch(TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(title_cache.nltk, "word_tokenize", side_effect=str.split)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.title_cache = TitleCache(cache_file=None)
+        self.title_cache._stop_words = {"on", "the"}
+        # Pretrained vectors with another dimension than the trained model.
+        self.embeddings = KeyedVectors(vector_size=3)
+        rng = np.random.default_rng(0)
+        self.embeddings.add_vectors(
+            [f"word{i}" for i in range(50)], rng.normal(size=(50, 3)).astype(np.float32)
+        )
+        series = ["Semantic Web", "Linked Data", "Machine Learning", "Computer Vision"]
+        self.matches_df = pd.DataFrame(
+            {
+                "event": [f"{title} {year}" for title in series for year in (2019, 2020)],
+                "series": [title for title in series for _ in (2019, 2020)],
+            }
+        )
+
+    def test_fit_and_wikidata_scores(self):
+        matcher = Word2VecMatch(
+            self.matches_df.copy(), 0, self.embeddings, title_cache=self.title_cache
+        )
+        self.assertEqual(3, matcher.model.wv.vector_size)
+        self.assertIn(matcher.best_threshold, [0, 0.93, 0.95])
+
+        events = [
+            WikiDataEvent(qid=QID(f"Q{i}"), label=title, title=title)
+            for i, title in enumerate(["Semantic Web 2021", "Unknown Title"])
+        ]
+        series = [
+            WikiDataEventSeries(qid=QID(f"Q1{i}"), label=title, title=title)
+            for i, title in enumerate(["Semantic Web", "Linked Data"])
+        ]
+        matcher.recall = 0.5  # The tiny training set could be matched perfectly.
+        rows, cols, similarities = matcher.wikidata_scores(events, series)
+        self.assertEqual(len(rows), len(cols))
+        self.assertTrue(np.all(similarities > matcher.best_threshold))
+        # Unknown tokens have no vector, so the event is never matched.
+        self.assertNotIn(1, rows)
+        self.assertIn(0, rows)
@@ -85,3 +85,11 @@ class TestDblpRepository(TestCase):
         self.repo.ctx.dblp_cache.clear()
         self.repo.update_event_series_from_context()
         self.assertEqual(event_series, self.repo.get_or_load_event_series("conf/aaai"))
+
+    def test_get_or_load_parents(self):
+        self.repo.ctx.cache_dblp_id("conf/at/at2012", self.test_event_content)
+        parents = self.repo.get_or_load_parents("conf/at/at2012")
+        self.assertEqual([{"name": "AT", "dblp_id": "conf/at"}], parents)
+        self.repo.store_cached(overwrite=True)
+        fresh_repo = DblpRepository(self.repo.ctx, resource_dir=self.dblp_path, load_on_init=True)
+        self.assertEqual(parents, fresh_repo.parents.get("conf/at/at2012"))